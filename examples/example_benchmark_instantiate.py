@@ -0,0 +1,50 @@
+import timeit
+
+import hydra
+from my_package.utils.logger import get_logger
+from my_package.utils.module_utils import _locate, compile_instantiation, instantiate
+from omegaconf import DictConfig
+
+logger = get_logger(__name__)
+
+
+@hydra.main(config_path="../configs", config_name="default_lightning.yaml")
+def main(config: DictConfig):
+    """Compares `instantiate` with a reused `InstantiationPlan` for the model,
+    transforms and callbacks of the training config.
+
+    e.g.
+        python examples/example_benchmark_instantiate.py +number=100
+    """
+
+    number = config.get("number", 100)
+    confs = {"model": config.model}
+    for group in ("transforms", "callbacks"):
+        for name, conf in config.get(group, {}).items():
+            if "_target_" in conf:
+                confs[f"{group}.{name}"] = conf
+
+    _locate.cache_clear()
+    total_instantiate, total_plan = 0.0, 0.0
+    for name, conf in confs.items():
+        # `_batch_` flags of transforms are handled by lightning_utils
+        conf = {k: v for k, v in conf.items() if k != "_batch_"}
+        time_instantiate = timeit.timeit(lambda: instantiate(conf), number=number)
+        plan = compile_instantiation(conf)
+        time_plan = timeit.timeit(plan, number=number)
+        total_instantiate += time_instantiate
+        total_plan += time_plan
+        logger.info(
+            f"{name}: instantiate {time_instantiate / number * 1000:.3f} ms,"
+            f" plan {time_plan / number * 1000:.3f} ms"
+            f" ({time_instantiate / time_plan:.1f}x)"
+        )
+    logger.info(
+        f"total: instantiate {total_instantiate / number * 1000:.3f} ms,"
+        f" plan {total_plan / number * 1000:.3f} ms"
+        f" ({total_instantiate / total_plan:.1f}x), {_locate.cache_info()}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import os
+
+import hydra
+from my_package.datasets.image.memmap_dataset import convert_to_memmap
+from my_package.utils.logger import get_logger
+from my_package.utils.module_utils import instantiate
+from omegaconf import DictConfig
+
+logger = get_logger(__name__)
+
+
+@hydra.main(config_path="../configs", config_name="default_lightning.yaml")
+def main(config: DictConfig):
+    """Converts the configured datamodule's dataset into memory-mapped shards.
+
+    Either converts `datamodule.dataset_cls` (train and test splits) with
+    `datamodule.num_workers` processes, e.g.
+        python examples/example_convert_dataset.py datamodule=mnist \\
+            datamodule.memmap_dirname=MNIST_memmap datamodule.num_workers=8
+    or an image folder with fixed-size images, e.g.
+        python examples/example_convert_dataset.py \\
+            +image_folder=/path/to/images +output_dir=/path/to/output
+    """
+
+    if config.get("image_folder"):
+        convert_to_memmap(
+            dataset_cls="torchvision.datasets.ImageFolder",
+            output_dir=config.output_dir,
+            dataset_kwargs=dict(root=config.image_folder),
+            num_processes=config.get("num_processes"),
+        )
+        return
+
+    logger.info(f"Instantiating datamodule <{config.datamodule._target_}>")
+    datamodule = instantiate(config.datamodule)
+    if not datamodule.hparams.get("memmap_dirname"):
+        raise ValueError("Specify `datamodule.memmap_dirname` to convert to.")
+    datamodule.prepare_data()
+    path_memmap = os.path.join(
+        datamodule.hparams.data_dir, datamodule.hparams.memmap_dirname
+    )
+    logger.info(f"Converted dataset to {path_memmap}.")
+
+
+if __name__ == "__main__":
+    main()
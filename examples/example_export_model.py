@@ -0,0 +1,63 @@
+import os
+
+import hydra
+from my_package.applications.backends import build_runner, compare_latency
+from my_package.utils.export_utils import (
+    export_inference_artifact,
+    export_onnx,
+    export_torchscript,
+    load_lightning_state_dict,
+)
+from my_package.utils.logger import get_logger
+from my_package.utils.module_utils import instantiate
+from omegaconf import DictConfig, OmegaConf
+
+logger = get_logger(__name__)
+
+
+@hydra.main(config_path="../configs", config_name="default_demo.yaml")
+def main(config: DictConfig):
+    """Exports a trained model to a slim inference artifact, TorchScript and
+    ONNX, and compares latencies.
+
+    e.g.
+        python examples/example_export_model.py \\
+            model_state_dict=data/lightning_sample/exp_mnist/checkpoints/last.ckpt
+    """
+
+    logger.info(f"Instantiating model <{config.inference_api.model._target_}>")
+    model = instantiate(config.inference_api.model)
+    model.load_state_dict(load_lightning_state_dict(config.model_state_dict))
+    model.eval()
+
+    os.makedirs(config.export.dir, exist_ok=True)
+    export_inference_artifact(
+        config.model_state_dict,
+        os.path.join(config.export.dir, "model_artifact.pt"),
+        model_config=OmegaConf.to_container(config.inference_api.model, resolve=True),
+    )
+    input_shape = tuple(config.export.input_shape)
+    path_torchscript = export_torchscript(
+        model, os.path.join(config.export.dir, "model.pt"), input_shape
+    )
+    path_onnx = export_onnx(
+        model,
+        os.path.join(config.export.dir, "model.onnx"),
+        input_shape,
+        opset_version=config.export.opset_version,
+    )
+
+    logger.info("Comparing latencies of the backends.")
+    compare_latency(
+        {
+            "eager": build_runner("eager", model=model),
+            "compiled": build_runner("compiled", model=model),
+            "torchscript": build_runner("torchscript", artifact_path=path_torchscript),
+            "onnxruntime": build_runner("onnxruntime", artifact_path=path_onnx),
+        },
+        input_shape=input_shape[1:],
+    )
+
+
+if __name__ == "__main__":
+    main()
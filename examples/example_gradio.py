@@ -1,9 +1,9 @@
 import gradio
 import hydra
-import torch
+from my_package.applications.server import instantiate_inference_api
 from my_package.utils.logger import get_logger
 from my_package.utils.module_utils import instantiate
-from omegaconf import DictConfig
+from omegaconf import DictConfig, OmegaConf
 
 logger = get_logger(__name__)
 
@@ -12,16 +12,11 @@ logger = get_logger(__name__)
 def main(config: DictConfig):
 
     logger.info(f"Instantiating inference api <{config.inference_api._target_}>")
-    inference_api = instantiate(config.inference_api)
-
-    ckpt_dic = torch.load(config.model_state_dict)
-    # Lightningの辞書キーから不要な文字列を削除し置換
-    state_dict = {
-        ".".join(key.split(".")[1:]): value
-        for key, value in ckpt_dic["state_dict"].items()
-    }
-    inference_api.model.eval()
-    inference_api.model.load_state_dict(state_dict)
+    # loads the weights of the eager backend (exported models of
+    # torchscript/onnxruntime backends already have weights) and warms up
+    inference_api = instantiate_inference_api(
+        OmegaConf.to_container(config, resolve=True)
+    )
 
     inference_func = inference_api.inference
 
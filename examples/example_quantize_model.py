@@ -0,0 +1,96 @@
+import itertools
+import os
+
+import hydra
+from my_package.applications.backends import compare_latency
+from my_package.utils.export_utils import load_lightning_state_dict
+from my_package.utils.lightning_utils import prepare_lightning_datamodule
+from my_package.utils.logger import get_logger
+from my_package.utils.module_utils import instantiate
+from my_package.utils.quantization_utils import (
+    evaluate_accuracy,
+    quantize_dynamic_int8,
+    quantize_static_int8,
+    save_torchscript,
+    transferred_batches,
+)
+from omegaconf import DictConfig
+
+logger = get_logger(__name__)
+
+
+@hydra.main(config_path="../configs", config_name="default_quantization.yaml")
+def main(config: DictConfig):
+    """Quantizes a trained model to int8 and reports accuracy, latency and size.
+
+    e.g.
+        python examples/example_quantize_model.py \\
+            ckpt_path=data/lightning_sample/exp_mnist/checkpoints/last.ckpt
+    """
+
+    conf = config.quantization
+
+    logger.info(f"Instantiating model <{config.model.model._target_}>")
+    model = instantiate(config.model.model)
+    model.load_state_dict(load_lightning_state_dict(config.ckpt_path))
+    model.eval()
+
+    logger.info(f"Instantiating datamodule <{config.datamodule._target_}>")
+    datamodule = prepare_lightning_datamodule(config)
+    datamodule.prepare_data()
+    datamodule.setup()
+
+    if conf.mode == "dynamic":
+        quantized = quantize_dynamic_int8(model)
+    elif conf.mode == "static":
+        calibration_batches = itertools.islice(
+            transferred_batches(datamodule, datamodule.val_dataloader()),
+            conf.num_calibration_batches,
+        )
+        quantized = quantize_static_int8(
+            model, (x for x, _ in calibration_batches), backend=conf.backend
+        )
+    else:
+        raise ValueError(f"Unknown quantization mode {conf.mode}.")
+
+    accuracies = {
+        name: evaluate_accuracy(
+            m,
+            transferred_batches(datamodule, datamodule.test_dataloader()),
+            max_batches=conf.num_eval_batches,
+        )
+        for name, m in (("fp32", model), ("int8", quantized))
+    }
+
+    os.makedirs(os.path.dirname(conf.output_path), exist_ok=True)
+    root, ext = os.path.splitext(conf.output_path)
+    path_fp32 = save_torchscript(model, f"{root}_fp32{ext}")
+    path_int8 = save_torchscript(quantized, conf.output_path)
+    sizes = {
+        "fp32": os.path.getsize(path_fp32) / 1024,
+        "int8": os.path.getsize(path_int8) / 1024,
+    }
+
+    latencies = compare_latency(
+        {"fp32": model, "int8": quantized}, input_shape=(1, 28, 28)
+    )
+
+    logger.info(f"int8 ({conf.mode}) vs fp32:")
+    logger.info(
+        f"  accuracy: {accuracies['int8']:.4f} vs {accuracies['fp32']:.4f}"
+        f" ({accuracies['int8'] - accuracies['fp32']:+.4f})"
+    )
+    logger.info(
+        f"  size: {sizes['int8']:.1f} KiB vs {sizes['fp32']:.1f} KiB"
+        f" ({sizes['int8'] / sizes['fp32']:.2f}x)"
+    )
+    for batch_size, latency_fp32 in latencies["fp32"].items():
+        latency_int8 = latencies["int8"][batch_size]
+        logger.info(
+            f"  latency (batch size {batch_size}): {latency_int8:.3f} ms"
+            f" vs {latency_fp32:.3f} ms ({latency_int8 / latency_fp32:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import asyncio
+import functools
+
+import hydra
+from my_package.applications.server import InferenceServer, instantiate_inference_api
+from my_package.utils.logger import get_logger
+from omegaconf import DictConfig, OmegaConf
+
+logger = get_logger(__name__)
+
+
+@hydra.main(config_path="../configs", config_name="default_demo.yaml")
+def main(config: DictConfig):
+    """Serves the inference api over HTTP.
+
+    e.g.
+        python examples/example_server.py \\
+            model_state_dict=data/lightning_sample/exp_mnist/checkpoints/last.ckpt
+        curl localhost:8080/ready
+        curl -X POST localhost:8080/predict -d '{"image": [[0, 255], [255, 0]]}'
+    """
+
+    container = OmegaConf.to_container(config, resolve=True)
+    api_factory = functools.partial(instantiate_inference_api, container)
+    server = InferenceServer(api_factory, **config.server)
+    asyncio.run(server.serve_forever())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import hydra
+from example_train_lightning import train_and_test
+from my_package.trainers.sweep import grid_overrides, run_sweep
+from my_package.utils.logger import get_logger
+from omegaconf import DictConfig
+
+logger = get_logger(__name__)
+
+
+@hydra.main(config_path="../configs", config_name="default_sweep.yaml")
+def main(config: DictConfig):
+    from my_package.utils import extras
+
+    # Applies optional utilities
+    extras(config)
+
+    # Train a model per combination of the grid in parallel processes
+    results = run_sweep(
+        train_and_test,
+        config,
+        grid_overrides(config.sweep.grid),
+        output_dir=config.sweep.output_dir,
+        num_workers=config.sweep.num_workers,
+        num_threads=config.sweep.num_threads,
+        share_dataset=config.sweep.share_dataset,
+        mode=config.sweep.mode,
+    )
+    logger.info(f"{sum(r.status == 'ok' for r in results)} trials succeeded.")
+
+
+if __name__ == "__main__":
+    main()
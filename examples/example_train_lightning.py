@@ -6,7 +6,7 @@ from my_package.utils.lightning_utils import (
     prepare_lightning_trainer,
 )
 from my_package.utils.logger import get_logger
-from my_package.utils.module_utils import instantiate
+from my_package.utils.module_utils import cached_instantiation
 from omegaconf import DictConfig, OmegaConf
 from pytorch_lightning import (
     LightningDataModule,
@@ -40,7 +40,7 @@ def train_and_test(config: DictConfig) -> Optional[float]:
 
     # Init lightning model
     logger.info(f"Instantiating model  <{config.model._target_}>")
-    model: LightningModule = instantiate(config.model)
+    model: LightningModule = cached_instantiation(config.model)()
 
     # Init lightning datamodule
     logger.info(f"Instantiating datamodule <{config.datamodule._target_}>")
@@ -0,0 +1,26 @@
+from my_package.utils.import_utils import lazy_submodules
+
+# subpackages are imported on first access (e.g. `my_package.applications`), so
+# that importing the package does not pull in training-only dependencies
+__getattr__, __dir__ = lazy_submodules(
+    __name__,
+    [
+        "applications",
+        "callbacks",
+        "datamodules",
+        "datasets",
+        "experimental",
+        "litmodules",
+        "loggers",
+        "losses",
+        "metrics",
+        "models",
+        "optimizers",
+        "postprocessing",
+        "preprocessing",
+        "trainers",
+        "transforms",
+        "utils",
+        "visualizations",
+    ],
+)
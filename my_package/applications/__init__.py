@@ -0,0 +1,5 @@
+from my_package.utils.import_utils import lazy_submodules
+
+__getattr__, __dir__ = lazy_submodules(
+    __name__, ["backends", "dynamic_batcher", "image", "server"]
+)
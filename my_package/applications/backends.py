@@ -0,0 +1,124 @@
+import time
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+import torch
+from my_package.utils.compile_utils import CompiledModel
+from my_package.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+Runner = Callable[[torch.Tensor], torch.Tensor]
+
+BACKENDS = ("eager", "compiled", "torchscript", "onnxruntime")
+# backends running the model object, whose weights are loaded after building
+MODEL_BACKENDS = ("eager", "compiled")
+
+
+class ONNXRuntimeRunner:
+    """Runs an ONNX model exported by `export_onnx` with ONNX Runtime on CPU.
+
+    Args:
+        path (str): Path to the ONNX model.
+        num_threads (Optional[int], optional): Number of intra-op threads.
+            Defaults to ONNX Runtime's default.
+    """
+
+    def __init__(self, path: str, num_threads: Optional[int] = None):
+        # imported here, since importing onnxruntime takes long and it is only
+        # needed by this backend
+        try:
+            import onnxruntime
+        except ModuleNotFoundError as e:
+            raise ModuleNotFoundError(
+                "onnxruntime backend requires onnxruntime,"
+                " install it with `pip install onnxruntime`."
+            ) from e
+        options = onnxruntime.SessionOptions()
+        if num_threads is not None:
+            options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(
+            path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        (logits,) = self.session.run(None, {self.input_name: x.numpy()})
+        return torch.from_numpy(logits)
+
+
+def build_runner(
+    backend: str,
+    model: Optional[torch.nn.Module] = None,
+    artifact_path: Optional[str] = None,
+    num_threads: Optional[int] = None,
+) -> Runner:
+    """Returns a callable running the model forward with the given backend.
+
+    Args:
+        backend (str): Either of ``eager``, ``compiled`` (``torch.compile``,
+            see `CompiledModel`), ``torchscript`` or ``onnxruntime``.
+        model (Optional[torch.nn.Module], optional): Model run by ``eager`` and
+            ``compiled``.
+        artifact_path (Optional[str], optional): Path to the exported model
+            for ``torchscript`` (see `export_torchscript`) and ``onnxruntime``
+            (see `export_onnx`).
+        num_threads (Optional[int], optional): Number of intra-op threads of
+            ``onnxruntime``.
+
+    Raises:
+        ValueError: Raised if the backend is unknown or its model is missing.
+
+    Returns:
+        Runner: Callable mapping an input batch to logits.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend}: choose from {BACKENDS}.")
+    if backend in MODEL_BACKENDS:
+        if model is None:
+            raise ValueError(f"{backend} backend requires a model.")
+        return model if backend == "eager" else CompiledModel(model)
+    if artifact_path is None:
+        raise ValueError(f"{backend} backend requires an artifact_path.")
+    if backend == "torchscript":
+        return torch.jit.load(artifact_path, map_location="cpu")
+    return ONNXRuntimeRunner(artifact_path, num_threads=num_threads)
+
+
+def compare_latency(
+    runners: Dict[str, Runner],
+    input_shape: Sequence[int],
+    batch_sizes: Sequence[int] = (1, 32),
+    num_iters: int = 100,
+    num_warmup: int = 10,
+) -> Dict[str, Dict[int, float]]:
+    """Measures the median forward latency of each runner in milliseconds.
+
+    Args:
+        runners (Dict[str, Runner]): Runners to compare, by name.
+        input_shape (Sequence[int]): Input shape of a single sample.
+        batch_sizes (Sequence[int], optional): Batch sizes to measure.
+        num_iters (int, optional): Number of measured forwards.
+        num_warmup (int, optional): Number of forwards before measurement.
+
+    Returns:
+        Dict[str, Dict[int, float]]: Median latency per runner and batch size.
+    """
+    results: Dict[str, Dict[int, float]] = {}
+    for name, runner in runners.items():
+        results[name] = {}
+        for batch_size in batch_sizes:
+            x = torch.randn(batch_size, *input_shape)
+            times = []
+            with torch.no_grad():
+                for i in range(num_warmup + num_iters):
+                    start = time.perf_counter()
+                    runner(x)
+                    if i >= num_warmup:
+                        times.append(time.perf_counter() - start)
+            results[name][batch_size] = float(np.median(times) * 1000)
+            logger.info(
+                f"{name} (batch size {batch_size}):"
+                f" {results[name][batch_size]:.3f} ms"
+            )
+    return results
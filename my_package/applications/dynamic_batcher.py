@@ -0,0 +1,135 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Generic, List, Optional, Tuple, TypeVar
+
+from my_package.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_STOP = object()
+
+
+class DynamicBatcher(Generic[T, R]):
+    """Coalesces concurrent single-item requests into batched calls.
+
+    Requests submitted from any thread are queued, and a background thread calls
+    `batch_fn` with up to `max_batch_size` items, waiting at most `max_wait_ms`
+    after the first item for more items to arrive. Each result is sent back to
+    the future of its request.
+
+    Args:
+        batch_fn (Callable[[List[T]], List[R]]): Processes a list of items and
+            returns one result per item, in order.
+        max_batch_size (int, optional): Maximum number of items per batch.
+        max_wait_ms (float, optional): Maximum time in milliseconds to wait for
+            more items after the first item of a batch arrived.
+
+    >>> with DynamicBatcher(lambda xs: [x * 2 for x in xs]) as batcher:
+    ...     batcher(21)
+    42
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[T]], List[R]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+    ):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be positive: {max_batch_size}.")
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="DynamicBatcher", daemon=True
+                )
+                self._thread.start()
+
+    def close(self) -> None:
+        """Stops the background thread after processing the queued requests."""
+        with self._lock:
+            if self._thread is not None:
+                self._queue.put(_STOP)
+                self._thread.join()
+                self._thread = None
+
+    def submit(self, item: T) -> "Future[R]":
+        """Queues `item` and returns a future of its result."""
+        self.start()
+        future: "Future[R]" = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item: T, timeout: Optional[float] = None) -> R:
+        """Processes `item` in a batch and blocks until its result is ready."""
+        return self.submit(item).result(timeout=timeout)
+
+    def __enter__(self) -> "DynamicBatcher[T, R]":
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _collect(self) -> Tuple[List[Tuple[T, "Future[R]"]], bool]:
+        """Blocks for the first request and collects more until the batch is full
+        or the wait time has passed. Returns the batch and whether to stop."""
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                request = (
+                    self._queue.get(timeout=timeout)
+                    if timeout > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if request is _STOP:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch, stop = self._collect()
+            # skip requests cancelled while waiting in the queue
+            batch = [
+                (item, future)
+                for item, future in batch
+                if future.set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+            try:
+                results = self.batch_fn([item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"batch_fn returned {len(results)} results"
+                        f" for {len(batch)} items."
+                    )
+            except Exception as e:
+                logger.exception("Batch processing failed.")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
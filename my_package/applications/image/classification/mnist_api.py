@@ -1,33 +1,118 @@
-from typing import Dict, Union
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import torch
-import torch.nn.functional as F
-from torchvision import transforms
+from my_package.applications.backends import build_runner
+from my_package.applications.dynamic_batcher import DynamicBatcher
+from my_package.postprocessing.classification import (
+    to_label_dicts,
+    topk_probabilities,
+)
+from my_package.preprocessing.image_preprocessing import ImagePreprocessor
 
 Label = Union[Dict[str, float], str, int, float]
 
 
 class MNISTInferenceAPI:
-    def __init__(self, model: torch.nn.Module):
+    """Inference API of MNIST classification models.
+
+    Args:
+        model (Optional[torch.nn.Module], optional): Classification model, run
+            by the ``eager`` and ``compiled`` backends.
+        backend (str, optional): Either of ``eager``, ``compiled``,
+            ``torchscript`` or ``onnxruntime`` (see
+            `my_package.applications.backends`).
+        artifact_path (Optional[str], optional): Path to the model exported for
+            the ``torchscript`` or ``onnxruntime`` backend.
+        num_threads (Optional[int], optional): Number of intra-op threads of
+            the ``onnxruntime`` backend.
+        dynamic_batching (bool, optional): If True, concurrent `inference` calls
+            are coalesced into one forward by a `DynamicBatcher`.
+        max_batch_size (int, optional): Maximum batch size of dynamic batching.
+        max_wait_ms (float, optional): Maximum time in milliseconds dynamic
+            batching waits for more requests after the first one.
+        top_k (Optional[int], optional): Number of classes returned by
+            `inference` and `inference_batch`. Defaults to all classes.
+    """
+
+    def __init__(
+        self,
+        model: Optional[torch.nn.Module] = None,
+        backend: str = "eager",
+        artifact_path: Optional[str] = None,
+        num_threads: Optional[int] = None,
+        dynamic_batching: bool = False,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+        top_k: Optional[int] = None,
+    ):
         self.model = model
+        self.backend = backend
+        self.runner = build_runner(
+            backend, model=model, artifact_path=artifact_path, num_threads=num_threads
+        )
         self.output_size = 10
+        self.top_k = top_k
+        self.preprocess = ImagePreprocessor(
+            size=(28, 28), mean=(0.1307,), std=(0.3081,)
+        )
+
+        self.batcher: Optional[DynamicBatcher] = None
+        if dynamic_batching:
+            self.batcher = DynamicBatcher(
+                self.inference_batch,
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_wait_ms,
+            )
+
+    def warmup(self) -> None:
+        """Runs a forward on a blank image, e.g. before reporting ready."""
+        self.predict_batch([np.zeros((28, 28), dtype=np.uint8)], k=self.top_k)
 
     def inference(self, input_img_np: np.ndarray) -> Label:
-        data_transforms = transforms.Compose(
-            [
-                transforms.ToTensor(),
-                # transforms.Grayscale(num_output_channels=1),
-                transforms.Resize((28, 28)),
-                transforms.Normalize((0.1307,), (0.3081,)),
-            ]
-        )
-        if input_img_np is None:
-            return {i: 0.0 for i in range(10)}  # type: ignore
-        input_img_tensor = data_transforms(input_img_np)
-        # input_img_tensor = input_img_tensor.view(1, -1)
-        input_img_tensor = input_img_tensor.unsqueeze(0)
+        if self.batcher is not None:
+            return self.batcher(input_img_np)
+        return self.inference_batch([input_img_np])[0]
+
+    def predict_batch(
+        self, input_imgs_np: Sequence[np.ndarray], k: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Classifies images with a single forward of the model.
+
+        Args:
+            input_imgs_np (Sequence[np.ndarray]): Input images.
+            k (Optional[int], optional): Number of top classes to return.
+                Defaults to all classes.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Top-k class indices and probabilities
+                of shape ``[B, k]``.
+        """
         with torch.no_grad():
-            pred = self.model(input_img_tensor)[0]
-            pred = F.softmax(pred, dim=-1)
-        return {i: float(pred[i]) for i in range(pred.shape[-1])}  # type: ignore
+            logits = self.runner(self.preprocess(input_imgs_np))
+        return topk_probabilities(logits, k)
+
+    def inference_batch(self, input_imgs_np: Sequence[np.ndarray]) -> List[Label]:
+        """Classifies images with a single forward of the model.
+
+        Args:
+            input_imgs_np (Sequence[np.ndarray]): Input images. `None` entries
+                get zero probabilities for all classes.
+
+        Returns:
+            List[Label]: Probability of each of the top-k classes for each input
+                image.
+        """
+        labels: List[Label] = [
+            {i: 0.0 for i in range(self.output_size)}  # type: ignore
+            for _ in input_imgs_np
+        ]
+        valid = [i for i, img in enumerate(input_imgs_np) if img is not None]
+        if not valid:
+            return labels
+        indices, probs = self.predict_batch(
+            [input_imgs_np[i] for i in valid], k=self.top_k
+        )
+        for i, label in zip(valid, to_label_dicts(indices, probs)):
+            labels[i] = label  # type: ignore
+        return labels
@@ -0,0 +1,448 @@
+import asyncio
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+from my_package.applications.dynamic_batcher import DynamicBatcher
+from my_package.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+ApiFactory = Callable[[], Any]
+Response = Tuple[int, Dict[str, Any]]
+
+MAX_BODY_SIZE = 16 * 1024 * 1024
+# maximum seconds to wait for the worker processes to load and warm up
+WORKER_INIT_TIMEOUT = 600.0
+
+# inference api of each worker process (process executor only)
+_worker_api: Any = None
+# barrier of all worker processes, to wait until each one is warmed up
+_worker_barrier: Any = None
+
+
+def instantiate_inference_api(config: Dict[str, Any]) -> Any:
+    """Instantiates the inference api of `config`, loads its weights and warms
+    it up.
+
+    For the ``eager`` and ``compiled`` backends, the weights are loaded from
+    the slim inference artifact `model_artifact` (see
+    `export_inference_artifact`) if given, else from the Lightning checkpoint
+    `model_state_dict`. The ``compiled`` backend compiles during the warmup.
+
+    Args:
+        config (Dict[str, Any]): Container of the demo config
+            (`configs/default_demo.yaml`) with `inference_api` and, for the
+            ``eager`` and ``compiled`` backends, `model_artifact` or
+            `model_state_dict`.
+
+    Returns:
+        Any: Inference api with `predict_batch` method.
+    """
+    from my_package.applications.backends import MODEL_BACKENDS
+    from my_package.utils.export_utils import (
+        load_inference_model,
+        load_lightning_state_dict,
+    )
+    from my_package.utils.module_utils import instantiate
+    from omegaconf import OmegaConf
+
+    api_config = dict(config["inference_api"])
+    backend = api_config.get("backend", "eager")
+    if backend in MODEL_BACKENDS and config.get("model_artifact"):
+        model = load_inference_model(
+            config["model_artifact"], model_config=api_config.pop("model")
+        )
+        inference_api = instantiate(OmegaConf.create(api_config), model=model)
+    else:
+        inference_api = instantiate(OmegaConf.create(api_config))
+        if inference_api.backend in MODEL_BACKENDS:
+            state_dict = load_lightning_state_dict(config["model_state_dict"])
+            inference_api.model.load_state_dict(state_dict)
+            inference_api.model.eval()
+    inference_api.warmup()
+    return inference_api
+
+
+def _num_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _init_worker(api_factory: ApiFactory, num_threads: int, barrier: Any) -> None:
+    global _worker_api, _worker_barrier
+    # each forked worker would otherwise run a pool of a thread per CPU
+    torch.set_num_threads(num_threads)
+    _worker_api = api_factory()
+    _worker_api.warmup()
+    _worker_barrier = barrier
+
+
+def _wait_for_workers(timeout: float) -> None:
+    # returns once every worker process took one of these tasks, i.e. was
+    # initialized and warmed up
+    _worker_barrier.wait(timeout)
+
+
+def _predict_in_worker(
+    imgs: List[np.ndarray], k: Optional[int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    return _worker_api.predict_batch(imgs, k=k)
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _validate_image(img: np.ndarray) -> np.ndarray:
+    """Returns `img` if it is an image of shape ``[H, W]`` or ``[H, W, C]``
+    (C of 1, 3 or 4) the inference api accepts, else raises 400."""
+    if not (
+        (img.ndim == 2 or (img.ndim == 3 and img.shape[-1] in (1, 3, 4)))
+        and min(img.shape) > 0
+    ):
+        raise HTTPError(
+            HTTPStatus.BAD_REQUEST,
+            f"Invalid image shape {list(img.shape)}: expected [H, W] or [H, W, C].",
+        )
+    return img
+
+
+def _validate_top_k(top_k: Any) -> Optional[int]:
+    """Returns `top_k` if it is None or a positive int, else raises 400."""
+    if top_k is not None and (
+        not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 1
+    ):
+        raise HTTPError(
+            HTTPStatus.BAD_REQUEST, f"top_k must be a positive integer: {top_k!r}."
+        )
+    return top_k
+
+
+class InferenceServer:
+    """Asyncio HTTP/JSON server running inference in a bounded worker pool.
+
+    Endpoints:
+        - ``GET /health``: liveness, always 200 while the server runs.
+        - ``GET /ready``: 200 once the model is loaded and warmed up, else 503.
+        - ``POST /predict``: JSON body ``{"images": [...], "top_k": k}`` (or
+          ``{"image": ...}``) with images as nested lists of uint8 pixels.
+        - ``POST /predict/raw``: a single image as raw bytes, either encoded
+          (``Content-Type: image/png`` or ``image/jpeg``) or raw uint8 pixels
+          (``application/octet-stream`` with ``X-Height``, ``X-Width`` and
+          optional ``X-Channels`` headers).
+
+    Predictions are returned as ``{"predictions": [{"indices": [...],
+    "probabilities": [...]}]}``. At most `max_pending` prediction requests are
+    processed or queued at once; more requests get 503 with ``Retry-After``.
+
+    Args:
+        api_factory (ApiFactory): Picklable callable building the inference api
+            (e.g. `MNISTInferenceAPI`), called once per worker process with
+            the ``process`` executor and once otherwise.
+        host (str, optional): Host to bind.
+        port (int, optional): Port to bind (0 for a free port).
+        executor (str, optional): ``thread`` or ``process`` worker pool.
+        max_workers (Optional[int], optional): Number of workers. Defaults to
+            the number of CPUs.
+        threads_per_worker (Optional[int], optional): Number of torch threads
+            of each worker process with the ``process`` executor, or of the
+            server process with the ``thread`` executor. Defaults to the CPUs
+            divided by `max_workers` (all CPUs for the single forward thread
+            of dynamic batching), so that the workers do not oversubscribe
+            the CPUs.
+        max_pending (int, optional): Maximum number of in-flight predictions.
+        top_k (Optional[int], optional): Default number of classes returned.
+        dynamic_batching (bool, optional): With the ``thread`` executor,
+            coalesce concurrent single-image requests into one forward with a
+            `DynamicBatcher`.
+        max_batch_size (int, optional): Maximum batch size of dynamic batching.
+        max_wait_ms (float, optional): Maximum wait time of dynamic batching.
+    """
+
+    def __init__(
+        self,
+        api_factory: ApiFactory,
+        host: str = "0.0.0.0",
+        port: int = 8080,
+        executor: str = "thread",
+        max_workers: Optional[int] = None,
+        threads_per_worker: Optional[int] = None,
+        max_pending: int = 64,
+        top_k: Optional[int] = None,
+        dynamic_batching: bool = False,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+    ):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"executor must be thread or process: {executor}.")
+        self.api_factory = api_factory
+        self.host = host
+        self.port = port
+        self.executor_type = executor
+        self.max_workers = max_workers or _num_cpus()
+        self.dynamic_batching = dynamic_batching and executor == "thread"
+        if threads_per_worker is None:
+            num_forward_threads = 1 if self.dynamic_batching else self.max_workers
+            threads_per_worker = max(_num_cpus() // num_forward_threads, 1)
+        self.threads_per_worker = threads_per_worker
+        self.max_pending = max_pending
+        self.top_k = top_k
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self.ready = False
+        self.num_pending = 0
+        self._api: Any = None
+        self._executor: Optional[Executor] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._batcher: Optional[DynamicBatcher] = None
+        self._loading: Optional[asyncio.Future] = None
+        self._previous_num_threads: Optional[int] = None
+
+    async def start(self) -> int:
+        """Starts listening, then loads and warms up the model in the background.
+
+        Returns:
+            int: Bound port.
+        """
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Listening on {self.host}:{self.port}.")
+        self._loading = asyncio.ensure_future(self._load())
+        self._loading.add_done_callback(self._on_loaded)
+        return self.port
+
+    def _on_loaded(self, future: "asyncio.Future[None]") -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Failed to load the model: {future.exception()!r}")
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        if self._previous_num_threads is not None:
+            torch.set_num_threads(self._previous_num_threads)
+            self._previous_num_threads = None
+
+    async def _load(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self.executor_type == "process":
+            ctx = multiprocessing.get_context()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=ctx,
+                initializer=_init_worker,
+                initargs=(
+                    self.api_factory,
+                    self.threads_per_worker,
+                    ctx.Barrier(self.max_workers),
+                ),
+            )
+            # each worker warms up in its initializer
+            await asyncio.gather(
+                *[
+                    loop.run_in_executor(
+                        self._executor, _wait_for_workers, WORKER_INIT_TIMEOUT
+                    )
+                    for _ in range(self.max_workers)
+                ]
+            )
+        else:
+            # the threads share the intra-op pool of this process
+            self._previous_num_threads = torch.get_num_threads()
+            torch.set_num_threads(self.threads_per_worker)
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            self._api = await loop.run_in_executor(self._executor, self.api_factory)
+            await loop.run_in_executor(self._executor, self._api.warmup)
+            if self.dynamic_batching:
+                self._batcher = DynamicBatcher(
+                    self._predict_rows,
+                    max_batch_size=self.max_batch_size,
+                    max_wait_ms=self.max_wait_ms,
+                )
+        self.ready = True
+        logger.info("Inference server is ready.")
+
+    def _predict_rows(
+        self, imgs: List[np.ndarray]
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        indices, probs = self._api.predict_batch(imgs)
+        return list(zip(indices, probs))
+
+    async def _predict(
+        self, imgs: List[np.ndarray], k: Optional[int]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        loop = asyncio.get_running_loop()
+        if self._batcher is not None and len(imgs) == 1:
+            # all classes are predicted in a batch, then cut to top-k per request
+            indices, probs = await asyncio.wrap_future(self._batcher.submit(imgs[0]))
+            return indices[None, :k], probs[None, :k]
+        if self.executor_type == "process":
+            return await loop.run_in_executor(
+                self._executor, _predict_in_worker, imgs, k
+            )
+        return await loop.run_in_executor(
+            self._executor, lambda: self._api.predict_batch(imgs, k=k)
+        )
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._write_response(
+                        writer, (e.status, {"error": e.message}), keep_alive=False
+                    )
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                response = await self._dispatch(method, path, headers, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._write_response(writer, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, path, _ = request_line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line.")
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length.")
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Body too large.")
+        body = await reader.readexactly(length) if length else b""
+        return method, path.split("?")[0], headers, body
+
+    async def _dispatch(
+        self, method: str, path: str, headers: Dict[str, str], body: bytes
+    ) -> Response:
+        if method == "GET" and path == "/health":
+            return HTTPStatus.OK, {"status": "ok"}
+        if method == "GET" and path == "/ready":
+            if self.ready:
+                return HTTPStatus.OK, {"status": "ready"}
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"status": "loading"}
+        if method == "POST" and path in ("/predict", "/predict/raw"):
+            if not self.ready:
+                return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Not ready."}
+            # backpressure: reject instead of queueing without bound
+            if self.num_pending >= self.max_pending:
+                return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Overloaded."}
+            self.num_pending += 1
+            try:
+                # validated here, so that an invalid image never fails the other
+                # requests of its dynamic batch
+                if path == "/predict":
+                    imgs, k = self._parse_json(body)
+                else:
+                    imgs, k = [self._parse_raw(headers, body)], self.top_k
+                indices, probs = await self._predict(imgs, k)
+            except HTTPError as e:
+                return e.status, {"error": e.message}
+            except Exception:
+                logger.exception(f"Failed to predict {method} {path}.")
+                return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Prediction failed."}
+            finally:
+                self.num_pending -= 1
+            return HTTPStatus.OK, {
+                "predictions": [
+                    {"indices": i, "probabilities": p}
+                    for i, p in zip(indices.tolist(), probs.tolist())
+                ]
+            }
+        return HTTPStatus.NOT_FOUND, {"error": f"{method} {path} not found."}
+
+    def _parse_json(self, body: bytes) -> Tuple[List[np.ndarray], Optional[int]]:
+        try:
+            payload = json.loads(body)
+            images = payload["images"] if "images" in payload else [payload["image"]]
+            imgs = [np.asarray(img, dtype=np.uint8) for img in images]
+        except (ValueError, KeyError, TypeError) as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid JSON body: {e!r}")
+        if not imgs:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "No images given.")
+        imgs = [_validate_image(img) for img in imgs]
+        return imgs, _validate_top_k(payload.get("top_k", self.top_k))
+
+    def _parse_raw(self, headers: Dict[str, str], body: bytes) -> np.ndarray:
+        content_type = headers.get("content-type", "application/octet-stream")
+        try:
+            if content_type.startswith("image/"):
+                from PIL import Image
+
+                return np.asarray(Image.open(io.BytesIO(body)).convert("L"))
+            shape = [int(headers["x-height"]), int(headers["x-width"])]
+            if "x-channels" in headers:
+                shape.append(int(headers["x-channels"]))
+            img = np.frombuffer(body, dtype=np.uint8).reshape(shape)
+        except (ValueError, KeyError, OSError) as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid image: {e!r}")
+        return _validate_image(img)
+
+    async def _write_response(
+        self, writer: asyncio.StreamWriter, response: Response, keep_alive: bool
+    ) -> None:
+        status, payload = response
+        status = HTTPStatus(status)
+        body = json.dumps(payload).encode()
+        headers = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            headers.append("Retry-After: 1")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
@@ -0,0 +1,69 @@
+from my_package.trainers.asha import ASHAScheduler
+from my_package.utils.logger import get_logger
+from pytorch_lightning import Callback, LightningModule, Trainer
+
+logger = get_logger(__name__)
+
+
+class ASHAEarlyStopping(Callback):
+    """Stops the training of a sweep trial which is not promoted at a rung of
+    an `ASHAScheduler`.
+
+    At the end of each validation epoch which is a rung, the global rank 0
+    reports `monitor` (e.g. ``Accuracy//val`` logged by
+    `ImageClassificationLitModule`) to the scheduler, and the trainer stops if
+    the trial is not in the top ``1 / reduction_factor`` of the trials which
+    reached the rung. The trials share the scheduler's SQLite database `path`,
+    e.g. in ``sweep.output_dir`` of `configs/default_sweep.yaml`.
+
+    Args:
+        path (str): Path of the SQLite database of the scheduler.
+        trial_id (str): Unique name of the trial in the sweep, e.g. its
+            directory.
+        monitor (str, optional): Name of the logged score.
+        mode (str, optional): ``max`` or ``min``, whether a higher or a lower
+            score is better.
+        min_epochs (int, optional): Epoch of the first rung.
+        reduction_factor (int, optional): Ratio of the epochs of successive
+            rungs, and inverse of the promoted fraction of the trials.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        trial_id: str,
+        monitor: str = "Accuracy//val",
+        mode: str = "max",
+        min_epochs: int = 1,
+        reduction_factor: int = 3,
+    ):
+        super().__init__()
+        self.scheduler = ASHAScheduler(
+            path, min_epochs=min_epochs, reduction_factor=reduction_factor, mode=mode
+        )
+        self.trial_id = trial_id
+        self.monitor = monitor
+        self.stopped_epoch = 0
+
+    def on_validation_end(self, trainer: Trainer, pl_module: LightningModule):
+        if trainer.sanity_checking or trainer.fast_dev_run:
+            return
+        epoch = trainer.current_epoch + 1
+        if self.scheduler.rung(epoch) is None:
+            return
+
+        promoted = True
+        if trainer.is_global_zero:
+            if self.monitor not in trainer.callback_metrics:
+                raise KeyError(
+                    f"ASHAEarlyStopping needs {self.monitor}, found"
+                    f" {list(trainer.callback_metrics)}."
+                )
+            score = float(trainer.callback_metrics[self.monitor])
+            promoted = self.scheduler.report(self.trial_id, epoch, score)
+        promoted = trainer.strategy.broadcast(promoted)
+        if not promoted:
+            trainer.should_stop = True
+            self.stopped_epoch = epoch
+            if trainer.is_global_zero:
+                logger.info(f"Stopping trial {self.trial_id} after epoch {epoch}.")
@@ -0,0 +1,177 @@
+import os
+import time
+from typing import Any, Dict, Optional
+
+import torch
+from my_package.utils.logger import get_logger
+from pytorch_lightning import Callback, LightningModule, Trainer
+
+logger = get_logger(__name__)
+try:
+    import psutil
+except ModuleNotFoundError:
+    psutil = None
+
+PHASES = ("data_wait", "forward", "backward", "optimizer")
+
+
+def _batch_size(batch: Any) -> int:
+    """Returns the number of samples of a batch, e.g. of ``(x, y)``."""
+    if isinstance(batch, torch.Tensor):
+        return batch.size(0) if batch.dim() > 0 else 1
+    if isinstance(batch, (list, tuple)) and batch:
+        return _batch_size(batch[0])
+    if isinstance(batch, dict) and batch:
+        return _batch_size(next(iter(batch.values())))
+    return 0
+
+
+class ThroughputMonitor(Callback):
+    """Measures training throughput and reports it to the trainer's loggers.
+
+    Every `log_every_n_steps` steps, and at the end of each epoch, the
+    following metrics are logged (averaged over the steps since the last log):
+
+        - ``Throughput//samples_per_sec``: training samples per second.
+        - ``Time//{data_wait,forward,backward,optimizer}_ms``: time per step
+          waiting for the DataLoader (including the batch transfer), in the
+          forward (training step), backward and optimizer step.
+        - ``Time//data_wait_fraction``: fraction of the step time waiting for
+          the DataLoader.
+        - ``System//cpu_percent``: CPU usage of the process (100 per core).
+        - ``System//rss_mb``: resident memory of the process (needs psutil).
+
+    Epoch-level metrics have the ``_epoch`` suffix. The hooks only read the
+    clock, so the overhead is negligible and the callback can stay enabled.
+    CUDA kernels run asynchronously, so the phases are only accurate with
+    `cuda_sync`, which synchronizes at each phase boundary.
+
+    Args:
+        log_every_n_steps (int, optional): Interval of step-level logs.
+        cuda_sync (bool, optional): If True, synchronize CUDA before reading
+            the clock.
+    """
+
+    def __init__(self, log_every_n_steps: int = 50, cuda_sync: bool = False):
+        super().__init__()
+        self.log_every_n_steps = log_every_n_steps
+        self.cuda_sync = cuda_sync
+        self._process = psutil.Process() if psutil is not None else None
+        if psutil is None:
+            logger.info("psutil is not installed, System//rss_mb is not logged.")
+        self._reset_step_state()
+
+    def _reset_step_state(self) -> None:
+        self._last_time: Optional[float] = None
+        self._phase_start: Dict[str, float] = {}
+        self._window = self._new_window()
+        self._epoch = self._new_window()
+
+    def _new_window(self) -> Dict[str, float]:
+        window = {phase: 0.0 for phase in PHASES}
+        window.update(
+            steps=0,
+            samples=0,
+            start=time.perf_counter(),
+            cpu_start=sum(os.times()[:2]),
+        )
+        return window
+
+    def _now(self, pl_module: LightningModule) -> float:
+        if self.cuda_sync and pl_module.device.type == "cuda":
+            torch.cuda.synchronize(pl_module.device)
+        return time.perf_counter()
+
+    def on_train_epoch_start(self, trainer: Trainer, pl_module: LightningModule):
+        self._reset_step_state()
+        self._last_time = time.perf_counter()
+
+    def on_train_batch_start(
+        self,
+        trainer: Trainer,
+        pl_module: LightningModule,
+        batch: Any,
+        batch_idx: int,
+        unused: int = 0,
+    ):
+        now = self._now(pl_module)
+        if self._last_time is not None:
+            self._add("data_wait", now - self._last_time)
+        self._phase_start = {"forward": now}
+
+    def on_before_backward(
+        self, trainer: Trainer, pl_module: LightningModule, loss: torch.Tensor
+    ):
+        now = self._now(pl_module)
+        self._end_phase("forward", now)
+        self._phase_start["backward"] = now
+
+    def on_after_backward(self, trainer: Trainer, pl_module: LightningModule):
+        self._end_phase("backward", self._now(pl_module))
+
+    def on_before_optimizer_step(
+        self,
+        trainer: Trainer,
+        pl_module: LightningModule,
+        optimizer: torch.optim.Optimizer,
+        opt_idx: int,
+    ):
+        self._phase_start["optimizer"] = self._now(pl_module)
+
+    def on_train_batch_end(
+        self,
+        trainer: Trainer,
+        pl_module: LightningModule,
+        outputs: Any,
+        batch: Any,
+        batch_idx: int,
+        unused: int = 0,
+    ):
+        now = self._now(pl_module)
+        # without backward (e.g. manual optimization), the whole step is forward
+        self._end_phase("forward", now)
+        self._end_phase("optimizer", now)
+        self._last_time = now
+
+        num_samples = _batch_size(batch)
+        for window in (self._window, self._epoch):
+            window["steps"] += 1
+            window["samples"] += num_samples
+
+        if self._window["steps"] >= self.log_every_n_steps:
+            self._log(trainer, self._summarize(self._window), suffix="")
+            self._window = self._new_window()
+
+    def on_train_epoch_end(self, trainer: Trainer, pl_module: LightningModule):
+        if self._epoch["steps"] > 0:
+            self._log(trainer, self._summarize(self._epoch), suffix="_epoch")
+
+    def _add(self, phase: str, seconds: float) -> None:
+        self._window[phase] += seconds
+        self._epoch[phase] += seconds
+
+    def _end_phase(self, phase: str, now: float) -> None:
+        start = self._phase_start.pop(phase, None)
+        if start is not None:
+            self._add(phase, now - start)
+
+    def _summarize(self, window: Dict[str, float]) -> Dict[str, float]:
+        elapsed = max(time.perf_counter() - window["start"], 1e-9)
+        steps = max(window["steps"], 1)
+        metrics = {"Throughput//samples_per_sec": window["samples"] / elapsed}
+        for phase in PHASES:
+            metrics[f"Time//{phase}_ms"] = window[phase] / steps * 1000
+        step_time = sum(window[phase] for phase in PHASES)
+        metrics["Time//data_wait_fraction"] = window["data_wait"] / max(step_time, 1e-9)
+        cpu_time = sum(os.times()[:2]) - window["cpu_start"]
+        metrics["System//cpu_percent"] = cpu_time / elapsed * 100
+        if self._process is not None:
+            metrics["System//rss_mb"] = self._process.memory_info().rss / 2**20
+        return metrics
+
+    def _log(self, trainer: Trainer, metrics: Dict[str, float], suffix: str) -> None:
+        if not trainer.is_global_zero:
+            return
+        metrics = {f"{key}{suffix}": value for key, value in metrics.items()}
+        for pl_logger in trainer.loggers:
+            pl_logger.log_metrics(metrics, step=trainer.global_step)
@@ -0,0 +1,207 @@
+import os
+import signal
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from my_package.utils.logger import get_logger
+from pytorch_lightning import Callback, LightningModule, Trainer
+from torch.profiler import ProfilerActivity, profile, schedule
+
+logger = get_logger(__name__)
+
+
+class TraceCapture(Callback):
+    """Captures a `torch.profiler` trace of a few training steps on demand.
+
+    A capture of `num_steps` steps (after `warmup_steps` unrecorded steps) is
+    triggered by any of:
+
+        - the signal `signal_name` sent to the process, e.g.
+          ``kill -USR1 <pid>``,
+        - creating the file `sentinel_file` (removed when the capture starts),
+          checked every `poll_every_n_steps` steps,
+        - reaching one of the global steps in `schedule_steps`.
+
+    Each capture writes a Chrome trace (``trace.json``, open it in
+    ``chrome://tracing`` or Perfetto) and an operator summary
+    (``summary.txt``) to ``{output_dir}/step{global_step}_rank{rank}_{time}``.
+    Until triggered, the callback only checks a flag per step, so it can stay
+    enabled in long-running jobs.
+
+    Args:
+        output_dir (str): Directory of the captured traces.
+        num_steps (int, optional): Number of recorded steps per capture.
+        warmup_steps (int, optional): Number of profiled but unrecorded steps
+            before recording, to exclude the profiler's startup overhead.
+        signal_name (Optional[str], optional): Name of the triggering signal.
+            Disabled if None or not supported by the platform.
+        sentinel_file (Optional[str], optional): Path of the triggering file.
+            Disabled if None.
+        poll_every_n_steps (int, optional): Interval of checks of
+            `sentinel_file`.
+        schedule_steps (Sequence[int], optional): Global steps starting a
+            capture.
+        record_shapes (bool, optional): Record input shapes of operators.
+        profile_memory (bool, optional): Record memory allocations.
+        with_stack (bool, optional): Record Python stacks of operators.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        num_steps: int = 10,
+        warmup_steps: int = 1,
+        signal_name: Optional[str] = "SIGUSR1",
+        sentinel_file: Optional[str] = None,
+        poll_every_n_steps: int = 10,
+        schedule_steps: Sequence[int] = (),
+        record_shapes: bool = False,
+        profile_memory: bool = False,
+        with_stack: bool = False,
+    ):
+        super().__init__()
+        if num_steps < 1:
+            raise ValueError(f"num_steps must be positive: {num_steps}.")
+        self.output_dir = output_dir
+        self.num_steps = num_steps
+        self.warmup_steps = warmup_steps
+        self.signal_name = signal_name
+        self.sentinel_file = sentinel_file
+        self.poll_every_n_steps = poll_every_n_steps
+        self.schedule_steps = set(schedule_steps)
+        self.record_shapes = record_shapes
+        self.profile_memory = profile_memory
+        self.with_stack = with_stack
+
+        self.trace_dirs: List[str] = []
+        self._triggered = False
+        self._profiler: Optional[profile] = None
+        self._trace_dir: Optional[str] = None
+        self._num_profiled_steps = 0
+        self._previous_handler: Any = None
+
+    def _signal(self) -> Optional[signal.Signals]:
+        if self.signal_name is None:
+            return None
+        return getattr(signal, self.signal_name, None)
+
+    def on_fit_start(self, trainer: Trainer, pl_module: LightningModule):
+        signum = self._signal()
+        if signum is None:
+            return
+        # signal handlers can only be set from the main thread
+        if threading.current_thread() is not threading.main_thread():
+            logger.warning(f"Not in the main thread, {self.signal_name} is ignored.")
+            return
+        self._previous_handler = signal.signal(signum, self._on_signal)
+        logger.info(
+            f"Send {self.signal_name} to process {os.getpid()} to capture a trace"
+            f" of {self.num_steps} steps."
+        )
+
+    def on_fit_end(self, trainer: Trainer, pl_module: LightningModule):
+        signum = self._signal()
+        if signum is not None and self._previous_handler is not None:
+            signal.signal(signum, self._previous_handler)
+            self._previous_handler = None
+
+    def _on_signal(self, signum: int, frame: Any) -> None:
+        # only set a flag, the capture starts at the next step
+        self._triggered = True
+
+    def _should_start(self, trainer: Trainer) -> bool:
+        if self._triggered:
+            self._triggered = False
+            return True
+        step = trainer.global_step
+        if step in self.schedule_steps:
+            return True
+        if (
+            self.sentinel_file is not None
+            and step % self.poll_every_n_steps == 0
+            and os.path.exists(self.sentinel_file)
+        ):
+            os.remove(self.sentinel_file)
+            return True
+        return False
+
+    def on_train_batch_start(
+        self,
+        trainer: Trainer,
+        pl_module: LightningModule,
+        batch: Any,
+        batch_idx: int,
+        unused: int = 0,
+    ):
+        if self._profiler is None and self._should_start(trainer):
+            self._start(trainer, pl_module)
+
+    def on_train_batch_end(
+        self,
+        trainer: Trainer,
+        pl_module: LightningModule,
+        outputs: Any,
+        batch: Any,
+        batch_idx: int,
+        unused: int = 0,
+    ):
+        if self._profiler is None:
+            return
+        self._profiler.step()
+        self._num_profiled_steps += 1
+        if self._num_profiled_steps >= self.warmup_steps + self.num_steps:
+            self._stop()
+
+    def on_train_end(self, trainer: Trainer, pl_module: LightningModule):
+        # training ended within a capture: save the steps recorded so far
+        if self._profiler is not None:
+            self._stop()
+
+    def _start(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        activities = [ProfilerActivity.CPU]
+        if pl_module.device.type == "cuda":
+            activities.append(ProfilerActivity.CUDA)
+        self._trace_dir = os.path.join(
+            self.output_dir,
+            f"step{trainer.global_step:08d}_rank{trainer.global_rank}"
+            f"_{time.strftime('%Y%m%d-%H%M%S')}",
+        )
+        self._num_profiled_steps = 0
+        self._profiler = profile(
+            activities=activities,
+            schedule=schedule(
+                wait=0, warmup=self.warmup_steps, active=self.num_steps, repeat=1
+            ),
+            on_trace_ready=self._save,
+            record_shapes=self.record_shapes,
+            profile_memory=self.profile_memory,
+            with_stack=self.with_stack,
+        )
+        logger.info(f"Capturing a trace of {self.num_steps} steps.")
+        self._profiler.start()
+
+    def _stop(self) -> None:
+        profiler, self._profiler = self._profiler, None
+        profiler.stop()
+
+    def _save(self, profiler: profile) -> None:
+        os.makedirs(self._trace_dir, exist_ok=True)
+        profiler.export_chrome_trace(os.path.join(self._trace_dir, "trace.json"))
+        sort_by = (
+            "self_cuda_time_total"
+            if ProfilerActivity.CUDA in profiler.activities
+            else "self_cpu_time_total"
+        )
+        summary = profiler.key_averages().table(sort_by=sort_by, row_limit=50)
+        with open(os.path.join(self._trace_dir, "summary.txt"), "w") as f:
+            f.write(summary)
+        self.trace_dirs.append(self._trace_dir)
+        logger.info(f"Saved trace to {self._trace_dir}.")
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # the profiler and the signal handler cannot be pickled
+        state = self.__dict__.copy()
+        state["_profiler"] = None
+        state["_previous_handler"] = None
+        return state
@@ -1,13 +1,41 @@
+import functools
 import os
 from pathlib import Path
-from typing import Any, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import torch
+from my_package.datasets.image.in_memory_dataset import (
+    InMemoryImageDataset,
+    batched_dataloader,
+    get_shared_dataset,
+)
+from my_package.datasets.image.memmap_dataset import (
+    MemmapImageDataset,
+    convert_to_memmap,
+    memmap_exists,
+)
+from my_package.datasets.image.sharded_dataset import (
+    RankShardedDataset,
+    get_rank_and_world_size,
+    sharded_dataloader,
+)
+from my_package.transforms.batch_transforms import BatchCompose
 from my_package.utils import get_class
+from my_package.utils.dataloader_utils import (
+    autotune_dataloader,
+    dataloader_kwargs,
+    default_autotune_grid,
+)
 from my_package.utils.dvc_utils import get_dataset_with_dvc_get
 from my_package.utils.logger import get_logger
 from pytorch_lightning import LightningDataModule
-from torch.utils.data import ConcatDataset, DataLoader, Dataset, random_split
+from torch.utils.data import (
+    ConcatDataset,
+    DataLoader,
+    Dataset,
+    Subset,
+    random_split,
+)
 from torchvision.transforms import transforms as vision_transforms
 
 logger = get_logger(__name__)
@@ -28,6 +56,30 @@ class ImageDataModule(LightningDataModule):
 
     Read the docs:
         https://pytorch-lightning.readthedocs.io/en/latest/extensions/datamodules.html
+
+    If `in_memory` is True, the datasets are decoded and transformed only once in
+    `setup` and kept as contiguous tensors (see `InMemoryImageDataset`), and the
+    dataloaders fetch whole batches by slicing instead of per-sample indexing.
+
+    If `shard_by_rank` is also True, each rank of distributed training decodes
+    only its own shard of each split (see `RankShardedDataset`), and the training
+    samples are reshuffled across the ranks every epoch. Since the dataloaders
+    are then already sharded, the trainer must not add a ``DistributedSampler``
+    (``replace_sampler_ddp=False``, see `configs/trainer/ddp_rank_sharded.yaml`).
+
+    If `memmap_dirname` is given, `dataset_cls` is converted once into
+    memory-mapped shards under `data_dir/memmap_dirname` (see
+    `MemmapImageDataset`), which are shared zero-copy by the dataloader workers.
+
+    `transforms` are applied to each sample in the dataloader, whereas
+    `batch_transforms` (see `my_package.transforms.batch_transforms`) are applied
+    to the whole `[B, C, H, W]` batch after it is transferred to the device.
+    Random batch transforms are applied only while training.
+
+    If `autotune` is True, the dataloader settings (`num_workers`,
+    `prefetch_factor`, `persistent_workers` and `batch_size`) giving the highest
+    samples/sec on the training set are searched over `autotune_grid` in `setup`,
+    and the selected settings are logged as hyperparameters of the run.
     """
 
     def __init__(
@@ -37,12 +89,21 @@ class ImageDataModule(LightningDataModule):
         train_val_test_split: Tuple[int, int, int] = (55_000, 5_000, 10_000),
         batch_size: int = 64,
         transforms: List[Any] = [vision_transforms.ToTensor()],
+        batch_transforms: List[Any] = [],
         num_workers: int = 0,
         pin_memory: bool = False,
+        persistent_workers: bool = False,
+        prefetch_factor: Optional[int] = None,
+        autotune: bool = False,
+        autotune_grid: Optional[Dict[str, List[Any]]] = None,
+        autotune_num_batches: int = 200,
         dvc_repo: Optional[str] = None,
         dvc_dir: Optional[str] = None,
         dvc_rev: Optional[str] = None,
         dataset_cls: Optional[str] = None,
+        in_memory: bool = False,
+        shard_by_rank: bool = False,
+        memmap_dirname: Optional[str] = None,
         *args: Any,
         **kwargs: Any,
     ):
@@ -53,16 +114,23 @@ class ImageDataModule(LightningDataModule):
 
         # data transformations
         self.transforms = vision_transforms.Compose(transforms)
+        self.batch_transforms = (
+            BatchCompose(batch_transforms) if batch_transforms else None
+        )
 
         self.data_train: Optional[Dataset] = None
         self.data_val: Optional[Dataset] = None
         self.data_test: Optional[Dataset] = None
 
+        self._autotuned = False
+
         if (not (dvc_repo and dvc_dir)) and not dataset_cls:
             raise ValueError(
                 "Either of DVC repository & directory or"
                 " dataset_cls should be specified."
             )
+        if shard_by_rank and not in_memory:
+            raise ValueError("shard_by_rank requires in_memory.")
 
     @property
     def num_classes(self) -> int:
@@ -73,11 +141,16 @@ class ImageDataModule(LightningDataModule):
         return num_classes
 
     def prepare_data(self):
-        """Download data if needed.
+        """Download data and convert it to memory-mapped shards if needed.
 
         This method is called only from a single GPU.
         Do not use it to assign state (self.x = y).
         """
+        self._download_data()
+        if self.hparams.get("memmap_dirname"):
+            self._convert_to_memmap()
+
+    def _download_data(self):
         path_dataset = Path(
             os.path.join(self.hparams["data_dir"], self.hparams["dataset_dirname"])
         )
@@ -109,6 +182,24 @@ class ImageDataModule(LightningDataModule):
             dataset_cls(self.hparams["data_dir"], train=True, download=True)
             dataset_cls(self.hparams["data_dir"], train=False, download=True)
 
+    def _convert_to_memmap(self):
+        for split, train in (("train", True), ("test", False)):
+            path_memmap = self._path_memmap(split)
+            if memmap_exists(path_memmap):
+                logger.info(f"Memory-mapped {split} dataset already exists.")
+                continue
+            convert_to_memmap(
+                dataset_cls=self.hparams["dataset_cls"],
+                output_dir=path_memmap,
+                dataset_kwargs=dict(root=self.hparams["data_dir"], train=train),
+                num_processes=max(self.hparams["num_workers"], 1),
+            )
+
+    def _path_memmap(self, split: str) -> str:
+        return os.path.join(
+            self.hparams["data_dir"], self.hparams["memmap_dirname"], split
+        )
+
     def setup(self, stage: Optional[str] = None) -> None:
         """Load data. Set variables: `self.data_train`, `self.data_val`, `self.data_test`.
 
@@ -123,6 +214,28 @@ class ImageDataModule(LightningDataModule):
 
         # load datasets only if they're not loaded already
         if not self.data_train and not self.data_val and not self.data_test:
+            if self.hparams.get("in_memory"):
+                self._setup_in_memory()
+            else:
+                self.data_train, self.data_val, self.data_test = random_split(
+                    dataset=self._load_dataset(),
+                    lengths=self.hparams["train_val_test_split"],
+                    generator=torch.Generator().manual_seed(42),
+                )
+
+        if self.hparams.get("autotune") and not self._autotuned:
+            self._autotune()
+
+    def _load_dataset(self) -> Dataset:
+        """Returns the concatenated train and test dataset."""
+        if self.hparams.get("memmap_dirname"):
+            trainset = MemmapImageDataset(
+                self._path_memmap("train"), transform=self.transforms
+            )
+            testset = MemmapImageDataset(
+                self._path_memmap("test"), transform=self.transforms
+            )
+        else:
             dataset_cls = get_class(self.hparams["dataset_cls"])
             trainset = dataset_cls(
                 self.hparams["data_dir"],
@@ -134,38 +247,144 @@ class ImageDataModule(LightningDataModule):
                 train=False,
                 transform=self.transforms,
             )
-            dataset: torch.utils.data.Dataset = ConcatDataset(  # type: ignore
-                datasets=[trainset, testset]
+        return ConcatDataset(datasets=[trainset, testset])
+
+    @property
+    def in_memory_key(self) -> str:
+        """Key of the decoded dataset, equal for datamodules reading the same
+        data with the same per-sample transforms."""
+        source = self.hparams.get("memmap_dirname") or self.hparams["dataset_cls"]
+        return f"{self.hparams['data_dir']}|{source}|{self.transforms!r}"
+
+    def decode_dataset(self) -> InMemoryImageDataset:
+        """Returns the concatenated train and test dataset decoded in memory.
+
+        A dataset shared under `in_memory_key` (see
+        `my_package.datasets.image.in_memory_dataset.share_dataset`), e.g. by
+        a sweep runner decoding it once for all its trials, is returned
+        without decoding.
+
+        Returns:
+            InMemoryImageDataset: Decoded dataset.
+        """
+        shared = get_shared_dataset(self.in_memory_key)
+        if shared is not None:
+            logger.info(f"Using the shared dataset of {len(shared)} samples.")
+            return shared
+        return InMemoryImageDataset.from_dataset(
+            self._load_dataset(), num_workers=self.hparams["num_workers"]
+        )
+
+    def _autotune(self) -> None:
+        """Selects the fastest dataloader settings and logs them."""
+        grid = self.hparams.get("autotune_grid") or default_autotune_grid(
+            self.hparams["batch_size"]
+        )
+        settings = autotune_dataloader(
+            build_dataloader=functools.partial(self._dataloader, self.data_train, True),
+            grid=grid,
+            num_batches=self.hparams["autotune_num_batches"],
+        )
+        self.hparams.update(settings)
+        self._autotuned = True
+
+        if self.trainer is not None and self.trainer.logger is not None:
+            self.trainer.logger.log_hyperparams(
+                {f"dataloader_autotune/{k}": v for k, v in settings.items()}
             )
-            self.data_train, self.data_val, self.data_test = random_split(
+
+    def _setup_in_memory(self) -> None:
+        """Decodes the dataset once and splits it into in-memory datasets.
+
+        The split is identical to the one of `random_split` on the dataset. If
+        `shard_by_rank`, only the shards of this rank are decoded.
+        """
+        if self.hparams.get("shard_by_rank"):
+            dataset = self._load_dataset()
+            rank, world_size = get_rank_and_world_size(self.trainer)
+            self.data_train, self.data_val, self.data_test = [
+                RankShardedDataset(
+                    dataset,
+                    split.indices,
+                    rank=rank,
+                    world_size=world_size,
+                    shuffle=shuffle,
+                    seed=42,
+                    num_workers=self.hparams["num_workers"],
+                )
+                for split, shuffle in zip(
+                    self._split_indices(len(dataset)),  # type: ignore
+                    (True, False, False),
+                )
+            ]
+            return
+
+        dataset_in_memory = self.decode_dataset()
+        self.data_train, self.data_val, self.data_test = [
+            dataset_in_memory.subset(split.indices)
+            for split in self._split_indices(len(dataset_in_memory))
+        ]
+
+    def _split_indices(self, num_samples: int) -> List[Subset]:
+        # same split as `random_split` on the dataset
+        return random_split(
+            dataset=range(num_samples),  # type: ignore
+            lengths=self.hparams["train_val_test_split"],
+            generator=torch.Generator().manual_seed(42),
+        )
+
+    def _dataloader(
+        self, dataset: Optional[Dataset], shuffle: bool, **settings: Any
+    ) -> DataLoader:
+        """Returns a DataLoader of `dataset`.
+
+        Args:
+            dataset (Optional[Dataset]): Dataset to load.
+            shuffle (bool): Whether to reshuffle the data every epoch.
+            settings: Dataloader settings overriding the ones in `self.hparams`.
+
+        Returns:
+            DataLoader: DataLoader of `dataset`.
+        """
+        hparams = {**self.hparams, **settings}
+        kwargs = dataloader_kwargs(
+            num_workers=hparams["num_workers"],
+            pin_memory=hparams["pin_memory"],
+            persistent_workers=hparams.get("persistent_workers", False),
+            prefetch_factor=hparams.get("prefetch_factor"),
+        )
+        if isinstance(dataset, RankShardedDataset):
+            # the samples are already shuffled (across ranks) by the dataset
+            return sharded_dataloader(
+                dataset=dataset, batch_size=hparams["batch_size"], **kwargs
+            )
+        if isinstance(dataset, InMemoryImageDataset):
+            return batched_dataloader(
                 dataset=dataset,
-                lengths=self.hparams["train_val_test_split"],
-                generator=torch.Generator().manual_seed(42),
+                batch_size=hparams["batch_size"],
+                shuffle=shuffle,
+                **kwargs,
             )
-
-    def train_dataloader(self):
         return DataLoader(
-            dataset=self.data_train,  # type: ignore
-            batch_size=self.hparams["batch_size"],
-            num_workers=self.hparams["num_workers"],
-            pin_memory=self.hparams["pin_memory"],
-            shuffle=True,
+            dataset=dataset,  # type: ignore
+            batch_size=hparams["batch_size"],
+            shuffle=shuffle,
+            **kwargs,
         )
 
+    def on_after_batch_transfer(self, batch: Any, dataloader_idx: int) -> Any:
+        if self.batch_transforms is None:
+            return batch
+        x, y = batch
+        training = self.trainer is not None and self.trainer.training
+        self.batch_transforms.train(training)
+        return self.batch_transforms(x), y
+
+    def train_dataloader(self):
+        return self._dataloader(self.data_train, shuffle=True)
+
     def val_dataloader(self):
-        return DataLoader(
-            dataset=self.data_val,  # type: ignore
-            batch_size=self.hparams["batch_size"],
-            num_workers=self.hparams["num_workers"],
-            pin_memory=self.hparams["pin_memory"],
-            shuffle=False,
-        )
+        return self._dataloader(self.data_val, shuffle=False)
 
     def test_dataloader(self):
-        return DataLoader(
-            dataset=self.data_test,  # type: ignore
-            batch_size=self.hparams["batch_size"],
-            num_workers=self.hparams["num_workers"],
-            pin_memory=self.hparams["pin_memory"],
-            shuffle=False,
-        )
+        return self._dataloader(self.data_test, shuffle=False)
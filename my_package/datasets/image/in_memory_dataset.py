@@ -0,0 +1,156 @@
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+import torch
+from my_package.utils.logger import get_logger
+from torch.utils.data import (
+    BatchSampler,
+    DataLoader,
+    Dataset,
+    RandomSampler,
+    SequentialSampler,
+)
+
+logger = get_logger(__name__)
+
+Index = Union[int, Sequence[int], torch.Tensor]
+
+# datasets decoded by another process and received in shared memory, by key
+_SHARED_DATASETS: Dict[str, "InMemoryImageDataset"] = {}
+
+
+class InMemoryImageDataset(Dataset):
+    """Image dataset held as contiguous tensors in memory.
+
+    Samples are decoded (and transformed) only once, when the dataset is built,
+    and stored as a single ``[N, C, H, W]`` image tensor and a ``[N]`` target
+    tensor. Indexing with a sequence of indices returns the whole batch at once
+    by tensor slicing, so it can be combined with a ``BatchSampler`` to skip the
+    per-sample ``__getitem__`` and the default collate function.
+
+    Args:
+        images (torch.Tensor): Image tensor of shape ``[N, C, H, W]``.
+        targets (torch.Tensor): Target tensor of shape ``[N]``.
+
+    >>> dataset = InMemoryImageDataset(torch.zeros(4, 1, 2, 2), torch.arange(4))
+    >>> imgs, targets = dataset[[0, 2]]
+    >>> imgs.shape, targets.tolist()
+    (torch.Size([2, 1, 2, 2]), [0, 2])
+    """
+
+    def __init__(self, images: torch.Tensor, targets: torch.Tensor):
+        if len(images) != len(targets):
+            raise ValueError(
+                f"Length mismatch between images ({len(images)})"
+                f" and targets ({len(targets)})."
+            )
+        self.images = images.contiguous()
+        self.targets = targets.contiguous()
+
+    @classmethod
+    def from_dataset(
+        cls, dataset: Dataset, batch_size: int = 1024, num_workers: int = 0
+    ) -> "InMemoryImageDataset":
+        """Decodes every sample of `dataset` once and stacks them into tensors.
+
+        The transforms of `dataset` are applied only once here, so random
+        augmentations are frozen: use deterministic transforms (e.g. ``ToTensor``
+        and ``Normalize``) for the datasets to be materialized.
+
+        Args:
+            dataset (Dataset): Map-style dataset returning ``(image, target)``.
+            batch_size (int, optional): Batch size used while decoding.
+            num_workers (int, optional): Number of workers used while decoding.
+
+        Returns:
+            InMemoryImageDataset: Dataset with all samples loaded in memory.
+        """
+        loader = DataLoader(
+            dataset, batch_size=batch_size, num_workers=num_workers, shuffle=False
+        )
+        images, targets = [], []
+        for imgs, tgts in loader:
+            images.append(imgs)
+            targets.append(torch.as_tensor(tgts))
+        logger.info(f"Loaded {len(dataset)} samples in memory.")  # type: ignore
+        return cls(torch.cat(images), torch.cat(targets))
+
+    def subset(self, indices: Sequence[int]) -> "InMemoryImageDataset":
+        """Returns a new dataset holding a contiguous copy of `indices`.
+
+        Unlike ``torch.utils.data.Subset`` no index indirection is kept.
+
+        Args:
+            indices (Sequence[int]): Indices of the samples to keep.
+
+        Returns:
+            InMemoryImageDataset: Dataset with the selected samples.
+        """
+        index = torch.as_tensor(indices, dtype=torch.long)
+        return InMemoryImageDataset(self.images[index], self.targets[index])
+
+    def share_memory_(self) -> "InMemoryImageDataset":
+        """Moves the tensors to shared memory, so that the dataset is passed to
+        other processes (e.g. of a ``torch.multiprocessing`` pool) without
+        copying the samples.
+
+        Returns:
+            InMemoryImageDataset: This dataset.
+        """
+        self.images.share_memory_()
+        self.targets.share_memory_()
+        return self
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    def __getitem__(self, index: Index) -> Tuple[torch.Tensor, torch.Tensor]:
+        if not isinstance(index, int):
+            index = torch.as_tensor(index, dtype=torch.long)
+        return self.images[index], self.targets[index]
+
+
+def share_dataset(key: str, dataset: InMemoryImageDataset) -> None:
+    """Makes `dataset` available to `get_shared_dataset` in this process.
+
+    Args:
+        key (str): Key of the dataset, e.g. `ImageDataModule.in_memory_key`.
+        dataset (InMemoryImageDataset): Dataset, usually in shared memory.
+    """
+    _SHARED_DATASETS[key] = dataset
+
+
+def get_shared_dataset(key: str) -> Optional[InMemoryImageDataset]:
+    """Returns the dataset shared with `share_dataset` under `key`, if any."""
+    return _SHARED_DATASETS.get(key)
+
+
+def batched_dataloader(
+    dataset: Dataset,
+    batch_size: int,
+    shuffle: bool = False,
+    drop_last: bool = False,
+    **kwargs: Any,
+) -> DataLoader:
+    """Returns a DataLoader fetching whole batches from `dataset` at once.
+
+    The sampler yields lists of indices which are passed to
+    ``dataset.__getitem__`` directly, so `dataset` must support batched
+    indexing (e.g. :class:`InMemoryImageDataset`).
+
+    Args:
+        dataset (Dataset): Dataset supporting indexing with a list of indices.
+        batch_size (int): Number of samples per batch.
+        shuffle (bool, optional): Whether to reshuffle the data every epoch.
+        drop_last (bool, optional): Whether to drop the last incomplete batch.
+        kwargs: Other keyword arguments passed to ``DataLoader``.
+
+    Returns:
+        DataLoader: DataLoader with automatic batching disabled.
+    """
+    sampler = RandomSampler(dataset) if shuffle else SequentialSampler(dataset)
+    return DataLoader(
+        dataset=dataset,
+        batch_size=None,
+        sampler=BatchSampler(sampler, batch_size=batch_size, drop_last=drop_last),
+        **kwargs,
+    )
@@ -0,0 +1,218 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+from my_package.utils import get_class
+from my_package.utils.logger import get_logger
+from torch.utils.data import Dataset
+
+logger = get_logger(__name__)
+
+INDEX_FILENAME = "index.json"
+LABELS_FILENAME = "labels.npy"
+SHARD_FILENAME = "shard_{:05d}.npy"
+
+
+class MemmapImageDataset(Dataset):
+    """Image dataset reading fixed-shape images from memory-mapped ``.npy`` shards.
+
+    The dataset directory is created by :func:`convert_to_memmap` and contains::
+
+        index.json        <- number of samples, image shape/dtype and shard list
+        labels.npy        <- int64 labels of all samples
+        shard_00000.npy   <- uint8 images of shape [n, H, W, C]
+        ...
+
+    Shards are opened lazily with ``np.load(mmap_mode="r")`` in the process that
+    first reads them, so DataLoader workers share the OS page cache of the files
+    instead of holding their own decoded copy of the dataset.
+
+    Images are returned as ``[H, W, C]`` uint8 ndarrays, which can be fed to
+    ``torchvision.transforms.ToTensor``.
+
+    Args:
+        root (str): Directory created by :func:`convert_to_memmap`.
+        transform (Optional[Callable], optional): Transform applied to each image.
+        target_transform (Optional[Callable], optional): Transform applied to
+            each target.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        transform: Optional[Callable] = None,
+        target_transform: Optional[Callable] = None,
+    ):
+        self.root = root
+        self.transform = transform
+        self.target_transform = target_transform
+
+        with open(os.path.join(root, INDEX_FILENAME)) as f:
+            self.index = json.load(f)
+        self.labels = np.load(os.path.join(root, LABELS_FILENAME), mmap_mode="r")
+        self._ends = np.cumsum([shard["num_samples"] for shard in self.index["shards"]])
+        self._shards: Optional[List[np.ndarray]] = None
+
+    @property
+    def shards(self) -> List[np.ndarray]:
+        if self._shards is None:
+            self._shards = [
+                np.load(os.path.join(self.root, shard["filename"]), mmap_mode="r")
+                for shard in self.index["shards"]
+            ]
+        return self._shards
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # do not pickle memory maps: each worker process opens its own mapping
+        state = self.__dict__.copy()
+        state["_shards"] = None
+        return state
+
+    def __len__(self) -> int:
+        return self.index["num_samples"]
+
+    def __getitem__(self, index: int) -> Tuple[Any, Any]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Index {index} out of range for {len(self)} samples.")
+        shard_idx = int(np.searchsorted(self._ends, index, side="right"))
+        start = self._ends[shard_idx - 1] if shard_idx > 0 else 0
+
+        # copy to get a writable array owned by this sample
+        img: Any = np.array(self.shards[shard_idx][index - start])
+        target: Any = int(self.labels[index])
+        if self.transform is not None:
+            img = self.transform(img)
+        if self.target_transform is not None:
+            target = self.target_transform(target)
+        return img, target
+
+
+def _to_hwc_uint8(img: Any) -> np.ndarray:
+    if isinstance(img, torch.Tensor):
+        # [C, H, W] tensor, e.g. output of ToTensor
+        if img.is_floating_point():
+            img = (img * 255).round().clamp(0, 255).to(torch.uint8)
+        img = img.permute(1, 2, 0).numpy()
+    img = np.asarray(img, dtype=np.uint8)
+    if img.ndim == 2:
+        img = img[:, :, None]
+    return img
+
+
+def _convert_shard(
+    dataset_cls: str,
+    dataset_kwargs: Dict[str, Any],
+    start: int,
+    stop: int,
+    path: str,
+) -> Tuple[np.ndarray, Tuple[int, ...]]:
+    """Decodes samples `start` to `stop` of the dataset and saves them to `path`.
+
+    Runs in a worker process, which builds its own dataset instance.
+    """
+    dataset = get_class(dataset_cls)(**dataset_kwargs)
+    images: Optional[np.ndarray] = None
+    labels = np.empty(stop - start, dtype=np.int64)
+    for i, index in enumerate(range(start, stop)):
+        img, label = dataset[index]
+        img = _to_hwc_uint8(img)
+        if images is None:
+            images = np.empty((stop - start, *img.shape), dtype=np.uint8)
+        if img.shape != images.shape[1:]:
+            raise ValueError(
+                f"All images must have the same shape: got {img.shape}"
+                f" for sample {index}, expected {images.shape[1:]}."
+            )
+        images[i] = img
+        labels[i] = int(label)
+    assert images is not None
+    np.save(path, images)
+    return labels, images.shape[1:]
+
+
+def convert_to_memmap(
+    dataset_cls: str,
+    output_dir: str,
+    dataset_kwargs: Optional[Dict[str, Any]] = None,
+    shard_size: int = 10_000,
+    num_processes: Optional[int] = None,
+) -> str:
+    """Converts a map-style image dataset into memory-mappable ``.npy`` shards.
+
+    Each shard is decoded and written by a separate process of a process pool.
+    Any dataset class returning ``(image, label)`` with fixed-shape images can be
+    converted, e.g. ``torchvision.datasets.MNIST`` (with
+    ``dataset_kwargs={"root": ..., "train": True}``) or
+    ``torchvision.datasets.ImageFolder`` (with ``dataset_kwargs={"root": ...}``).
+
+    Args:
+        dataset_cls (str): Import path of the dataset class.
+        output_dir (str): Directory to write the shards and index to.
+        dataset_kwargs (Optional[Dict[str, Any]], optional): Keyword arguments
+            to instantiate `dataset_cls` with. The dataset must return images
+            without random augmentations.
+        shard_size (int, optional): Number of samples per shard.
+        num_processes (Optional[int], optional): Number of processes.
+            Defaults to the number of CPUs.
+
+    Returns:
+        str: `output_dir`.
+    """
+    dataset_kwargs = dataset_kwargs or {}
+    num_samples = len(get_class(dataset_cls)(**dataset_kwargs))
+    os.makedirs(output_dir, exist_ok=True)
+
+    bounds = [
+        (start, min(start + shard_size, num_samples))
+        for start in range(0, num_samples, shard_size)
+    ]
+    filenames = [SHARD_FILENAME.format(i) for i in range(len(bounds))]
+    logger.info(
+        f"Converting {num_samples} samples of {dataset_cls}"
+        f" into {len(bounds)} shards in {output_dir}."
+    )
+    with ProcessPoolExecutor(max_workers=num_processes) as executor:
+        futures = [
+            executor.submit(
+                _convert_shard,
+                dataset_cls,
+                dataset_kwargs,
+                start,
+                stop,
+                os.path.join(output_dir, filename),
+            )
+            for (start, stop), filename in zip(bounds, filenames)
+        ]
+        results = [future.result() for future in futures]
+
+    shapes = {shape for _, shape in results}
+    if len(shapes) != 1:
+        raise ValueError(f"All images must have the same shape: got {shapes}.")
+    np.save(
+        os.path.join(output_dir, LABELS_FILENAME),
+        np.concatenate([labels for labels, _ in results]),
+    )
+    index = {
+        "dataset_cls": dataset_cls,
+        "num_samples": num_samples,
+        "shape": list(shapes.pop()),
+        "dtype": "uint8",
+        "shards": [
+            {"filename": filename, "num_samples": stop - start}
+            for (start, stop), filename in zip(bounds, filenames)
+        ],
+    }
+    # the index is written last so that an interrupted conversion is not used
+    with open(os.path.join(output_dir, INDEX_FILENAME), "w") as f:
+        json.dump(index, f, indent=2)
+    return output_dir
+
+
+def memmap_exists(root: str) -> bool:
+    """Returns True if `root` contains a completely converted dataset."""
+    return os.path.exists(os.path.join(root, INDEX_FILENAME))
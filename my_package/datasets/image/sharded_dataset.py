@@ -0,0 +1,273 @@
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import torch
+import torch.distributed as dist
+from my_package.datasets.image.in_memory_dataset import InMemoryImageDataset
+from my_package.utils.logger import get_logger
+from torch.utils.data import (
+    BatchSampler,
+    DataLoader,
+    Dataset,
+    SequentialSampler,
+    Subset,
+)
+
+logger = get_logger(__name__)
+
+Indices = Union[Sequence[int], torch.Tensor]
+
+
+def shard_indices(
+    indices: Indices,
+    rank: int,
+    world_size: int,
+    epoch: int = 0,
+    shuffle: bool = True,
+    seed: int = 0,
+) -> torch.Tensor:
+    """Returns the indices assigned to `rank` in `epoch`.
+
+    Like ``DistributedSampler``, `indices` are permuted with the seed
+    ``seed + epoch`` (if `shuffle`), padded by repeating them to a multiple of
+    `world_size`, and dealt to the ranks in turn, so that every rank gets the
+    same number of indices.
+
+    Args:
+        indices (Indices): Indices to shard.
+        rank (int): Rank of the shard.
+        world_size (int): Number of ranks.
+        epoch (int, optional): Epoch of the permutation.
+        shuffle (bool, optional): If False, the shards do not change by epoch.
+        seed (int, optional): Seed of the permutation, same on all ranks.
+
+    Returns:
+        torch.Tensor: Indices of the shard.
+
+    >>> shard_indices(range(5), rank=1, world_size=2, shuffle=False).tolist()
+    [1, 3, 0]
+    """
+    indices = torch.as_tensor(indices, dtype=torch.long)
+    if shuffle:
+        generator = torch.Generator().manual_seed(seed + epoch)
+        indices = indices[torch.randperm(len(indices), generator=generator)]
+    total_size = math.ceil(len(indices) / world_size) * world_size
+    if total_size > len(indices):
+        indices = indices.repeat(math.ceil(total_size / len(indices)))[:total_size]
+    return indices[rank:total_size:world_size]
+
+
+class RankShardedDataset(InMemoryImageDataset):
+    """In-memory dataset holding only the shard of `indices` of this rank.
+
+    Only the samples of the shard (see `shard_indices`) are decoded from
+    `dataset`, so memory and decoding time per rank shrink with the number of
+    ranks. If `shuffle`, `set_epoch` (called by Lightning through
+    `ShardedBatchSampler`) reassigns the samples to the ranks with a new
+    permutation and exchanges them between the ranks point-to-point, so that
+    every epoch is globally reshuffled like with ``DistributedSampler``, while
+    each rank only holds its shard. The order of the local samples is the
+    permuted order, so they can be read sequentially.
+
+    Args:
+        dataset (Dataset): Map-style dataset returning ``(image, target)``.
+        indices (Indices): Indices of `dataset` to shard, e.g. of a split.
+        rank (int, optional): Rank of this process.
+        world_size (int, optional): Number of ranks.
+        shuffle (bool, optional): Reshuffle the samples across ranks every epoch.
+        seed (int, optional): Seed of the permutations, same on all ranks.
+        num_workers (int, optional): Number of workers used while decoding.
+    """
+
+    def __init__(
+        self,
+        dataset: Dataset,
+        indices: Indices,
+        rank: int = 0,
+        world_size: int = 1,
+        shuffle: bool = True,
+        seed: int = 0,
+        num_workers: int = 0,
+    ):
+        self.indices = torch.as_tensor(indices, dtype=torch.long)
+        self.rank = rank
+        self.world_size = world_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+        self._group: Any = None
+
+        self.shard = self._shard(rank, epoch=0)
+        shard = InMemoryImageDataset.from_dataset(
+            Subset(dataset, self.shard.tolist()), num_workers=num_workers
+        )
+        super().__init__(shard.images, shard.targets)
+        logger.info(
+            f"Rank {rank} holds {len(self)} of {len(self.indices)} samples"
+            f" ({world_size} ranks)."
+        )
+
+    def _shard(self, rank: int, epoch: int) -> torch.Tensor:
+        return shard_indices(
+            self.indices,
+            rank,
+            self.world_size,
+            epoch=epoch,
+            shuffle=self.shuffle,
+            seed=self.seed,
+        )
+
+    def set_epoch(self, epoch: int) -> None:
+        """Exchanges the samples between the ranks for the shards of `epoch`.
+
+        Must be called with the same `epoch` on all ranks.
+
+        Args:
+            epoch (int): Epoch.
+        """
+        if not self.shuffle or epoch == self.epoch:
+            self.epoch = epoch
+            return
+        old_shards = [self._shard(rank, self.epoch) for rank in range(self.world_size)]
+        new_shards = [self._shard(rank, epoch) for rank in range(self.world_size)]
+        self.images, self.targets = self._exchange(old_shards, new_shards)
+        self.shard = new_shards[self.rank]
+        self.epoch = epoch
+
+    def _exchange(
+        self, old_shards: List[torch.Tensor], new_shards: List[torch.Tensor]
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        # owner (rank and local position) of each index in the old shards. Padded
+        # indices are held by two ranks: the lower one sends them.
+        size = int(self.indices.max()) + 1
+        owner_rank = torch.full((size,), -1, dtype=torch.long)
+        owner_pos = torch.full((size,), -1, dtype=torch.long)
+        for rank in reversed(range(self.world_size)):
+            owner_rank[old_shards[rank]] = rank
+            owner_pos[old_shards[rank]] = torch.arange(len(old_shards[rank]))
+
+        new_shard = new_shards[self.rank]
+        src_rank, src_pos = owner_rank[new_shard], owner_pos[new_shard]
+        images = self.images.new_empty((len(new_shard), *self.images.shape[1:]))
+        targets = self.targets.new_empty(len(new_shard))
+        local = src_rank == self.rank
+        images[local] = self.images[src_pos[local]]
+        targets[local] = self.targets[src_pos[local]]
+
+        ops, receives = [], []
+        for peer in range(self.world_size):
+            if peer == self.rank:
+                continue
+            # samples of this rank needed by `peer`, in the order of its shard
+            needed = owner_rank[new_shards[peer]] == self.rank
+            if needed.any():
+                pos = owner_pos[new_shards[peer]][needed]
+                ops += self._p2p_ops(
+                    dist.isend, self.images[pos], self.targets[pos], peer
+                )
+            received = src_rank == peer
+            if received.any():
+                num_received = int(received.sum())
+                buffers = (
+                    images.new_empty((num_received, *images.shape[1:])),
+                    targets.new_empty(num_received),
+                )
+                ops += self._p2p_ops(dist.irecv, *buffers, peer)
+                receives.append((received, buffers))
+        if ops:
+            for request in dist.batch_isend_irecv(ops):
+                request.wait()
+        for received, (received_images, received_targets) in receives:
+            images[received] = received_images
+            targets[received] = received_targets
+        return images, targets
+
+    def _p2p_ops(
+        self, op: Any, images: torch.Tensor, targets: torch.Tensor, peer: int
+    ) -> List[dist.P2POp]:
+        if not (dist.is_available() and dist.is_initialized()):
+            raise RuntimeError(
+                "Exchanging samples between ranks requires torch.distributed."
+            )
+        if self._group is None:
+            # NCCL cannot exchange CPU tensors
+            self._group = (
+                dist.group.WORLD
+                if dist.get_backend() == "gloo"
+                else dist.new_group(backend="gloo")
+            )
+        return [
+            dist.P2POp(op, images.contiguous(), peer, group=self._group, tag=0),
+            dist.P2POp(op, targets.contiguous(), peer, group=self._group, tag=1),
+        ]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # process groups cannot be pickled, e.g. to dataloader workers
+        state = self.__dict__.copy()
+        state["_group"] = None
+        return state
+
+
+class ShardedBatchSampler(BatchSampler):
+    """Sequential ``BatchSampler`` of a `RankShardedDataset`, whose `set_epoch`
+    (called by Lightning every epoch) reshuffles the dataset across ranks.
+
+    Args:
+        dataset (RankShardedDataset): Dataset to sample.
+        batch_size (int): Number of samples per batch.
+        drop_last (bool, optional): Whether to drop the last incomplete batch.
+    """
+
+    def __init__(
+        self, dataset: RankShardedDataset, batch_size: int, drop_last: bool = False
+    ):
+        super().__init__(
+            SequentialSampler(dataset), batch_size=batch_size, drop_last=drop_last
+        )
+        self.dataset = dataset
+
+    def set_epoch(self, epoch: int) -> None:
+        self.dataset.set_epoch(epoch)
+
+
+def sharded_dataloader(
+    dataset: RankShardedDataset,
+    batch_size: int,
+    drop_last: bool = False,
+    **kwargs: Any,
+) -> DataLoader:
+    """Returns a DataLoader fetching whole batches from `dataset` at once.
+
+    Same as `batched_dataloader`, but reshuffles `dataset` across the ranks every
+    epoch (see `ShardedBatchSampler`). Since the dataset changes every epoch,
+    `persistent_workers` must not be used.
+
+    Args:
+        dataset (RankShardedDataset): Dataset to load.
+        batch_size (int): Number of samples per batch.
+        drop_last (bool, optional): Whether to drop the last incomplete batch.
+        kwargs: Other keyword arguments passed to ``DataLoader``.
+
+    Returns:
+        DataLoader: DataLoader with automatic batching disabled.
+    """
+    if dataset.shuffle and kwargs.get("persistent_workers"):
+        raise ValueError(
+            "persistent_workers would keep stale shards of a reshuffled dataset."
+        )
+    return DataLoader(
+        dataset=dataset,
+        batch_size=None,
+        sampler=ShardedBatchSampler(dataset, batch_size, drop_last=drop_last),
+        **kwargs,
+    )
+
+
+def get_rank_and_world_size(trainer: Optional[Any] = None) -> Tuple[int, int]:
+    """Returns the global rank and world size of `trainer`, else of
+    torch.distributed if initialized, else ``(0, 1)``."""
+    if trainer is not None:
+        return trainer.global_rank, trainer.world_size
+    if dist.is_available() and dist.is_initialized():
+        return dist.get_rank(), dist.get_world_size()
+    return 0, 1
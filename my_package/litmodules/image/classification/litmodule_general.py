@@ -1,9 +1,15 @@
 import functools
-from typing import Any, List
+from typing import Any, Dict, Union
 
 import torch
+from my_package.utils.compile_utils import CompiledModel
+from my_package.utils.logger import get_logger
 from pytorch_lightning import LightningModule
 
+logger = get_logger(__name__)
+
+AUTOCAST_DTYPES = {"32": None, "bf16": torch.bfloat16}
+
 
 class ImageClassificationLitModule(LightningModule):
     """Example of LightningModule for image classification (eg. MNIST).
@@ -17,6 +23,35 @@ class ImageClassificationLitModule(LightningModule):
 
     Read the docs:
         https://pytorch-lightning.readthedocs.io/en/latest/common/lightning_module.html
+
+    With ``precision="bf16"``, the forward pass of each step runs under bf16
+    autocast on the module's device (e.g. CPUs with AVX512-bf16/AMX), while the
+    parameters, the loss and the optimizer stay in fp32. With `channels_last`,
+    the model and the input images use the NHWC memory layout, which the oneDNN
+    convolutions prefer.
+
+    Epoch-level results are aggregated from the metric states and the logged
+    running means, so the ``*_epoch_end(outputs)`` hooks are not overridden:
+    Lightning would otherwise keep the outputs of every step until the end of
+    the epoch. Subclasses should override the ``on_*_epoch_end()`` hooks
+    instead.
+
+    The metrics are only updated in the steps, and computed (synchronized across
+    processes) and logged once at the end of each epoch. A metric may return a
+    tensor, logged as ``Accuracy``, or a dict of tensors like
+    `my_package.metrics.classification.ClassificationMetrics`, which derives
+    several metrics from one shared state.
+
+    With `compile`, the model runs compiled by ``torch.compile`` (see
+    `CompiledModel`), which removes the per-operator overhead dominating small
+    models. The first steps of each stage are slower because of compilation,
+    and the model falls back to eager if compilation fails.
+
+    Args:
+        precision (Union[int, str], optional): ``32`` or ``"bf16"``.
+        channels_last (bool, optional): If True, use the channels_last layout.
+        compile (bool, optional): If True, compile the model.
+        compile_backend (str, optional): Backend of ``torch.compile``.
     """
 
     def __init__(
@@ -28,8 +63,16 @@ class ImageClassificationLitModule(LightningModule):
         metric_val: Any,
         metric_test: Any,
         metric_val_best: Any,
+        precision: Union[int, str] = 32,
+        channels_last: bool = False,
+        compile: bool = False,
+        compile_backend: str = "inductor",
     ):
         super().__init__()
+        if str(precision) not in AUTOCAST_DTYPES:
+            raise ValueError(
+                f"precision must be one of {list(AUTOCAST_DTYPES)}: {precision}."
+            )
 
         # this line allows to access init params with 'self.hparams' attribute
         # it also ensures init params will be stored in ckpt
@@ -60,67 +103,112 @@ class ImageClassificationLitModule(LightningModule):
         # for logging best so far validation accuracy
         self.metric_val_best = metric_val_best
 
+        # `self.precision` is set by the trainer, so use another name
+        self.autocast_dtype = AUTOCAST_DTYPES[str(precision)]
+        self.channels_last = channels_last
+        if channels_last:
+            self.model = self.model.to(memory_format=torch.channels_last)
+        if self.autocast_dtype is not None or channels_last:
+            logger.info(
+                f"Training with precision={precision},"
+                f" channels_last={channels_last}."
+            )
+
+        # the compiled model shares the parameters of `self.model`
+        self.compiled_model = (
+            CompiledModel(self.model, backend=compile_backend) if compile else None
+        )
+
     def forward(self, x: torch.Tensor):  # type: ignore
+        if self.compiled_model is not None:
+            return self.compiled_model(x)
         return self.model(x)
 
     def _step(self, batch: Any):
         x, y = batch
-        logits = self.forward(x)
+        if self.channels_last and x.dim() == 4:
+            x = x.contiguous(memory_format=torch.channels_last)
+        with torch.autocast(
+            self.device.type,
+            dtype=self.autocast_dtype or torch.bfloat16,
+            enabled=self.autocast_dtype is not None,
+        ):
+            logits = self.forward(x)
+        # compute the loss in fp32 outside of autocast
+        logits = logits.float()
         loss = self.criterion(logits, y)
-        preds = torch.argmax(logits, dim=1)
-        return loss, preds, y
+        return loss, logits, y
+
+    def _log_metric(self, metric: Any, stage: str, **kwargs: Any) -> Dict[str, Any]:
+        """Computes (and syncs across processes) `metric`, logs its scalars as
+        ``{name}//{stage}`` and resets it.
+
+        Args:
+            metric (Any): Metric returning a tensor (logged as ``Accuracy``) or a
+                dict of tensors, e.g. `ClassificationMetrics`.
+            stage (str): ``train``, ``val`` or ``test``.
+            **kwargs: Passed to `self.log`.
+
+        Returns:
+            Dict[str, Any]: Computed values.
+        """
+        values = metric.compute()
+        if not isinstance(values, dict):
+            values = {"Accuracy": values}
+        for name, value in values.items():
+            if value.numel() == 1:
+                self.log(
+                    f"{name}//{stage}", value, prog_bar=name == "Accuracy", **kwargs
+                )
+        metric.reset()
+        return values
 
     def training_step(self, batch: Any, batch_idx: int):  # type: ignore
-        loss, preds, targets = self._step(batch)
+        loss, logits, targets = self._step(batch)
 
-        # log train metrics
-        acc = self.metric_train(preds, targets)
+        # log train metrics, the metric states are computed at the end of the epoch
+        self.metric_train.update(logits, targets)
         self.log("Loss//train", loss, on_step=False, on_epoch=True, prog_bar=False)
-        self.log("Accuracy//train", acc, on_step=False, on_epoch=True, prog_bar=True)
 
         # we can return here dict with any tensors
-        # and then read it in some callback or in `training_epoch_end()`` below
+        # and then read it in some callback, e.g. `on_train_batch_end()`
         # remember to always return loss from
         # `training_step()` or else backpropagation will fail!
-        return {"loss": loss, "acc": acc, "preds": preds, "targets": targets}
+        preds = torch.argmax(logits, dim=1)
+        return {"loss": loss, "preds": preds, "targets": targets}
 
-    def training_epoch_end(self, outputs: List[Any]):
-        # `outputs` is a list of dicts returned from `training_step()`
-        pass
+    def on_train_epoch_end(self):
+        self._log_metric(self.metric_train, "train")
 
     def validation_step(self, batch: Any, batch_idx: int):  # type: ignore
-        loss, preds, targets = self._step(batch)
+        loss, logits, targets = self._step(batch)
 
         # log val metrics
-        acc = self.metric_val(preds, targets)
+        self.metric_val.update(logits, targets)
         self.log("Loss//val", loss, on_step=False, on_epoch=True, prog_bar=False)
-        self.log("Accuracy//val", acc, on_step=False, on_epoch=True, prog_bar=True)
 
-        return {"loss": loss, "acc": acc, "preds": preds, "targets": targets}
+        preds = torch.argmax(logits, dim=1)
+        return {"loss": loss, "preds": preds, "targets": targets}
 
-    def validation_epoch_end(self, outputs: List[Any]):
-        acc = self.metric_val.compute()  # get val accuracy from current epoch
+    def on_validation_epoch_end(self):
+        # get val accuracy from current epoch
+        acc = self._log_metric(self.metric_val, "val")["Accuracy"]
         self.metric_val_best.update(acc)
         acc_best = self.metric_val_best.compute()
         self.log("Accuracy//val_best", acc_best, on_epoch=True, prog_bar=True)
 
     def test_step(self, batch: Any, batch_idx: int):  # type: ignore
-        loss, preds, targets = self._step(batch)
+        loss, logits, targets = self._step(batch)
 
         # log test metrics
-        acc = self.metric_test(preds, targets)
+        self.metric_test.update(logits, targets)
         self.log("Loss//test", loss, on_step=False, on_epoch=True)
-        self.log("Accuracy//test", acc, on_step=False, on_epoch=True)
 
-        return {"loss": loss, "acc": acc, "preds": preds, "targets": targets}
-
-    def test_epoch_end(self, outputs: List[Any]):
-        pass
+        preds = torch.argmax(logits, dim=1)
+        return {"loss": loss, "preds": preds, "targets": targets}
 
-    def on_epoch_end(self):
-        self.metric_train.reset()
-        self.metric_val.reset()
-        self.metric_test.reset()
+    def on_test_epoch_end(self):
+        self._log_metric(self.metric_test, "test")
 
     def configure_optimizers(self):
         # optimizer_name = self.optimizer_attrs.pop("optimizer_name")
@@ -0,0 +1,179 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, List, Optional, TypeVar
+
+from my_package.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+_STOP = object()
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    """Returns the seconds left until `deadline` (None if no deadline)."""
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+
+class BackgroundReporter(Generic[T]):
+    """Reports records on a background thread through a bounded queue.
+
+    `put` never blocks the calling (e.g. training) thread: records are queued
+    and a worker thread passes them to `report_fn` in batches of up to
+    `max_batch_size` records, so that a slow tracking server only delays the
+    reports. If the queue is full, new records are dropped and counted in
+    `num_dropped`.
+
+    Args:
+        report_fn (Callable[[List[T]], None]): Reports a batch of records.
+        max_queue_size (int, optional): Maximum number of queued records.
+        max_batch_size (int, optional): Maximum number of records per batch.
+        name (str, optional): Name of the worker thread.
+
+    >>> reported = []
+    >>> with BackgroundReporter(reported.extend) as reporter:
+    ...     reporter.put(1)
+    ...     reporter.put(2)
+    True
+    True
+    >>> reported
+    [1, 2]
+    """
+
+    def __init__(
+        self,
+        report_fn: Callable[[List[T]], None],
+        max_queue_size: int = 10_000,
+        max_batch_size: int = 1_000,
+        name: str = "BackgroundReporter",
+    ):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be positive: {max_batch_size}.")
+        self.report_fn = report_fn
+        self.max_batch_size = max_batch_size
+        self.name = name
+        self.max_queue_size = max_queue_size
+        self.num_dropped = 0
+        self._init_worker_state()
+
+    def _init_worker_state(self) -> None:
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=self.max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # the queue, thread and lock cannot be pickled, e.g. by ddp_spawn
+        state = self.__dict__.copy()
+        for key in ("_queue", "_thread", "_lock"):
+            del state[key]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._init_worker_state()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=self.name, daemon=True
+                )
+                self._thread.start()
+
+    def put(self, record: T) -> bool:
+        """Queues `record` without blocking.
+
+        Returns:
+            bool: False if the queue was full and `record` was dropped.
+        """
+        self.start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            if self.num_dropped == 0:
+                logger.warning(
+                    f"{self.name} queue is full, dropping records until the"
+                    " worker catches up."
+                )
+            self.num_dropped += 1
+            return False
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the records queued so far are reported.
+
+        Args:
+            timeout (Optional[float], optional): Maximum time to wait in seconds.
+
+        Returns:
+            bool: False if the records were not reported within `timeout`.
+        """
+        if self._thread is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(_remaining(deadline))
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Reports the queued records and stops the worker thread.
+
+        Args:
+            timeout (Optional[float], optional): Maximum time to wait for the
+                queued records in seconds. Unreported records are discarded.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            if self._thread is None:
+                return
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                logger.warning(f"{self.name} did not finish reporting in time.")
+                return
+            self._thread.join(_remaining(deadline))
+            self._thread = None
+        if self.num_dropped:
+            logger.warning(f"{self.name} dropped {self.num_dropped} records.")
+
+    def __enter__(self) -> "BackgroundReporter[T]":
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            items = [self._queue.get()]
+            while len(items) < self.max_batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            batch: List[T] = []
+            events: List[threading.Event] = []
+            for item in items:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    events.append(item)
+                else:
+                    batch.append(item)
+
+            if batch:
+                try:
+                    self.report_fn(batch)
+                except Exception as e:
+                    logger.warning(f"{self.name} failed to report records: {e!r}")
+            for event in events:
+                event.set()
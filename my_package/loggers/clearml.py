@@ -1,11 +1,15 @@
-import asyncio
 import functools
 import re
+import threading
+import time
 from argparse import Namespace
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 # from multiprocessing import Pool, TimeoutError
-from typing import Any, Dict, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
+from my_package.loggers.background_reporter import BackgroundReporter
 from my_package.utils.logger import get_logger
 
 # from pytorch_lightning.loggers.logger import Logger, rank_zero_experiment
@@ -28,6 +32,28 @@ DEFAULT_AUTO_CONNECT_STREAMS: Dict[str, Any] = {
     "logging": True,
 }
 
+# ("metrics", metrics, step) or ("hparams", params, None)
+Record = Tuple[str, Any, Optional[int]]
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_metric_key(key: str) -> Tuple[str, str]:
+    """Returns the ClearML title and series of a metric key, e.g. ``Loss`` and
+    ``train`` for ``Loss//train``. Memoized, since the same keys are logged
+    on every step."""
+    new_key = re.sub("[^a-zA-Z0-9_/. -]+", "", key)
+    if key != new_key:
+        rank_zero_warn(
+            "Special characters except for ('_', '/', '.' and ' ' )"
+            f" in metric key: Replacing {key} with {new_key}.",
+            category=RuntimeWarning,
+        )
+        key = new_key
+    key_split = key.split("//")
+    if len(key_split) >= 2:
+        return key_split[0], "/".join(key_split[1:])
+    return "", key
+
 
 class ClearMLLogger(LightningLoggerBase):
     """Log using `ClearML`_.
@@ -66,6 +92,25 @@ class ClearMLLogger(LightningLoggerBase):
                              stdout/stderr the logging module is logged as a by product
                              of the stderr logging
        prefix: A string to put at the beginning of metric keys.
+       background: If True, metrics and hyperparameters are reported to
+           ClearML by a background thread, so that a slow server never stalls
+           training steps. They are buffered while the task is initialized and
+           replayed once it is ready. If False, logging blocks until then, i.e.
+           the first `log_metrics` or `log_hyperparams` call may stall training
+           for up to `init_timeout` seconds.
+       max_queue_size: Maximum number of `log_metrics` and `log_hyperparams`
+           calls queued for the background thread. Calls made while the queue
+           is full are dropped.
+       report_every_n_steps: Reports a metric only if at least this many steps
+           passed since it was last reported, to downsample metrics logged on
+           every step.
+       flush_timeout: Maximum time in seconds `finalize` waits for the queued
+           metrics to be reported.
+       init_timeout: Maximum time in seconds from the construction of the logger
+           to wait for the task to be initialized (including retries). Metrics
+           logged after that are dropped unless the task becomes ready later.
+       init_retries: Number of retries if the task initialization fails.
+       init_retry_delay: Seconds before the first retry, doubled on each retry.
 
     Raises:
         ModuleNotFoundError:
@@ -80,6 +125,13 @@ class ClearMLLogger(LightningLoggerBase):
         task_name: str = "untitled_task",
         auto_connect_streams: Dict[str, Any] = DEFAULT_AUTO_CONNECT_STREAMS,
         prefix: str = "",
+        background: bool = True,
+        max_queue_size: int = 10_000,
+        report_every_n_steps: int = 1,
+        flush_timeout: float = 30.0,
+        init_timeout: float = 60.0,
+        init_retries: int = 2,
+        init_retry_delay: float = 5.0,
     ):
         if clearml is None:
             logger.warning(
@@ -92,85 +144,176 @@ class ClearMLLogger(LightningLoggerBase):
         self._task_name = task_name
         self._auto_connect_stream = auto_connect_streams
         self._prefix = prefix
+        self._report_every_n_steps = report_every_n_steps
+        self._flush_timeout = flush_timeout
+        # last reported step of each metric key, for downsampling
+        self._last_steps: Dict[str, int] = {}
 
-        self._initialized = False
+        self._reporter: Optional[BackgroundReporter[Record]] = None
+        if not background:
+            logger.warning(
+                "ClearMLLogger(background=False) reports on the training thread,"
+                f" which waits up to init_timeout={init_timeout} seconds for the"
+                " task and for every slow report."
+            )
+        if background:
+            self._reporter = BackgroundReporter(
+                self._report,
+                max_queue_size=max_queue_size,
+                name="ClearMLReporter",
+            )
 
-    async def task_init(self, *args, **kwargs):
-        loop = asyncio.get_event_loop()
-        func = functools.partial(clearml.Task.init, *args, **kwargs)
-        ret = await loop.run_in_executor(None, func)
-        return ret
+        self._init_timeout = init_timeout
+        self._init_retries = init_retries
+        self._init_retry_delay = init_retry_delay
+        self._init_deadline = time.monotonic() + init_timeout
+        self._task_future: "Optional[Future[Any]]" = None
+        self._timed_out = False
+        self._start_task_init()
 
-    @property  # type: ignore
-    @rank_zero_experiment
-    def experiment(self):
-        if not clearml:
-            return None
-        if self._initialized:
-            return self.task_clearml
+    def __getstate__(self) -> Dict[str, Any]:
+        # futures cannot be pickled, e.g. by ddp_spawn
+        state = self.__dict__.copy()
+        state["_task_future"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        # initialize the task again in the new process, with a new deadline
+        self.__dict__.update(state)
+        self._init_deadline = time.monotonic() + self._init_timeout
+        self._timed_out = False
+        self._start_task_init()
 
-        timeout = 4  # sec
+    @rank_zero_only
+    def _start_task_init(self) -> None:
+        """Starts initializing the ClearML task in a background thread."""
+        if clearml is None:
+            return
+        self._task_future = Future()
+        threading.Thread(
+            target=self._init_task, name="ClearMLTaskInit", daemon=True
+        ).start()
 
+    def _init_task(self) -> None:
         kwargs = dict(
             project_name=self._procject_name,
             task_name=self._task_name,
             auto_connect_streams=self._auto_connect_stream,
         )
+        delay = self._init_retry_delay
+        for attempt in range(self._init_retries + 1):
+            try:
+                task = clearml.Task.init(**kwargs)
+            except Exception as e:
+                logger.warning(
+                    f"Failed to initialize ClearML task (attempt {attempt + 1}):"
+                    f" {e!r}"
+                )
+                if (
+                    attempt == self._init_retries
+                    or time.monotonic() + delay >= self._init_deadline
+                ):
+                    break
+                time.sleep(delay)
+                delay *= 2
+            else:
+                self._task_future.set_result(task)
+                return
+        logger.warning("Failed to initialize ClearML task. Proceed w/o clearml.")
+        self._task_future.set_result(None)
 
-        loop = asyncio.get_event_loop()
-        finished, unfinished = loop.run_until_complete(
-            asyncio.wait([self.task_init(**kwargs)], timeout=timeout)
-        )
-        if len(finished) > 0:
-            self.task_clearml = finished.pop().result()
-        else:
-            logger.warning("ClearML is not responding. Proceed w/o clearml.")
-            self.task_clearml = None
+    def _wait_task(self) -> Any:
+        """Returns the ClearML task, waiting at most until `init_timeout` seconds
+        after the construction of the logger. None if it is not ready by then."""
+        if self._task_future is None:
+            return None
+        timeout = max(self._init_deadline - time.monotonic(), 0.0)
+        try:
+            return self._task_future.result(timeout=timeout)
+        except FutureTimeoutError:
+            if not self._timed_out:
+                logger.warning(
+                    f"ClearML is not responding in {self._init_timeout} seconds."
+                    " Proceed w/o clearml."
+                )
+                self._timed_out = True
+            return None
 
-        self._initialized = True
-        return self.task_clearml
+    @property  # type: ignore
+    @rank_zero_experiment
+    def experiment(self):
+        """The ClearML task, or a dummy while it is being initialized (or if it
+        failed), so that accessing it never stalls training. Use
+        `wait_for_experiment` to wait for the task."""
+        if self._task_future is None or not self._task_future.done():
+            return None
+        return self._task_future.result()
+
+    def wait_for_experiment(self) -> Any:
+        """Returns `experiment`, waiting at most until `init_timeout` seconds
+        after the construction of the logger for the task."""
+        self._wait_task()
+        return self.experiment
 
     @rank_zero_only
     def log_hyperparams(self, params: Union[Dict[str, Any], Namespace]) -> None:
-        if hasattr(self.experiment, "connect_configuration"):
-            # self.experiment.connect_configuration(params)
-            self.experiment.connect(params)
+        self._log(("hparams", params, None))
 
     @rank_zero_only
     def log_metrics(
         self, metrics: Dict[str, float], step: Optional[int] = None
     ) -> None:
-        if hasattr(self.experiment, "get_logger") and hasattr(
-            self.experiment.get_logger(), "report_scalar"
-        ):
-            metrics = _add_prefix(metrics, self._prefix, self.LOGGER_JOIN_CHAR)
-
-            for k, v in metrics.items():
-                if isinstance(v, str):
-                    logger.warning(f"Discarding metric with string value {k}={v}.")
+        self._log(("metrics", dict(metrics), step))
+
+    def _log(self, record: Record) -> None:
+        if self._task_future is None:
+            return
+        if self._reporter is not None:
+            self._reporter.put(record)
+        else:
+            self._report([record])
+
+    def _report(self, records: List[Record]) -> None:
+        """Reports metrics and hyperparameters to ClearML, on the background
+        thread if enabled."""
+        task = self._wait_task()
+        if task is None:
+            return
+
+        for kind, value, step in records:
+            if kind == "hparams":
+                if hasattr(task, "connect_configuration"):
+                    # task.connect_configuration(value)
+                    task.connect(value)
+            elif hasattr(task, "get_logger") and hasattr(
+                task.get_logger(), "report_scalar"
+            ):
+                self._report_metrics(task.get_logger().report_scalar, value, step)
+
+    def _report_metrics(
+        self,
+        report_scalar: Callable[..., None],
+        metrics: Dict[str, float],
+        step: Optional[int],
+    ) -> None:
+        metrics = _add_prefix(metrics, self._prefix, self.LOGGER_JOIN_CHAR)
+
+        for k, v in metrics.items():
+            if isinstance(v, str):
+                logger.warning(f"Discarding metric with string value {k}={v}.")
+                continue
+
+            if step is not None and self._report_every_n_steps > 1:
+                last_step = self._last_steps.get(k)
+                if (
+                    last_step is not None
+                    and 0 <= step - last_step < self._report_every_n_steps
+                ):
                     continue
+                self._last_steps[k] = step
 
-                new_k = re.sub("[^a-zA-Z0-9_/. -]+", "", k)
-                if k != new_k:
-                    rank_zero_warn(
-                        "Special characters except for ('_', '/', '.' and ' ' )"
-                        f" in metric key: Replacing {k} with {new_k}.",
-                        category=RuntimeWarning,
-                    )
-                    k = new_k
-                k_split = k.split("//")
-                if len(k_split) >= 2:
-                    title = k_split[0]
-                    series = "/".join(k_split[1:])
-                else:
-                    title = ""
-                    series = k
-                self.experiment.get_logger().report_scalar(
-                    title=title,
-                    series=series,
-                    value=v,
-                    iteration=step,
-                )
+            title, series = _parse_metric_key(k)
+            report_scalar(title=title, series=series, value=v, iteration=step)
 
     @rank_zero_only
     def save(self):
@@ -179,6 +322,12 @@ class ClearMLLogger(LightningLoggerBase):
 
     @rank_zero_only
     def finalize(self, status: str = "FINISHED") -> None:
+        if self._reporter is not None:
+            if not self._reporter.flush(self._flush_timeout):
+                logger.warning(
+                    f"Metrics were not reported to ClearML in {self._flush_timeout}"
+                    " seconds, discarding the rest."
+                )
         super().finalize(status)
 
     @property
@@ -0,0 +1,115 @@
+from typing import Any, Dict, Sequence
+
+import torch
+from torchmetrics import Metric
+
+
+class ClassificationMetrics(Metric):
+    """Classification metrics computed from one shared state.
+
+    Accuracy, balanced accuracy and per-class recall are all derived from a
+    confusion matrix, which is updated by a single ``bincount`` per step, and
+    the top-k accuracies from one ``topk`` of the scores. Unlike calling a
+    torchmetrics metric (``metric(preds, target)``), `update` computes no
+    value, and the states are synchronized across processes only once, when
+    `compute` is called at the end of the epoch.
+
+    `compute` returns a dict with the scalars ``Accuracy``, ``BalancedAccuracy``
+    (mean recall of the classes present in the targets), ``Top{k}Accuracy`` for
+    each `top_k`, ``Recall_class{i}`` if `per_class`, and the non-scalar
+    ``ConfusionMatrix`` (targets in rows, predictions in columns).
+
+    Args:
+        num_classes (int): Number of classes.
+        top_k (Sequence[int], optional): ``k`` of the top-k accuracies, which
+            need scores of shape ``[N, num_classes]`` in `update`.
+        per_class (bool, optional): If True, also return the recall per class.
+        **kwargs: Passed to ``torchmetrics.Metric``.
+
+    >>> metrics = ClassificationMetrics(num_classes=3, top_k=[2])
+    >>> metrics.update(
+    ...     torch.tensor([[2.0, 1.0, 0.0], [2.0, 1.0, 0.0]]), torch.tensor([0, 1])
+    ... )
+    >>> results = metrics.compute()
+    >>> float(results["Accuracy"]), float(results["Top2Accuracy"])
+    (0.5, 1.0)
+    >>> results["ConfusionMatrix"].tolist()
+    [[1, 0, 0], [1, 0, 0], [0, 0, 0]]
+    """
+
+    is_differentiable = False
+    higher_is_better = True
+    full_state_update = False
+
+    def __init__(
+        self,
+        num_classes: int,
+        top_k: Sequence[int] = (),
+        per_class: bool = False,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        if any(not 1 <= k <= num_classes for k in top_k):
+            raise ValueError(f"top_k must be in [1, {num_classes}]: {top_k}.")
+        self.num_classes = num_classes
+        self.top_k = sorted(set(top_k))
+        self.per_class = per_class
+
+        self.add_state(
+            "confusion_matrix",
+            default=torch.zeros(num_classes, num_classes, dtype=torch.long),
+            dist_reduce_fx="sum",
+        )
+        self.add_state(
+            "top_k_correct",
+            default=torch.zeros(len(self.top_k), dtype=torch.long),
+            dist_reduce_fx="sum",
+        )
+
+    def update(self, preds: torch.Tensor, target: torch.Tensor) -> None:  # type: ignore
+        """Accumulates a batch.
+
+        Args:
+            preds (torch.Tensor): Scores (e.g. logits) of shape
+                ``[N, num_classes]``, or predicted classes of shape ``[N]``.
+            target (torch.Tensor): Target classes of shape ``[N]``.
+        """
+        target = target.long()
+        if preds.dim() == target.dim() + 1:
+            if preds.size(-1) != self.num_classes:
+                raise ValueError(
+                    f"preds must have {self.num_classes} scores per sample:"
+                    f" {tuple(preds.shape)}."
+                )
+            labels = preds.argmax(dim=-1)
+            if self.top_k:
+                hits = preds.topk(self.top_k[-1], dim=-1).indices == target[:, None]
+                # whether the target is within the first k predictions, per k
+                hits = hits.cumsum(dim=-1)[:, [k - 1 for k in self.top_k]]
+                self.top_k_correct += hits.sum(dim=0)
+        elif self.top_k:
+            raise ValueError("top_k accuracies need scores of shape [N, num_classes].")
+        else:
+            labels = preds.long()
+
+        self.confusion_matrix += torch.bincount(
+            target * self.num_classes + labels, minlength=self.num_classes**2
+        ).view(self.num_classes, self.num_classes)
+
+    def compute(self) -> Dict[str, torch.Tensor]:  # type: ignore
+        total = self.confusion_matrix.sum().clamp(min=1)
+        correct = self.confusion_matrix.diagonal()
+        support = self.confusion_matrix.sum(dim=1)
+        recall = correct / support.clamp(min=1)
+
+        results = {
+            "Accuracy": correct.sum() / total,
+            "BalancedAccuracy": recall[support > 0].mean(),
+        }
+        for k, num_correct in zip(self.top_k, self.top_k_correct):
+            results[f"Top{k}Accuracy"] = num_correct / total
+        if self.per_class:
+            for i in range(self.num_classes):
+                results[f"Recall_class{i}"] = recall[i]
+        results["ConfusionMatrix"] = self.confusion_matrix.clone()
+        return results
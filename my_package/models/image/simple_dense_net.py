@@ -1,3 +1,4 @@
+import torch
 from torch import nn
 
 
@@ -26,6 +27,6 @@ class SimpleDenseNet(nn.Module):
         )
 
     def forward(self, x):
-        batch_size, *_ = x.size()
-        x = x.view(batch_size, -1)
+        # flatten all dimensions except the batch dimension
+        x = torch.flatten(x, 1)
         return self.model(x)
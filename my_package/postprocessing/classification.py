@@ -0,0 +1,48 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+
+def topk_probabilities(
+    logits: torch.Tensor, k: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the top-k classes and their softmax probabilities.
+
+    Args:
+        logits (torch.Tensor): Logits of shape ``[B, num_classes]``.
+        k (Optional[int], optional): Number of classes to return per sample.
+            Defaults to all classes.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Class indices (int64) and probabilities
+            (float32) of shape ``[B, k]``, sorted by descending probability.
+
+    >>> indices, probs = topk_probabilities(torch.tensor([[0.0, 1.0, 2.0]]), k=2)
+    >>> indices.tolist()
+    [[2, 1]]
+    """
+    probs = F.softmax(logits.float(), dim=-1)
+    k = probs.size(-1) if k is None else min(k, probs.size(-1))
+    probs_topk, indices = torch.topk(probs, k, dim=-1)
+    return indices.numpy(), probs_topk.numpy()
+
+
+def to_label_dicts(indices: np.ndarray, probs: np.ndarray) -> List[Dict[int, float]]:
+    """Converts top-k arrays into ``{class: probability}`` dicts, e.g. for gradio.
+
+    Args:
+        indices (np.ndarray): Class indices of shape ``[B, k]``.
+        probs (np.ndarray): Probabilities of shape ``[B, k]``.
+
+    Returns:
+        List[Dict[int, float]]: A dict per sample.
+
+    >>> to_label_dicts(np.array([[2, 1]]), np.array([[0.75, 0.25]]))
+    [{2: 0.75, 1: 0.25}]
+    """
+    return [
+        dict(zip(sample_indices, sample_probs))
+        for sample_indices, sample_probs in zip(indices.tolist(), probs.tolist())
+    ]
@@ -0,0 +1,84 @@
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+ImageArrays = Union[np.ndarray, Sequence[np.ndarray]]
+
+# ITU-R 601-2 luma transform, same as torchvision's rgb_to_grayscale
+_GRAYSCALE_WEIGHTS = (0.2989, 0.587, 0.114)
+
+
+class ImagePreprocessor:
+    """Converts numpy images into a normalized ``[B, C, H, W]`` float tensor.
+
+    Equivalent to ``ToTensor``, ``Resize`` and ``Normalize`` of torchvision, but
+    built once and run with torch ops on whole batches: uint8 arrays are wrapped
+    with ``torch.from_numpy`` without copy, and images of the same shape are
+    resized and normalized together.
+
+    Args:
+        size (Tuple[int, int]): Output size (height, width).
+        mean (Sequence[float]): Mean of each channel for normalization.
+        std (Sequence[float]): Standard deviation of each channel.
+        num_channels (int, optional): Number of output channels. RGB inputs
+            are converted to grayscale if 1.
+
+    >>> preprocess = ImagePreprocessor((2, 2), mean=(0.5,), std=(0.5,))
+    >>> preprocess(np.full((4, 4), 255, dtype=np.uint8)).tolist()
+    [[[[1.0, 1.0], [1.0, 1.0]]]]
+    """
+
+    def __init__(
+        self,
+        size: Tuple[int, int],
+        mean: Sequence[float],
+        std: Sequence[float],
+        num_channels: int = 1,
+    ):
+        self.size = tuple(size)
+        self.mean = torch.tensor(mean, dtype=torch.float32).view(1, -1, 1, 1)
+        self.std = torch.tensor(std, dtype=torch.float32).view(1, -1, 1, 1)
+        self.num_channels = num_channels
+
+    def __call__(self, imgs: ImageArrays) -> torch.Tensor:
+        """Preprocesses a single image or a batch of images.
+
+        Args:
+            imgs (ImageArrays): An image of shape ``[H, W]`` or ``[H, W, C]``, an
+                array of such images stacked on the first axis, or a sequence
+                of images (possibly of different shapes).
+
+        Returns:
+            torch.Tensor: Preprocessed batch of shape ``[B, C, H, W]``.
+        """
+        if isinstance(imgs, np.ndarray):
+            is_single = imgs.ndim == 2 or (imgs.ndim == 3 and imgs.shape[-1] <= 4)
+            return self._preprocess_batch(imgs[None] if is_single else imgs)
+
+        shapes = {img.shape for img in imgs}
+        if len(shapes) == 1:
+            return self._preprocess_batch(np.stack(imgs))
+        return torch.cat([self._preprocess_batch(img[None]) for img in imgs])
+
+    def _preprocess_batch(self, imgs: np.ndarray) -> torch.Tensor:
+        x = torch.from_numpy(np.ascontiguousarray(imgs))
+        if x.dtype == torch.uint8:
+            x = x.float().div_(255)
+        else:
+            x = x.float()
+        # [B, H, W] -> [B, 1, H, W], [B, H, W, C] -> [B, C, H, W]
+        x = x.unsqueeze(1) if x.dim() == 3 else x.permute(0, 3, 1, 2)
+
+        if x.size(1) == 4:
+            x = x[:, :3]  # drop alpha channel
+        if x.size(1) == 3 and self.num_channels == 1:
+            weights = x.new_tensor(_GRAYSCALE_WEIGHTS).view(1, 3, 1, 1)
+            x = (x * weights).sum(dim=1, keepdim=True)
+
+        if tuple(x.shape[-2:]) != self.size:
+            x = F.interpolate(
+                x, size=self.size, mode="bilinear", align_corners=False, antialias=True
+            )
+        return (x - self.mean) / self.std
@@ -0,0 +1,168 @@
+import math
+import os
+import sqlite3
+from contextlib import closing
+from typing import List, NamedTuple, Optional
+
+from my_package.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class RungResult(NamedTuple):
+    """Score of a trial at a rung of `ASHAScheduler`."""
+
+    trial_id: str
+    rung: int
+    epoch: int
+    score: Optional[float]  # None if the score was NaN
+    promoted: bool
+
+
+class ASHAScheduler:
+    """Asynchronous successive halving (ASHA) of the trials of a sweep.
+
+    The rungs are at the epochs ``min_epochs * reduction_factor ** k``. When a
+    trial reaches a rung, its score is compared with the scores of all trials
+    which reached the rung so far: it is promoted to the next rung (continues
+    training) if it is in their top ``1 / reduction_factor``, otherwise it
+    should stop. A trial never waits for the others, so workers are never idle,
+    and only about ``1 / reduction_factor`` of the trials train until the next
+    rung.
+
+    The scores are kept in the SQLite database `path`, so the trials can run in
+    any number of processes (e.g. the workers of `run_sweep`) on the machine.
+    Each report is a single transaction, so concurrent trials see each other's
+    scores.
+
+    Args:
+        path (str): Path of the SQLite database, shared by the trials of a
+            sweep.
+        min_epochs (int, optional): Epoch of the first rung.
+        reduction_factor (int, optional): Ratio of the epochs of successive
+            rungs, and inverse of the promoted fraction of the trials.
+        mode (str, optional): ``max`` or ``min``, whether a higher or a lower
+            score is better.
+        timeout (float, optional): Seconds to wait for the database lock.
+
+    Raises:
+        ValueError: Raised if the arguments are invalid.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        min_epochs: int = 1,
+        reduction_factor: int = 3,
+        mode: str = "max",
+        timeout: float = 60.0,
+    ):
+        if min_epochs < 1:
+            raise ValueError(f"min_epochs must be positive: {min_epochs}.")
+        if reduction_factor < 2:
+            raise ValueError(
+                f"reduction_factor must be at least 2: {reduction_factor}."
+            )
+        if mode not in ("max", "min"):
+            raise ValueError(f"mode must be max or min: {mode}.")
+        self.path = path
+        self.min_epochs = min_epochs
+        self.reduction_factor = reduction_factor
+        self.mode = mode
+        self.timeout = timeout
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS rungs ("
+                " trial_id TEXT NOT NULL,"
+                " rung INTEGER NOT NULL,"
+                " epoch INTEGER NOT NULL,"
+                " score REAL,"
+                " promoted INTEGER NOT NULL,"
+                " PRIMARY KEY (trial_id, rung))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # autocommit mode, the transactions are started explicitly
+        return sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+
+    def rung(self, epoch: int) -> Optional[int]:
+        """Returns the rung at the end of `epoch` (counted from 1), or None if
+        `epoch` is not a rung.
+
+        >>> scheduler = ASHAScheduler(":memory:", min_epochs=2, reduction_factor=3)
+        >>> [scheduler.rung(epoch) for epoch in (1, 2, 4, 6, 18)]
+        [None, 0, None, 1, 2]
+        """
+        if epoch < self.min_epochs or epoch % self.min_epochs:
+            return None
+        ratio = epoch // self.min_epochs
+        rung = round(math.log(ratio, self.reduction_factor))
+        return rung if self.reduction_factor**rung == ratio else None
+
+    def _is_promoted(self, score: float, scores: List[float]) -> bool:
+        if math.isnan(score):
+            return False
+        # the best 1 / reduction_factor of the scores, at least the best one
+        num_promoted = max(len(scores) // self.reduction_factor, 1)
+        ranked = sorted(scores, reverse=self.mode == "max")
+        cutoff = ranked[num_promoted - 1]
+        return score >= cutoff if self.mode == "max" else score <= cutoff
+
+    def report(self, trial_id: str, epoch: int, score: float) -> bool:
+        """Records the `score` of a trial at the end of `epoch` and returns
+        whether the trial should continue.
+
+        Args:
+            trial_id (str): Unique name of the trial in the sweep.
+            epoch (int): Number of trained epochs.
+            score (float): Score of the trial, e.g. the validation accuracy.
+
+        Returns:
+            bool: False if `epoch` is a rung and the trial is not promoted.
+        """
+        rung = self.rung(epoch)
+        if rung is None:
+            return True
+        score = float(score)
+        with closing(self._connect()) as connection:
+            # lock the database, so that concurrent trials rank in turn
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                scores = [
+                    row[0]
+                    for row in connection.execute(
+                        "SELECT score FROM rungs"
+                        " WHERE rung = ? AND trial_id != ? AND score IS NOT NULL",
+                        (rung, trial_id),
+                    )
+                ]
+                promoted = self._is_promoted(score, [*scores, score])
+                # sqlite stores NaN as NULL
+                connection.execute(
+                    "INSERT OR REPLACE INTO rungs VALUES (?, ?, ?, ?, ?)",
+                    (trial_id, rung, epoch, score, int(promoted)),
+                )
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        logger.info(
+            f"Trial {trial_id} {'promoted' if promoted else 'stopped'} at rung"
+            f" {rung} (epoch {epoch}) with score {score}"
+            f" ({len(scores) + 1} trials at the rung)."
+        )
+        return promoted
+
+    def results(self) -> List[RungResult]:
+        """Returns the recorded scores ordered by rung and trial."""
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT trial_id, rung, epoch, score, promoted FROM rungs"
+                " ORDER BY rung, trial_id"
+            ).fetchall()
+        return [
+            RungResult(trial_id, rung, epoch, score, bool(promoted))
+            for trial_id, rung, epoch, score, promoted in rows
+        ]
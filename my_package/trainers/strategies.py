@@ -0,0 +1,122 @@
+from typing import Any, Dict, Optional
+
+import torch
+import torch.distributed as dist
+from my_package.utils.logger import get_logger
+from pytorch_lightning.strategies import DDPSpawnStrategy, DDPStrategy, ParallelStrategy
+from torch.distributed.algorithms.ddp_comm_hooks import default_hooks
+from torch.distributed.algorithms.ddp_comm_hooks import powerSGD_hook as powersgd
+
+logger = get_logger(__name__)
+
+COMM_HOOKS = ("allreduce", "fp16", "bf16", "powersgd")
+
+
+def _bf16_compress_hook(
+    process_group: Optional[Any], bucket: dist.GradBucket
+) -> torch.futures.Future[torch.Tensor]:
+    group = process_group if process_group is not None else dist.group.WORLD
+    if dist.get_backend(group) == "gloo":
+        raise RuntimeError(
+            "gloo cannot all-reduce bf16 tensors, use comm_hook=fp16 on CPU."
+        )
+    return default_hooks.bf16_compress_hook(process_group, bucket)
+
+
+def ddp_comm_hook_kwargs(
+    comm_hook: str = "allreduce",
+    powersgd_rank: int = 1,
+    powersgd_start_iter: int = 1_000,
+    process_group: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """Returns the DDP communication hook arguments of `DDPStrategy` (or of
+    `pytorch_lightning.utilities.distributed.register_ddp_comm_hook`).
+
+    The hooks compress the gradients before they are all-reduced:
+
+        - ``allreduce``: no compression (DDP's default all-reduce).
+        - ``fp16`` / ``bf16``: gradients cast to 16 bits, halving the traffic.
+          ``bf16`` needs NCCL, since gloo cannot all-reduce bf16 tensors.
+        - ``powersgd``: low-rank (`powersgd_rank`) approximations of the
+          gradient matrices with error feedback, after `powersgd_start_iter`
+          iterations of plain all-reduce.
+
+    Args:
+        comm_hook (str, optional): Either of `COMM_HOOKS`.
+        powersgd_rank (int, optional): Rank of the PowerSGD approximation.
+        powersgd_start_iter (int, optional): Number of iterations before
+            PowerSGD starts.
+        process_group (Optional[Any], optional): Process group of PowerSGD.
+            Defaults to the global group.
+
+    Raises:
+        ValueError: Raised if the hook is unknown.
+
+    Returns:
+        Dict[str, Any]: `ddp_comm_state`, `ddp_comm_hook` and
+            `ddp_comm_wrapper`.
+    """
+    if comm_hook not in COMM_HOOKS:
+        raise ValueError(f"Unknown comm_hook {comm_hook}: choose from {COMM_HOOKS}.")
+    kwargs: Dict[str, Any] = dict(
+        ddp_comm_state=None, ddp_comm_hook=None, ddp_comm_wrapper=None
+    )
+    if comm_hook == "fp16":
+        kwargs["ddp_comm_hook"] = default_hooks.fp16_compress_hook
+    elif comm_hook == "bf16":
+        kwargs["ddp_comm_hook"] = _bf16_compress_hook
+    elif comm_hook == "powersgd":
+        kwargs["ddp_comm_state"] = powersgd.PowerSGDState(
+            process_group=process_group,
+            matrix_approximation_rank=powersgd_rank,
+            start_powerSGD_iter=powersgd_start_iter,
+        )
+        kwargs["ddp_comm_hook"] = powersgd.powerSGD_hook
+    return kwargs
+
+
+def ddp_strategy(
+    comm_hook: str = "allreduce",
+    bucket_cap_mb: float = 25.0,
+    powersgd_rank: int = 1,
+    powersgd_start_iter: int = 1_000,
+    spawn: bool = False,
+    **kwargs: Any,
+) -> ParallelStrategy:
+    """Returns a DDP strategy with gradient compression and bucket size
+    settings, e.g. instantiated from `configs/trainer/ddp.yaml`.
+
+    Gradients are all-reduced in buckets of `bucket_cap_mb` megabytes while the
+    backward pass runs: larger buckets need fewer (latency-bound) all-reduce
+    calls, smaller ones overlap more with the backward pass.
+
+    Args:
+        comm_hook (str, optional): Gradient compression, see
+            `ddp_comm_hook_kwargs`.
+        bucket_cap_mb (float, optional): Size of the gradient buckets.
+        powersgd_rank (int, optional): Rank of the PowerSGD approximation.
+        powersgd_start_iter (int, optional): Number of iterations before
+            PowerSGD starts.
+        spawn (bool, optional): If True, start the processes with
+            ``torch.multiprocessing.spawn`` (``ddp_spawn``).
+        **kwargs: Passed to the strategy and to ``DistributedDataParallel``,
+            e.g. ``find_unused_parameters`` or ``gradient_as_bucket_view``.
+
+    Returns:
+        ParallelStrategy: `DDPStrategy` or `DDPSpawnStrategy` passed to the
+            trainer.
+    """
+    strategy_cls = DDPSpawnStrategy if spawn else DDPStrategy
+    logger.info(
+        f"Using {strategy_cls.__name__} with comm_hook={comm_hook},"
+        f" bucket_cap_mb={bucket_cap_mb}."
+    )
+    return strategy_cls(
+        **ddp_comm_hook_kwargs(
+            comm_hook,
+            powersgd_rank=powersgd_rank,
+            powersgd_start_iter=powersgd_start_iter,
+        ),
+        bucket_cap_mb=bucket_cap_mb,
+        **kwargs,
+    )
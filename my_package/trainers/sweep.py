@@ -0,0 +1,308 @@
+import copy
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import torch
+import torch.multiprocessing as mp
+from my_package.datasets.image import in_memory_dataset
+from my_package.datasets.image.in_memory_dataset import InMemoryImageDataset
+from my_package.utils.logger import get_logger
+from omegaconf import DictConfig, OmegaConf, open_dict
+
+logger = get_logger(__name__)
+
+Objective = Callable[[DictConfig], Optional[float]]
+
+
+class TrialResult(NamedTuple):
+    """Result of a trial of `run_sweep`."""
+
+    trial_id: int
+    overrides: Dict[str, Any]
+    status: str  # "ok" or "failed"
+    score: Optional[float]
+    duration_s: float
+    error: Optional[str] = None
+
+
+def grid_overrides(grid: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """Returns the overrides of every combination of the values in `grid`.
+
+    Nested mappings of `grid` are flattened into dotted keys, so the grid can
+    be given as nested config groups.
+
+    Args:
+        grid (Mapping[str, Any]): Lists of values by (dotted) config key.
+
+    Returns:
+        List[Dict[str, Any]]: Value by dotted config key of each trial.
+
+    >>> grid_overrides({"model": {"optimizer": {"lr": [0.1, 0.01]}}, "seed": [0]})
+    [{'model.optimizer.lr': 0.1, 'seed': 0}, {'model.optimizer.lr': 0.01, 'seed': 0}]
+    """
+
+    def flatten(node: Mapping[str, Any], prefix: str) -> Dict[str, Any]:
+        flat = {}
+        for key, value in node.items():
+            if isinstance(value, Mapping):
+                flat.update(flatten(value, f"{prefix}{key}."))
+            else:
+                flat[f"{prefix}{key}"] = list(value)
+        return flat
+
+    if OmegaConf.is_config(grid):
+        grid = OmegaConf.to_container(grid, resolve=True)  # type: ignore
+    flat = flatten(grid, "")
+    return [dict(zip(flat, values)) for values in itertools.product(*flat.values())]
+
+
+def available_cpus() -> List[int]:
+    """Returns the CPUs this process may run on, e.g. limited by ``taskset``
+    or the cgroup of a container."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def default_num_threads(num_workers: int) -> int:
+    """Returns the number of CPUs available to each of `num_workers` trials."""
+    return max(len(available_cpus()) // num_workers, 1)
+
+
+def _fit_to_cpus(num_workers: int, num_threads: int) -> Tuple[int, int]:
+    """Returns `num_workers` and `num_threads` reduced (with a warning) so that
+    the workers do not oversubscribe the available CPUs."""
+    num_cpus = len(available_cpus())
+    if num_workers * num_threads <= num_cpus:
+        return num_workers, num_threads
+    fitted_threads = min(num_threads, num_cpus)
+    fitted_workers = min(num_workers, num_cpus // fitted_threads)
+    logger.warning(
+        f"{num_workers} workers with {num_threads} threads each exceed the"
+        f" {num_cpus} available CPUs, using {fitted_workers} workers with"
+        f" {fitted_threads} threads each."
+    )
+    return fitted_workers, fitted_threads
+
+
+def _init_worker(
+    slots: Any,
+    num_threads: int,
+    shared_datasets: Dict[str, InMemoryImageDataset],
+) -> None:
+    slot = slots.get()
+    # pin the worker to its own CPUs, so that trials do not oversubscribe them
+    if hasattr(os, "sched_setaffinity"):
+        cpus = available_cpus()
+        # run_sweep fits the workers to the CPUs, so each slot has its own
+        os.sched_setaffinity(0, cpus[slot * num_threads : (slot + 1) * num_threads])
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # already set, or parallel work already started in this process
+        pass
+    for key, dataset in shared_datasets.items():
+        in_memory_dataset.share_dataset(key, dataset)
+
+
+def _run_trial(
+    objective: Objective,
+    trial_id: int,
+    config: Dict[str, Any],
+    overrides: Dict[str, Any],
+) -> TrialResult:
+    start = time.perf_counter()
+    try:
+        score = objective(OmegaConf.create(config))
+    except Exception as e:
+        logger.exception(f"Trial {trial_id} failed.")
+        return TrialResult(
+            trial_id, overrides, "failed", None, time.perf_counter() - start, repr(e)
+        )
+    return TrialResult(
+        trial_id,
+        overrides,
+        "ok",
+        None if score is None else float(score),
+        time.perf_counter() - start,
+    )
+
+
+def _trial_config(
+    config: DictConfig, overrides: Dict[str, Any], trial_dir: str
+) -> Dict[str, Any]:
+    """Returns `config` with `overrides` and `trial_dir`, resolved in this
+    process (e.g. for the resolvers of Hydra)."""
+    trial_config = copy.deepcopy(config)
+    with open_dict(trial_config):
+        trial_config.trial_dir = trial_dir
+        for key, value in overrides.items():
+            OmegaConf.update(trial_config, key, value, merge=True)
+    return OmegaConf.to_container(trial_config, resolve=True)  # type: ignore
+
+
+def _decode_shared_dataset(config: Dict[str, Any]) -> Dict[str, InMemoryImageDataset]:
+    """Decodes the dataset of `config` into shared memory, keyed by
+    `ImageDataModule.in_memory_key`."""
+    from my_package.utils.lightning_utils import prepare_lightning_datamodule
+
+    datamodule = prepare_lightning_datamodule(OmegaConf.create(config))
+    if not hasattr(datamodule, "decode_dataset"):
+        logger.info(f"{type(datamodule).__name__} cannot share its dataset.")
+        return {}
+    datamodule.prepare_data()
+    dataset = datamodule.decode_dataset().share_memory_()
+    logger.info(f"Sharing the decoded dataset of {len(dataset)} samples.")
+    return {datamodule.in_memory_key: dataset}
+
+
+def write_results(results: Sequence[TrialResult], path: str) -> None:
+    """Writes `results` as a CSV table with a column per override.
+
+    Args:
+        results (Sequence[TrialResult]): Results of the trials.
+        path (str): Path of the CSV file.
+    """
+    keys = list(dict.fromkeys(k for result in results for k in result.overrides))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["trial_id", "status", "score", "duration_s", *keys, "error"])
+        for result in sorted(results, key=lambda result: result.trial_id):
+            writer.writerow(
+                [
+                    result.trial_id,
+                    result.status,
+                    "" if result.score is None else result.score,
+                    f"{result.duration_s:.2f}",
+                    *[result.overrides.get(key, "") for key in keys],
+                    result.error or "",
+                ]
+            )
+
+
+def run_sweep(
+    objective: Objective,
+    config: DictConfig,
+    trials: Sequence[Dict[str, Any]],
+    output_dir: str,
+    num_workers: Optional[int] = None,
+    num_threads: Optional[int] = None,
+    share_dataset: bool = True,
+    mode: str = "max",
+) -> List[TrialResult]:
+    """Runs `objective` on `config` with each overrides of `trials` in a pool
+    of processes, e.g. ``train_and_test`` of
+    ``examples/example_train_lightning.py``.
+
+    Each worker process runs one trial at a time, pinned to its own
+    `num_threads` CPUs (if the platform supports CPU affinity) with as many
+    torch threads, so that parallel trials do not oversubscribe the CPUs. If
+    ``num_workers * num_threads`` exceeds the available CPUs, they are reduced
+    with a warning.
+
+    The config of each trial is `config` with the overrides and ``trial_dir``
+    (``{output_dir}/trial_{id}``, to be used for the checkpoints and logs of
+    the trial) set, resolved in this process. If `share_dataset` and the
+    datamodule of the first trial is ``in_memory``, its dataset is decoded only
+    once here and passed to the workers in shared memory (see
+    `ImageDataModule.decode_dataset`). Trials whose datamodule reads other data
+    or uses other transforms decode their own.
+
+    The results are written to ``{output_dir}/results.csv`` whenever a trial
+    finishes. A failing trial is recorded with its error and does not stop
+    the sweep.
+
+    Args:
+        objective (Objective): Picklable function returning the score of a
+            config, e.g. defined at the top level of a module.
+        config (DictConfig): Base config of the trials.
+        trials (Sequence[Dict[str, Any]]): Value by dotted config key of each
+            trial, e.g. from `grid_overrides`.
+        output_dir (str): Directory of the results and the trial directories.
+        num_workers (Optional[int], optional): Number of parallel trials.
+            Defaults to the number of available CPUs.
+        num_threads (Optional[int], optional): Number of CPUs (and torch
+            threads) per trial. Defaults to the CPUs divided by `num_workers`.
+        share_dataset (bool, optional): Decode an in-memory dataset once for
+            all trials.
+        mode (str, optional): ``max`` or ``min``, whether a higher or a lower
+            score is better.
+
+    Raises:
+        ValueError: Raised if `mode` is neither ``max`` nor ``min``.
+
+    Returns:
+        List[TrialResult]: Results ordered by trial.
+    """
+    if mode not in ("max", "min"):
+        raise ValueError(f"mode must be max or min: {mode}.")
+    num_workers = min(num_workers or len(available_cpus()), max(len(trials), 1))
+    num_threads = num_threads or default_num_threads(num_workers)
+    num_workers, num_threads = _fit_to_cpus(num_workers, num_threads)
+    configs = [
+        _trial_config(
+            config, overrides, os.path.join(output_dir, f"trial_{trial_id:04d}")
+        )
+        for trial_id, overrides in enumerate(trials)
+    ]
+    shared_datasets = {}
+    if share_dataset and configs and configs[0].get("datamodule", {}).get("in_memory"):
+        shared_datasets = _decode_shared_dataset(configs[0])
+
+    logger.info(
+        f"Running {len(trials)} trials in {num_workers} processes"
+        f" with {num_threads} threads each."
+    )
+    results_path = os.path.join(output_dir, "results.csv")
+    results: List[TrialResult] = []
+    # spawn, since fork does not work after torch started threads, and
+    # torch.multiprocessing passes the shared tensors without copies
+    ctx = mp.get_context("spawn")
+    slots = ctx.Queue()
+    for slot in range(num_workers):
+        slots.put(slot)
+    with ProcessPoolExecutor(
+        max_workers=num_workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(slots, num_threads, shared_datasets),
+    ) as executor:
+        futures = [
+            executor.submit(_run_trial, objective, trial_id, trial_config, overrides)
+            for trial_id, (trial_config, overrides) in enumerate(zip(configs, trials))
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            logger.info(
+                f"Trial {result.trial_id} {result.status}"
+                f" ({len(results)}/{len(trials)}): score {result.score}"
+                f" in {result.duration_s:.1f} s with {result.overrides}."
+            )
+            write_results(results, results_path)
+
+    results.sort(key=lambda result: result.trial_id)
+    scored = [result for result in results if result.score is not None]
+    if scored:
+        best = (max if mode == "max" else min)(scored, key=lambda r: r.score)
+        logger.info(
+            f"Best trial {best.trial_id}: score {best.score} with {best.overrides}."
+        )
+    logger.info(f"Results written to {results_path}.")
+    return results
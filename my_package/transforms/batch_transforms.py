@@ -0,0 +1,172 @@
+import math
+from typing import List, Sequence, Tuple, Union
+
+import torch
+import torch.nn.functional as F
+from torch import nn
+
+Size = Union[int, Sequence[int]]
+
+
+def _pair(size: Size) -> Tuple[int, int]:
+    if isinstance(size, int):
+        return size, size
+    height, width = size
+    return height, width
+
+
+class BatchCompose(nn.Module):
+    """Composes batch transforms applied to an image batch of shape [B, C, H, W].
+
+    Random transforms are applied only in training mode (``module.train()``);
+    in eval mode they are skipped or made deterministic.
+
+    Args:
+        transforms (List[nn.Module]): Batch transforms applied in order.
+
+    >>> transforms = BatchCompose([BatchNormalize(mean=[0.5], std=[0.5])])
+    >>> transforms(torch.ones(2, 1, 4, 4)).unique()
+    tensor([1.])
+    """
+
+    def __init__(self, transforms: List[nn.Module]):
+        super().__init__()
+        self.transforms = nn.ModuleList(transforms)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        for transform in self.transforms:
+            x = transform(x)
+        return x
+
+
+class BatchNormalize(nn.Module):
+    """Normalizes an image batch with channel-wise mean and standard deviation.
+
+    Also works on a single [C, H, W] image.
+
+    Args:
+        mean (Sequence[float]): Mean of each channel.
+        std (Sequence[float]): Standard deviation of each channel.
+    """
+
+    def __init__(self, mean: Sequence[float], std: Sequence[float]):
+        super().__init__()
+        self.mean = list(mean)
+        self.std = list(std)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        mean = x.new_tensor(self.mean).view(-1, 1, 1)
+        std = x.new_tensor(self.std).view(-1, 1, 1)
+        return (x - mean) / std
+
+
+class BatchRandomHorizontalFlip(nn.Module):
+    """Horizontally flips each image of the batch with probability `p`.
+
+    Args:
+        p (float, optional): Probability of each image being flipped.
+    """
+
+    def __init__(self, p: float = 0.5):
+        super().__init__()
+        self.p = p
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        if not self.training:
+            return x
+        flip = torch.rand(x.size(0), device=x.device) < self.p
+        return torch.where(flip.view(-1, 1, 1, 1), x.flip(-1), x)
+
+
+class BatchRandomCrop(nn.Module):
+    """Crops each image of the batch at an independent random location.
+
+    In eval mode the center of the (padded) images is cropped.
+
+    Args:
+        size (Size): Output size (height, width) of the crop.
+        padding (int, optional): Zero padding added on each border before cropping.
+    """
+
+    def __init__(self, size: Size, padding: int = 0):
+        super().__init__()
+        self.size = _pair(size)
+        self.padding = padding
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        if self.padding > 0:
+            x = F.pad(x, [self.padding] * 4)
+        batch_size, _, height, width = x.size()
+        crop_height, crop_width = self.size
+        if crop_height > height or crop_width > width:
+            raise ValueError(
+                f"Crop size {self.size} is larger than the image size"
+                f" {(height, width)}."
+            )
+
+        if self.training:
+            top = torch.randint(
+                0, height - crop_height + 1, (batch_size,), device=x.device
+            )
+            left = torch.randint(
+                0, width - crop_width + 1, (batch_size,), device=x.device
+            )
+        else:
+            top = torch.full((batch_size,), (height - crop_height) // 2)
+            left = torch.full((batch_size,), (width - crop_width) // 2)
+            top, left = top.to(x.device), left.to(x.device)
+
+        rows = top.view(-1, 1) + torch.arange(crop_height, device=x.device)
+        cols = left.view(-1, 1) + torch.arange(crop_width, device=x.device)
+        batch_idx = torch.arange(batch_size, device=x.device).view(-1, 1, 1)
+        # advanced indexing gives [B, crop_height, crop_width, C]
+        x = x[batch_idx, :, rows.unsqueeze(2), cols.unsqueeze(1)]
+        return x.permute(0, 3, 1, 2).contiguous()
+
+
+class BatchRandomAffine(nn.Module):
+    """Applies an independent random affine transform to each image of the batch.
+
+    Args:
+        degrees (float): Range of rotation (-degrees, +degrees).
+        translate (Sequence[float], optional): Maximum fraction of the width and
+            height for horizontal and vertical translations.
+        scale (Sequence[float], optional): Range (min, max) of the scale factor.
+    """
+
+    def __init__(
+        self,
+        degrees: float,
+        translate: Sequence[float] = (0.0, 0.0),
+        scale: Sequence[float] = (1.0, 1.0),
+    ):
+        super().__init__()
+        self.degrees = degrees
+        self.translate = list(translate)
+        self.scale = list(scale)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        if not self.training:
+            return x
+        batch_size = x.size(0)
+
+        def uniform(low: float, high: float) -> torch.Tensor:
+            return torch.empty(batch_size, device=x.device).uniform_(low, high)
+
+        angle = uniform(-self.degrees, self.degrees) * math.pi / 180
+        scale = uniform(*self.scale)
+        # translation in the normalized [-1, 1] coordinates of affine_grid
+        tx = uniform(-self.translate[0], self.translate[0]) * 2
+        ty = uniform(-self.translate[1], self.translate[1]) * 2
+
+        # theta maps output coordinates to input coordinates (inverse transform)
+        cos, sin = torch.cos(angle) / scale, torch.sin(angle) / scale
+        theta = torch.stack(
+            [
+                torch.stack([cos, -sin, tx], dim=1),
+                torch.stack([sin, cos, ty], dim=1),
+            ],
+            dim=1,
+        ).to(x.dtype)
+        grid = F.affine_grid(theta, list(x.size()), align_corners=False)
+        return F.grid_sample(x, grid, align_corners=False, padding_mode="zeros")
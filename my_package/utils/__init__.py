@@ -1,15 +1,30 @@
 import importlib
 import warnings
-from typing import Any, Sequence
+from typing import TYPE_CHECKING, Any, Sequence
 
-import rich.syntax
-import rich.tree
-from my_package.utils.logger import get_logger
-from omegaconf import DictConfig, OmegaConf
-from pytorch_lightning.utilities import rank_zero_only
+from my_package.utils.import_utils import lazy_submodules
+from my_package.utils.logger import get_logger, rank_zero_only
+
+# rich and omegaconf are only needed by training scripts, so they are imported
+# lazily to keep `my_package.utils` (and the inference path) light to import
+if TYPE_CHECKING:
+    from omegaconf import DictConfig
 
 logger = get_logger(__name__)
 
+__getattr__, __dir__ = lazy_submodules(
+    __name__,
+    [
+        "dataloader_utils",
+        "dvc_utils",
+        "export_utils",
+        "import_utils",
+        "lightning_utils",
+        "module_utils",
+        "quantization_utils",
+    ],
+)
+
 
 def get_class(name: str) -> Any:
     module_name = ".".join(name.split(".")[:-1])
@@ -19,7 +34,7 @@ def get_class(name: str) -> Any:
     return klass
 
 
-def extras(config: DictConfig) -> None:
+def extras(config: "DictConfig") -> None:
     """Applies optional utilities, controlled by config flags.
     Utilities:
     - Ignoring python warnings
@@ -39,7 +54,7 @@ def extras(config: DictConfig) -> None:
 
 @rank_zero_only
 def print_config(
-    config: DictConfig,
+    config: "DictConfig",
     print_order: Sequence[str] = (
         "datamodule",
         "model",
@@ -57,6 +72,10 @@ def print_config(
         resolve (bool, optional): Whether to resolve reference fields of DictConfig.
     """
 
+    import rich.syntax
+    import rich.tree
+    from omegaconf import DictConfig, OmegaConf
+
     style = "dim"
     tree = rich.tree.Tree("CONFIG", style=style, guide_style=style)
 
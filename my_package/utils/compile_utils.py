@@ -0,0 +1,142 @@
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional, Union
+
+import numpy as np
+import torch
+from my_package.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class CompileReport(NamedTuple):
+    """Warmup cost and latencies of a `CompiledModel`."""
+
+    compiled: bool
+    backend: Union[str, Callable]
+    warmup_s: float
+    eager_ms: float
+    compiled_ms: float
+
+
+def _median_ms(fn: Any, x: torch.Tensor, num_iters: int) -> float:
+    times = []
+    for _ in range(num_iters):
+        start = time.perf_counter()
+        fn(x)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) * 1000)
+
+
+class CompiledModel:
+    """Runs `model` compiled by ``torch.compile``, falling back to eager.
+
+    ``torch.compile`` compiles at the first call (and recompiles e.g. for new
+    input shapes), so a compilation error, e.g. without a C++ compiler for the
+    ``inductor`` backend, surfaces at a call. Then a warning is logged and the
+    model runs eagerly from then on. If ``torch.compile`` is not available at
+    all (e.g. unsupported Python version), the model also runs eagerly.
+
+    This is not an ``nn.Module``, so holding it in a module adds no parameters
+    or ``state_dict`` keys: the weights stay those of `model`.
+
+    Args:
+        model (torch.nn.Module): Model to compile.
+        backend (Union[str, Callable], optional): Backend of ``torch.compile``.
+        mode (Optional[str], optional): Mode of ``torch.compile``, e.g.
+            ``reduce-overhead`` or ``max-autotune``.
+        dynamic (Optional[bool], optional): Compile for dynamic input shapes.
+            Defaults to detecting them by recompilations.
+    """
+
+    def __init__(
+        self,
+        model: torch.nn.Module,
+        backend: Union[str, Callable] = "inductor",
+        mode: Optional[str] = None,
+        dynamic: Optional[bool] = None,
+    ):
+        self.model = model
+        self.backend = backend
+        self.mode = mode
+        self.dynamic = dynamic
+        self.warmup_s: Optional[float] = None
+        self._compiled = self._compile()
+
+    @property
+    def compiled(self) -> bool:
+        """Whether the model runs compiled (False after a fallback)."""
+        return self._compiled is not None
+
+    def _compile(self) -> Any:
+        try:
+            return torch.compile(
+                self.model, backend=self.backend, mode=self.mode, dynamic=self.dynamic
+            )
+        except Exception as e:
+            logger.warning(f"torch.compile failed, running eagerly: {e!r}")
+            return None
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        if self._compiled is None:
+            return self.model(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            outputs = self._compiled(*args, **kwargs)
+        except Exception as e:
+            from torch._dynamo.exc import TorchDynamoException
+
+            if not isinstance(e, TorchDynamoException):
+                raise
+            # errors of the model itself are raised again by the eager call
+            outputs = self.model(*args, **kwargs)
+            logger.warning(
+                f"Compiling {type(self.model).__name__} failed, running eagerly:"
+                f" {e!r}"
+            )
+            self._compiled = None
+            return outputs
+        if self.warmup_s is None:
+            self.warmup_s = time.perf_counter() - start
+            logger.info(
+                f"Compiled {type(self.model).__name__} with {self.backend}"
+                f" in {self.warmup_s:.1f} s."
+            )
+        return outputs
+
+    def warmup(self, example_input: torch.Tensor, num_iters: int = 20) -> CompileReport:
+        """Compiles the model for `example_input` and compares its latency with
+        eager.
+
+        Args:
+            example_input (torch.Tensor): Input batch, e.g. of the served batch
+                size.
+            num_iters (int, optional): Number of measured forwards.
+
+        Returns:
+            CompileReport: Time of the first (compiling) call and median
+                latencies.
+        """
+        with torch.no_grad():
+            start = time.perf_counter()
+            self(example_input)
+            warmup_s = time.perf_counter() - start
+            eager_ms = _median_ms(self.model, example_input, num_iters)
+            compiled_ms = _median_ms(self, example_input, num_iters)
+        report = CompileReport(
+            self.compiled, self.backend, warmup_s, eager_ms, compiled_ms
+        )
+        logger.info(
+            f"Compile warmup took {warmup_s:.1f} s, latency {eager_ms:.3f} ms"
+            f" (eager) -> {compiled_ms:.3f} ms ({self.backend})."
+        )
+        return report
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # compiled models cannot be pickled, e.g. by ddp_spawn
+        state = self.__dict__.copy()
+        state["_compiled"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._compiled = self._compile()
@@ -0,0 +1,134 @@
+import itertools
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from my_package.utils.logger import get_logger
+from torch.utils.data import DataLoader
+
+logger = get_logger(__name__)
+
+
+def dataloader_kwargs(
+    num_workers: int = 0,
+    pin_memory: bool = False,
+    persistent_workers: bool = False,
+    prefetch_factor: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Returns DataLoader keyword arguments valid for the given number of workers.
+
+    `persistent_workers` and `prefetch_factor` are only accepted by DataLoader
+    with `num_workers > 0`, so they are dropped otherwise.
+
+    Args:
+        num_workers (int, optional): Number of worker processes.
+        pin_memory (bool, optional): Whether to copy tensors into pinned memory.
+        persistent_workers (bool, optional): Whether to keep workers alive between
+            epochs instead of respawning them.
+        prefetch_factor (Optional[int], optional): Number of batches loaded in
+            advance by each worker. Defaults to the DataLoader default.
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for DataLoader.
+
+    >>> dataloader_kwargs(num_workers=0, persistent_workers=True, prefetch_factor=4)
+    {'num_workers': 0, 'pin_memory': False}
+    """
+    kwargs: Dict[str, Any] = dict(num_workers=num_workers, pin_memory=pin_memory)
+    if num_workers > 0:
+        kwargs["persistent_workers"] = persistent_workers
+        if prefetch_factor is not None:
+            kwargs["prefetch_factor"] = prefetch_factor
+    return kwargs
+
+
+def default_autotune_grid(batch_size: int) -> Dict[str, List[Any]]:
+    """Returns the default search grid of :func:`autotune_dataloader`.
+
+    Args:
+        batch_size (int): Batch size, which is not tuned by default because it
+            also changes the optimization.
+
+    Returns:
+        Dict[str, List[Any]]: Candidate values of each DataLoader setting.
+    """
+    num_cpus = os.cpu_count() or 1
+    num_workers = sorted({0, *[n for n in (1, 2, 4, 8, 16) if n <= num_cpus]})
+    return dict(
+        num_workers=num_workers,
+        prefetch_factor=[2, 4],
+        persistent_workers=[False, True],
+        batch_size=[batch_size],
+    )
+
+
+def _measure_throughput(
+    build_dataloader: Callable[..., DataLoader],
+    settings: Dict[str, Any],
+    num_batches: int,
+    num_epochs: int,
+) -> float:
+    """Returns samples/sec of the DataLoader over `num_epochs` short epochs."""
+    dataloader = build_dataloader(**settings)
+    batches_per_epoch = max(num_batches // num_epochs, 1)
+    num_samples = 0
+    start = time.perf_counter()
+    for _ in range(num_epochs):
+        for batch in itertools.islice(dataloader, batches_per_epoch):
+            num_samples += len(batch[-1])
+    elapsed = time.perf_counter() - start
+    # shut down persistent workers
+    del dataloader
+    return num_samples / elapsed
+
+
+def autotune_dataloader(
+    build_dataloader: Callable[..., DataLoader],
+    grid: Dict[str, Sequence[Any]],
+    num_batches: int = 200,
+    num_epochs: int = 2,
+) -> Dict[str, Any]:
+    """Benchmarks DataLoader settings and returns the one with highest samples/sec.
+
+    Every combination of the values in `grid` is passed to `build_dataloader`
+    as keyword arguments, and the resulting DataLoader is iterated for
+    `num_batches` batches split into `num_epochs` epochs, so that the cost of
+    respawning non-persistent workers every epoch is taken into account.
+
+    Args:
+        build_dataloader (Callable[..., DataLoader]): Builds a DataLoader from
+            the settings, e.g. `num_workers`, `prefetch_factor`,
+            `persistent_workers` and `batch_size`.
+        grid (Dict[str, Sequence[Any]]): Candidate values of each setting.
+        num_batches (int, optional): Number of batches to load per setting.
+        num_epochs (int, optional): Number of epochs the batches are split into.
+
+    Returns:
+        Dict[str, Any]: Best settings.
+    """
+    keys = list(grid.keys())
+    candidates: List[Dict[str, Any]] = []
+    for values in itertools.product(*[grid[key] for key in keys]):
+        settings = dict(zip(keys, values))
+        if settings.get("num_workers", 0) == 0:
+            # worker settings have no effect without workers
+            settings.pop("prefetch_factor", None)
+            settings.pop("persistent_workers", None)
+        if settings not in candidates:
+            candidates.append(settings)
+
+    best_settings: Dict[str, Any] = {}
+    best_throughput = 0.0
+    for settings in candidates:
+        throughput = _measure_throughput(
+            build_dataloader, settings, num_batches, num_epochs
+        )
+        logger.info(f"DataLoader autotune: {settings} -> {throughput:.1f} samples/s")
+        if throughput > best_throughput:
+            best_settings, best_throughput = settings, throughput
+
+    logger.info(
+        f"DataLoader autotune: selected {best_settings}"
+        f" ({best_throughput:.1f} samples/s)"
+    )
+    return best_settings
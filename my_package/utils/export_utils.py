@@ -0,0 +1,214 @@
+import inspect
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import torch
+from my_package.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+ARTIFACT_FORMAT_VERSION = 1
+
+# mmap loading and `load_state_dict(assign=True)` are available from torch 2.1
+_SUPPORTS_MMAP = "mmap" in inspect.signature(torch.load).parameters
+
+
+def load_lightning_state_dict(ckpt_path: str) -> Dict[str, Any]:
+    """Loads the model weights from a checkpoint of a LightningModule.
+
+    The LightningModule prefix of the keys (e.g. ``model.`` of
+    ``model.conv1.weight``) is removed, so that the state dict can be loaded
+    into the bare model.
+
+    Args:
+        ckpt_path (str): Path to the Lightning checkpoint.
+
+    Returns:
+        Dict[str, Any]: State dict of the model.
+    """
+    ckpt_dic = torch.load(ckpt_path, map_location="cpu")
+    # Lightningの辞書キーから不要な文字列を削除し置換
+    return {
+        ".".join(key.split(".")[1:]): value
+        for key, value in ckpt_dic["state_dict"].items()
+    }
+
+
+def export_torchscript(
+    model: torch.nn.Module, path: str, input_shape: Tuple[int, ...]
+) -> str:
+    """Exports `model` as a frozen TorchScript module traced in eval mode.
+
+    Args:
+        model (torch.nn.Module): Model to export.
+        path (str): Output path of the TorchScript module.
+        input_shape (Tuple[int, ...]): Input shape used for tracing.
+
+    Returns:
+        str: `path`.
+    """
+    model.eval()
+    with torch.no_grad():
+        traced = torch.jit.trace(model, torch.randn(*input_shape))
+        frozen = torch.jit.freeze(traced)
+    torch.jit.save(frozen, path)
+    logger.info(f"Exported TorchScript module to {path}.")
+    return path
+
+
+def export_onnx(
+    model: torch.nn.Module,
+    path: str,
+    input_shape: Tuple[int, ...],
+    opset_version: int = 13,
+) -> str:
+    """Exports `model` in eval mode to ONNX with a dynamic batch dimension.
+
+    The graph has a single input named ``input`` and a single output named
+    ``logits``.
+
+    Args:
+        model (torch.nn.Module): Model to export.
+        path (str): Output path of the ONNX model.
+        input_shape (Tuple[int, ...]): Input shape used for tracing.
+        opset_version (int, optional): ONNX opset version.
+
+    Returns:
+        str: `path`.
+    """
+    model.eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            torch.randn(*input_shape),
+            path,
+            input_names=["input"],
+            output_names=["logits"],
+            dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+            opset_version=opset_version,
+        )
+    logger.info(f"Exported ONNX model to {path}.")
+    return path
+
+
+def export_inference_artifact(
+    ckpt_path: str,
+    path: str,
+    model_config: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Converts a Lightning checkpoint into a slim inference artifact.
+
+    The artifact only holds the model weights with the LightningModule prefix
+    already stripped (no optimizer states, loop states or callbacks) and,
+    optionally, the model config to instantiate the model from. It is saved
+    in the zip format, so that `load_inference_model` can memory-map it.
+
+    Args:
+        ckpt_path (str): Path to the Lightning checkpoint.
+        path (str): Output path of the artifact.
+        model_config (Optional[Dict[str, Any]], optional): Config of the model
+            with ``_target_`` (e.g. `inference_api.model` of
+            `configs/default_demo.yaml`), as primitive containers.
+
+    Returns:
+        str: `path`.
+    """
+    state_dict = {
+        key: value.contiguous() if isinstance(value, torch.Tensor) else value
+        for key, value in load_lightning_state_dict(ckpt_path).items()
+    }
+    artifact = {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "model_config": model_config,
+        "state_dict": state_dict,
+    }
+    torch.save(artifact, path)
+    logger.info(f"Exported inference artifact to {path}.")
+    return path
+
+
+def load_inference_artifact(path: str, mmap: bool = True) -> Dict[str, Any]:
+    """Loads an artifact written by `export_inference_artifact`.
+
+    Args:
+        path (str): Path to the artifact.
+        mmap (bool, optional): If True (and supported by torch), the weights
+            are memory-mapped and only read from disk when first accessed.
+
+    Raises:
+        ValueError: Raised if the file is not an inference artifact.
+
+    Returns:
+        Dict[str, Any]: Artifact with `model_config` and `state_dict`.
+    """
+    kwargs = {"mmap": True} if mmap and _SUPPORTS_MMAP else {}
+    artifact = torch.load(path, map_location="cpu", weights_only=True, **kwargs)
+    if artifact.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(
+            f"{path} is not an inference artifact of format version"
+            f" {ARTIFACT_FORMAT_VERSION}, convert the checkpoint with"
+            " `export_inference_artifact`."
+        )
+    return artifact
+
+
+def load_inference_model(
+    path: str,
+    model_config: Optional[Dict[str, Any]] = None,
+    mmap: bool = True,
+    warmup_input_shape: Optional[Tuple[int, ...]] = None,
+) -> torch.nn.Module:
+    """Instantiates a model from an inference artifact for fast cold starts.
+
+    With `mmap`, the model is instantiated on the meta device (skipping the
+    random initialization of its parameters) and the memory-mapped weights
+    are assigned to it, so that they are paged in lazily by the first forward.
+    If `warmup_input_shape` is given, a forward on zeros is run before
+    returning, so that the model is ready to serve with low latency.
+
+    Args:
+        path (str): Path to the artifact.
+        model_config (Optional[Dict[str, Any]], optional): Config of the model
+            with ``_target_``. Defaults to the config stored in the artifact.
+        mmap (bool, optional): If True, memory-map and assign the weights.
+        warmup_input_shape (Optional[Tuple[int, ...]], optional): Input shape
+            of the warmup forward. No warmup if None.
+
+    Raises:
+        ValueError: Raised if no model config is given nor stored.
+
+    Returns:
+        torch.nn.Module: Model in eval mode.
+    """
+    from my_package.utils.module_utils import instantiate
+    from omegaconf import OmegaConf
+
+    start = time.perf_counter()
+    artifact = load_inference_artifact(path, mmap=mmap)
+    model_config = model_config or artifact["model_config"]
+    if model_config is None:
+        raise ValueError(f"{path} stores no model config, pass `model_config`.")
+    model_config = OmegaConf.create(model_config)
+
+    lazy = mmap and _SUPPORTS_MMAP
+    if lazy:
+        with torch.device("meta"):
+            model = instantiate(model_config)
+        model.load_state_dict(artifact["state_dict"], assign=True)
+    else:
+        model = instantiate(model_config)
+        model.load_state_dict(artifact["state_dict"])
+    model.eval()
+    logger.info(
+        f"Loaded model from {path} in {(time.perf_counter() - start) * 1000:.1f} ms"
+        f" (mmap: {lazy})."
+    )
+
+    if warmup_input_shape is not None:
+        start = time.perf_counter()
+        with torch.no_grad():
+            model(torch.zeros(*warmup_input_shape))
+        logger.info(
+            f"Warmed up model in {(time.perf_counter() - start) * 1000:.1f} ms."
+        )
+    return model
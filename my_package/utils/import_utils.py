@@ -0,0 +1,137 @@
+import argparse
+import importlib
+import subprocess
+import sys
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class ImportTime(NamedTuple):
+    """Import time of a module as reported by ``python -X importtime``."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def lazy_submodules(
+    package: str, submodules: Sequence[str]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """Returns module ``__getattr__`` and ``__dir__`` importing submodules of
+    `package` on first attribute access (PEP 562).
+
+    e.g. in ``my_package/__init__.py``
+        __getattr__, __dir__ = lazy_submodules(__name__, ["utils", ...])
+
+    Args:
+        package (str): Name of the package, i.e. ``__name__`` of its
+            ``__init__``.
+        submodules (Sequence[str]): Names of the lazily imported submodules.
+
+    Returns:
+        Tuple[Callable[[str], Any], Callable[[], List[str]]]: ``__getattr__``
+            and ``__dir__`` of the package.
+    """
+    submodules = set(submodules)
+
+    def __getattr__(name: str) -> Any:
+        if name in submodules:
+            return importlib.import_module(f"{package}.{name}")
+        raise AttributeError(f"module '{package}' has no attribute '{name}'")
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | submodules)
+
+    return __getattr__, __dir__
+
+
+def import_time_report(module: str, preload: Sequence[str] = ()) -> List[ImportTime]:
+    """Measures the import time of `module` and of each module it imports in a
+    fresh interpreter with ``-X importtime``.
+
+    Args:
+        module (str): Module to import.
+        preload (Sequence[str], optional): Modules imported before `module`,
+            whose import times are thus excluded, e.g. ``("torch", "numpy")``.
+
+    Raises:
+        RuntimeError: Raised if `module` fails to import.
+
+    Returns:
+        List[ImportTime]: Modules imported by `module` (including itself) in
+            import order, i.e. outermost modules come after their imports.
+    """
+    code = "".join(f"import {name}\n" for name in preload)
+    # separates the times of the preloaded modules from those of `module`
+    code += "import sys; print('--- preload done ---', file=sys.stderr)\n"
+    code += f"import {module}\n"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Failed to import {module}:\n{proc.stderr}")
+    lines = proc.stderr.split("--- preload done ---\n", 1)[-1].splitlines()
+
+    report = []
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header
+        report.append(
+            ImportTime(
+                module=name.strip(),
+                self_us=int(self_us),
+                cumulative_us=int(cumulative_us),
+                depth=(len(name) - len(name.lstrip())) // 2,
+            )
+        )
+    return report
+
+
+def total_import_time_ms(report: Sequence[ImportTime]) -> float:
+    """Returns the total import time of a report in milliseconds."""
+    return sum(entry.self_us for entry in report) / 1000
+
+
+def format_import_time_report(report: Sequence[ImportTime], top: int = 20) -> str:
+    """Formats the `top` slowest modules of a report (by self time) as a table.
+
+    >>> print(format_import_time_report([ImportTime("json", 1500, 3000, 0)]))
+    self [ms]  cumulative [ms]  module
+        1.500            3.000  json
+    total: 1.500 ms (1 modules)
+    """
+    lines = ["self [ms]  cumulative [ms]  module"]
+    for entry in sorted(report, key=lambda entry: entry.self_us, reverse=True)[:top]:
+        lines.append(
+            f"{entry.self_us / 1000:9.3f}  {entry.cumulative_us / 1000:15.3f}"
+            f"  {entry.module}"
+        )
+    lines.append(
+        f"total: {total_import_time_ms(report):.3f} ms ({len(report)} modules)"
+    )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Prints the import time report of a module.
+
+    e.g.
+        python -m my_package.utils.import_utils \\
+            my_package.applications.server --preload torch numpy
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("module")
+    parser.add_argument("--preload", nargs="*", default=[])
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+    report = import_time_report(args.module, preload=args.preload)
+    print(format_import_time_report(report, top=args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,36 @@
-from typing import List
+import copy
+from typing import List, Tuple
 
 import torch
 from my_package.utils.logger import get_logger
-from my_package.utils.module_utils import instantiate
-from omegaconf import DictConfig
+from my_package.utils.module_utils import cached_instantiation
+from omegaconf import DictConfig, open_dict
 from pytorch_lightning import Callback, LightningDataModule, Trainer
 from pytorch_lightning.loggers import LightningLoggerBase
 
 logger = get_logger(__name__)
 
 
+def _pop_batch_flag(tf_conf: DictConfig) -> Tuple[DictConfig, bool]:
+    """Returns a copy of `tf_conf` without the `_batch_` key and its value."""
+    tf_conf_copy = copy.deepcopy(tf_conf)
+    tf_conf_copy._set_parent(tf_conf._get_parent())
+    with open_dict(tf_conf_copy):
+        is_batch = tf_conf_copy.pop("_batch_", False)
+    return tf_conf_copy, is_batch
+
+
 def prepare_lightning_datamodule(
     config: DictConfig,
 ) -> LightningDataModule:
-    """Returns PyTorch Lightning DataModule with loggers and callbacks.
+    """Returns PyTorch Lightning DataModule with transforms.
+
+    Transforms marked with `_batch_: True` in the `transforms` config are passed
+    to the datamodule as `batch_transforms`, applied to whole batches after they
+    are transferred to the device. The others are applied to each sample.
 
     Args:
-        config (DictConfig): DictConfig with optional keys of `callbacks` and `logger`.
+        config (DictConfig): DictConfig with `datamodule` and optional `transforms`.
 
     Returns:
         LightningDataModule: Returns LightningDataModule.
@@ -24,16 +38,25 @@ def prepare_lightning_datamodule(
 
     # Init transforms
     transforms: List[torch.nn.Module] = []
+    batch_transforms: List[torch.nn.Module] = []
     if "transforms" in config:
         for _, tf_conf in config.transforms.items():
             if "_target_" in tf_conf:
-                logger.info(f"Instantiating transform <{tf_conf._target_}>")
-                transforms.append(instantiate(tf_conf))
+                tf_conf, is_batch = _pop_batch_flag(tf_conf)
+                logger.info(
+                    f"Instantiating {'batch ' if is_batch else ''}transform"
+                    f" <{tf_conf._target_}>"
+                )
+                if is_batch:
+                    batch_transforms.append(cached_instantiation(tf_conf)())
+                else:
+                    transforms.append(cached_instantiation(tf_conf)())
 
     # Init lightning datamodule
-    datamodule: LightningDataModule = instantiate(
-        config.datamodule, transforms=transforms
-    )
+    kwargs = dict(transforms=transforms)
+    if batch_transforms:
+        kwargs["batch_transforms"] = batch_transforms
+    datamodule: LightningDataModule = cached_instantiation(config.datamodule)(**kwargs)
 
     return datamodule
 
@@ -48,7 +71,7 @@ def prepare_lightning_trainer(
         for _, cb_conf in config.callbacks.items():
             if "_target_" in cb_conf:
                 logger.info(f"Instantiating callback <{cb_conf._target_}>")
-                callbacks.append(instantiate(cb_conf))
+                callbacks.append(cached_instantiation(cb_conf)())
 
     # Init lightning loggers
     pl_loggers: List[LightningLoggerBase] = []
@@ -56,13 +79,11 @@ def prepare_lightning_trainer(
         for _, lg_conf in config.logger.items():
             if "_target_" in lg_conf:
                 logger.info(f"Instantiating logger <{lg_conf._target_}>")
-                pl_loggers.append(instantiate(lg_conf))
+                pl_loggers.append(cached_instantiation(lg_conf)())
 
     # Init lightning trainer
-    trainer: Trainer = instantiate(
-        config.trainer,
-        callbacks=callbacks,
-        logger=pl_loggers,
+    trainer: Trainer = cached_instantiation(config.trainer)(
+        callbacks=callbacks, logger=pl_loggers
     )
 
     return trainer
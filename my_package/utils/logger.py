@@ -1,7 +1,46 @@
+import functools
 import logging
-from typing import Optional
+import os
+import sys
+from typing import Any, Callable, Optional
 
-from pytorch_lightning.utilities import rank_zero_only
+# environment variables holding the global rank, in the order Lightning checks
+_RANK_KEYS = ("RANK", "LOCAL_RANK", "SLURM_PROCID", "JSM_NAMESPACE_RANK")
+
+
+def _get_rank() -> int:
+    # Lightning updates its rank once the trainer is set up, so prefer it if
+    # it is already imported (without importing it for inference-only use).
+    rank_zero = sys.modules.get("pytorch_lightning.utilities.rank_zero")
+    if rank_zero is not None:
+        rank = getattr(rank_zero.rank_zero_only, "rank", None)
+        if rank is not None:
+            return rank
+    for key in _RANK_KEYS:
+        rank = os.environ.get(key)
+        if rank is not None:
+            return int(rank)
+    return 0
+
+
+def rank_zero_only(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Decorates `fn` to be called only on rank 0, like Lightning's
+    `rank_zero_only` but without importing Lightning.
+
+    Args:
+        fn (Callable[..., Any]): Function to decorate.
+
+    Returns:
+        Callable[..., Any]: Function returning None on ranks other than 0.
+    """
+
+    @functools.wraps(fn)
+    def wrapped_fn(*args: Any, **kwargs: Any) -> Optional[Any]:
+        if _get_rank() == 0:
+            return fn(*args, **kwargs)
+        return None
+
+    return wrapped_fn
 
 
 def get_logger(name: Optional[str] = __name__) -> logging.Logger:
@@ -2,8 +2,10 @@
 # From Hydra 1.1.2
 import copy
 import functools
+import threading
+from collections import OrderedDict
 from enum import Enum
-from typing import Any, Callable, Dict, List, Sequence, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 from omegaconf import OmegaConf, SCMode
 from omegaconf._utils import is_structured_config
@@ -41,11 +43,14 @@ class ConvertMode(Enum):
             return NotImplemented
 
 
+@functools.lru_cache(maxsize=1024)
 def _locate(path: str) -> Any:
     """
     Locate an object by name or dotted path, importing as necessary.
     This is similar to the pydoc function `locate`, except that it checks for
     the module from the given path from back to front.
+    Located objects are cached by path (failures are not), since the same
+    `_target_` is typically located on every instantiation.
     """
     if path == "":
         raise ImportError("Empty path")
@@ -273,7 +278,7 @@ def instantiate(config: Any, *args: Any, **kwargs: Any) -> Any:
         return None
 
     # if isinstance(config, TargetConf) and config._target_ == "???":
-    if config._target_ == "???":
+    if OmegaConf.is_dict(config) and OmegaConf.is_missing(config, _Keys.TARGET):
         # Specific check to give a good warning about
         # failure to annotate _target_ as a string.
         raise ValueError(
@@ -451,3 +456,257 @@ def instantiate_node(
 
     else:
         assert False, f"Unexpected config type : {type(node).__name__}"
+
+
+Builder = Callable[..., Any]
+
+
+class InstantiationPlan:
+    """Reusable instantiation of a config, built by `compile_instantiation`.
+
+    Calling the plan constructs new objects from the config like `instantiate`,
+    but the config is only copied, resolved and walked once at compile time and
+    all targets are already located, so repeated constructions (e.g. per sweep
+    trial or per request) skip this overhead.
+
+    Args:
+        build (Builder): Builds the objects from positional args and top-level
+            keyword arguments.
+        target (Optional[str], optional): Top-level `_target_`, for repr.
+    """
+
+    def __init__(self, build: Builder, target: Optional[str] = None):
+        self._build = build
+        self.target = target
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        """Constructs the objects of the config.
+
+        Args:
+            args: Optional positional parameters pass-through.
+            kwargs: Optional named parameters of the top-level target, passed
+                as is (unlike `instantiate`, they are not merged into the
+                config, so nested configs are not supported here).
+
+        Returns:
+            Any: Same as `instantiate`.
+        """
+        return self._build(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(target={self.target!r})"
+
+
+def compile_instantiation(config: Any) -> InstantiationPlan:
+    """Compiles a config into a reusable `InstantiationPlan`.
+
+    e.g.
+        >>> plan = compile_instantiation(
+        ...     {"_target_": "torch.nn.Linear", "in_features": 2, "out_features": 3}
+        ... )
+        >>> plan().weight.shape, plan(out_features=4).weight.shape
+        (torch.Size([3, 2]), torch.Size([4, 2]))
+
+    Args:
+        config (Any): Same as `instantiate`. Interpolations are resolved at
+            compile time.
+
+    Returns:
+        InstantiationPlan: Plan constructing the objects of `config`.
+    """
+    if config is None:
+        return InstantiationPlan(_constant(None))
+
+    if isinstance(config, (dict, list)):
+        config = _prepare_input_dict_or_list(config)
+    if is_structured_config(config) or isinstance(config, (dict, list)):
+        config = OmegaConf.structured(config, flags={"allow_objects": True})
+    if not OmegaConf.is_config(config):
+        raise ValueError(
+            f"Cannot compile config of type {type(config).__name__}.\n"
+            "Top level config must be an OmegaConf DictConfig/ListConfig object,"
+            "a plain dict/list, or a Structured Config class or instance."
+        )
+    if OmegaConf.is_dict(config) and OmegaConf.is_missing(config, _Keys.TARGET):
+        raise ValueError("Config has missing value for key `_target_`, cannot compile.")
+
+    config_copy = copy.deepcopy(config)
+    config_copy._set_flag(
+        flags=["allow_objects", "struct", "readonly"], values=[True, False, False]
+    )
+    config_copy._set_parent(config._get_parent())
+    config = config_copy
+    OmegaConf.resolve(config)
+
+    target = None
+    if OmegaConf.is_dict(config):
+        target = config.get(_Keys.TARGET)
+        recursive = config.pop(_Keys.RECURSIVE, True)
+        convert = config.pop(_Keys.CONVERT, ConvertMode.NONE)
+        partial = config.pop(_Keys.PARTIAL, False)
+        build = _compile_node(config, convert, recursive, partial)
+    else:
+        build = _compile_node(config, ConvertMode.NONE, True, False)
+    return InstantiationPlan(build, target=_convert_target_to_string(target))
+
+
+# plans of `cached_instantiation` by resolved config, least recently used first
+_PLAN_CACHE_SIZE = 256
+_plan_cache: "OrderedDict[str, InstantiationPlan]" = OrderedDict()
+_plan_cache_lock = threading.Lock()
+
+
+def _is_plain(value: Any) -> bool:
+    """Returns whether `value` is a container of primitives only, whose repr
+    identifies it (unlike objects, whose repr may contain their address)."""
+    if isinstance(value, dict):
+        return all(_is_plain(v) for v in value.values())
+    if isinstance(value, list):
+        return all(_is_plain(v) for v in value)
+    return value is None or isinstance(value, (str, int, float, bool))
+
+
+def cached_instantiation(config: Any) -> InstantiationPlan:
+    """Returns the `InstantiationPlan` of `config`, compiled only once per
+    distinct resolved config in this process.
+
+    The configs built again and again, e.g. the transforms, callbacks and
+    loggers of each run or of each sweep trial of a worker process, are then
+    copied, resolved and walked only once. Only the resolved values are
+    compared, which is cheaper than `instantiate`. Configs containing objects,
+    and those which are not OmegaConf configs, are compiled on every call.
+
+    e.g.
+        >>> config = OmegaConf.create({"_target_": "builtins.dict", "a": 1})
+        >>> cached_instantiation(config) is cached_instantiation(config.copy())
+        True
+        >>> cached_instantiation(config)(b=2)
+        {'a': 1, 'b': 2}
+
+    Args:
+        config (Any): Same as `instantiate`.
+
+    Returns:
+        InstantiationPlan: Plan constructing the objects of `config`.
+    """
+    if not OmegaConf.is_config(config):
+        return compile_instantiation(config)
+    container = OmegaConf.to_container(config, resolve=True)
+    if not _is_plain(container):
+        return compile_instantiation(config)
+
+    key = repr(container)
+    with _plan_cache_lock:
+        plan = _plan_cache.get(key)
+        if plan is not None:
+            _plan_cache.move_to_end(key)
+            return plan
+    plan = compile_instantiation(config)
+    with _plan_cache_lock:
+        _plan_cache[key] = plan
+        if len(_plan_cache) > _PLAN_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
+    return plan
+
+
+def _constant(value: Any) -> Builder:
+    """Returns a builder of `value`, copying configs since targets may modify
+    them (e.g. detaching them from their parent)."""
+    if OmegaConf.is_config(value):
+        return lambda *args, **kwargs: copy.deepcopy(value)
+    return lambda *args, **kwargs: value
+
+
+def _compile_node(
+    node: Any,
+    convert: Union[str, ConvertMode],
+    recursive: bool,
+    partial: bool,
+) -> Builder:
+    """Compiles `node` into a builder, mirroring `instantiate_node`."""
+    if node is None or (OmegaConf.is_config(node) and node._is_none()):
+        return _constant(None)
+
+    if not OmegaConf.is_config(node):
+        return _constant(node)
+
+    if OmegaConf.is_dict(node):
+        convert = node[_Keys.CONVERT] if _Keys.CONVERT in node else convert
+        recursive = node[_Keys.RECURSIVE] if _Keys.RECURSIVE in node else recursive
+        partial = node[_Keys.PARTIAL] if _Keys.PARTIAL in node else partial
+
+    full_key = node._get_full_key(None)
+
+    if not isinstance(recursive, bool):
+        msg = f"Instantiation: _recursive_ flag must be a bool, got {type(recursive)}"
+        if full_key:
+            msg += f"\nfull_key: {full_key}"
+        raise TypeError(msg)
+
+    if not isinstance(partial, bool):
+        msg = f"Instantiation: _partial_ flag must be a bool, got {type(partial)}"
+        if node and full_key:
+            msg += f"\nfull_key: {full_key}"
+        raise TypeError(msg)
+
+    if OmegaConf.is_list(node):
+        item_builders = [
+            _compile_node(item, convert, recursive, False)
+            for item in node._iter_ex(resolve=True)
+        ]
+
+        def build_list(*args: Any, **kwargs: Any) -> Any:
+            items = [build() for build in item_builders]
+            if convert in (ConvertMode.ALL, ConvertMode.PARTIAL):
+                return items
+            lst = OmegaConf.create(items, flags={"allow_objects": True})
+            lst._set_parent(node)
+            return lst
+
+        return build_list
+
+    elif OmegaConf.is_dict(node):
+        exclude_keys = set({"_target_", "_convert_", "_recursive_", "_partial_"})
+        if _is_target(node):
+            _target_ = _resolve_target(node.get(_Keys.TARGET), full_key)
+            kwarg_builders = {
+                key: _compile_node(value, convert, recursive, False)
+                if recursive
+                else _constant(value)
+                for key, value in node.items()
+                if key not in exclude_keys
+            }
+
+            def build_target(*args: Any, **kwargs: Any) -> Any:
+                target_kwargs = {
+                    key: _convert_node(build(), convert)
+                    for key, build in kwarg_builders.items()
+                }
+                target_kwargs.update(kwargs)
+                return _call_target(_target_, partial, args, target_kwargs, full_key)
+
+            return build_target
+
+        value_builders = {
+            key: _compile_node(value, convert, recursive, False)
+            for key, value in node.items()
+        }
+        if convert == ConvertMode.ALL or (
+            convert == ConvertMode.PARTIAL and node._metadata.object_type is None
+        ):
+            return lambda *args, **kwargs: {
+                key: build() for key, build in value_builders.items()
+            }
+
+        def build_dict(*args: Any, **kwargs: Any) -> Any:
+            cfg = OmegaConf.create({}, flags={"allow_objects": True})
+            for key, build in value_builders.items():
+                cfg[key] = build()
+            cfg._set_parent(node)
+            cfg._metadata.object_type = node._metadata.object_type
+            return cfg
+
+        return build_dict
+
+    else:
+        assert False, f"Unexpected config type : {type(node).__name__}"
@@ -0,0 +1,148 @@
+import copy
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+import torch
+from my_package.utils.logger import get_logger
+from torch import nn
+from torch.ao.quantization import get_default_qconfig_mapping, quantize_dynamic
+from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+from torch.nn.utils.fusion import fuse_linear_bn_eval
+
+logger = get_logger(__name__)
+
+Batch = Tuple[torch.Tensor, torch.Tensor]
+
+
+def fold_batch_norm(model: nn.Module) -> nn.Module:
+    """Folds BatchNorm1d layers into the preceding Linear layers.
+
+    Every ``Linear`` directly followed by a ``BatchNorm1d`` in an
+    ``nn.Sequential`` (e.g. in `SimpleDenseNet`) is replaced by a single
+    ``Linear`` with the normalization folded into its weights, and the
+    ``BatchNorm1d`` by ``Identity``. The model is copied and set to eval mode.
+
+    Args:
+        model (nn.Module): Model to fold.
+
+    Returns:
+        nn.Module: Folded copy of `model`.
+    """
+    model = copy.deepcopy(model).eval()
+    for module in model.modules():
+        if not isinstance(module, nn.Sequential):
+            continue
+        for i in range(len(module) - 1):
+            linear, bn = module[i], module[i + 1]
+            if isinstance(linear, nn.Linear) and isinstance(bn, nn.BatchNorm1d):
+                module[i] = fuse_linear_bn_eval(linear, bn)
+                module[i + 1] = nn.Identity()
+    return model
+
+
+def quantize_dynamic_int8(model: nn.Module) -> nn.Module:
+    """Quantizes the Linear layers of `model` to int8 with dynamic activations.
+
+    Args:
+        model (nn.Module): Float model.
+
+    Returns:
+        nn.Module: Quantized copy of `model`.
+    """
+    model = fold_batch_norm(model)
+    return quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+def quantize_static_int8(
+    model: nn.Module,
+    calibration_batches: Iterable[torch.Tensor],
+    input_shape: Tuple[int, ...] = (1, 1, 28, 28),
+    backend: str = "x86",
+) -> nn.Module:
+    """Quantizes weights and activations of `model` to int8 (FX graph mode).
+
+    Activation ranges are calibrated by running `model` on
+    `calibration_batches`, e.g. inputs of the validation split.
+
+    Args:
+        model (nn.Module): Float model.
+        calibration_batches (Iterable[torch.Tensor]): Input batches for
+            calibration.
+        input_shape (Tuple[int, ...], optional): Example input shape for tracing.
+        backend (str, optional): Quantized engine, e.g. ``x86``, ``fbgemm`` or
+            ``qnnpack``.
+
+    Returns:
+        nn.Module: Quantized copy of `model`.
+    """
+    # the engine packs the quantized weights, restored afterwards so that
+    # quantizing has no global side effect
+    previous_engine = torch.backends.quantized.engine
+    torch.backends.quantized.engine = backend
+    try:
+        model = fold_batch_norm(model)
+        prepared = prepare_fx(
+            model,
+            get_default_qconfig_mapping(backend),
+            example_inputs=(torch.randn(*input_shape),),
+        )
+        num_samples = 0
+        with torch.no_grad():
+            for x in calibration_batches:
+                prepared(x)
+                num_samples += len(x)
+        logger.info(f"Calibrated activation ranges with {num_samples} samples.")
+        return convert_fx(prepared)
+    finally:
+        torch.backends.quantized.engine = previous_engine
+
+
+def evaluate_accuracy(
+    model: Callable[[torch.Tensor], torch.Tensor],
+    batches: Iterable[Batch],
+    max_batches: Optional[int] = None,
+) -> float:
+    """Returns the classification accuracy of `model` on `batches`.
+
+    Args:
+        model (Callable[[torch.Tensor], torch.Tensor]): Maps inputs to logits.
+        batches (Iterable[Batch]): Batches of inputs and targets.
+        max_batches (Optional[int], optional): Maximum number of batches.
+
+    Returns:
+        float: Accuracy.
+    """
+    num_correct, num_samples = 0, 0
+    with torch.no_grad():
+        for i, (x, y) in enumerate(batches):
+            if max_batches is not None and i >= max_batches:
+                break
+            num_correct += int((model(x).argmax(dim=-1) == y).sum())
+            num_samples += len(y)
+    return num_correct / max(num_samples, 1)
+
+
+def save_torchscript(
+    model: nn.Module, path: str, input_shape: Tuple[int, ...] = (1, 1, 28, 28)
+) -> str:
+    """Saves a (quantized) model as TorchScript, loadable by the ``torchscript``
+    backend of `MNISTInferenceAPI`.
+
+    Args:
+        model (nn.Module): Model to save.
+        path (str): Output path.
+        input_shape (Tuple[int, ...], optional): Example input shape for tracing.
+
+    Returns:
+        str: `path`.
+    """
+    with torch.no_grad():
+        traced = torch.jit.trace(model.eval(), torch.randn(*input_shape))
+    torch.jit.save(traced, path)
+    logger.info(f"Saved TorchScript module to {path}.")
+    return path
+
+
+def transferred_batches(datamodule: Any, dataloader: Iterable[Any]) -> Iterable[Any]:
+    """Yields batches of `dataloader` after the datamodule's batch transforms."""
+    for batch in dataloader:
+        yield datamodule.on_after_batch_transfer(batch, dataloader_idx=0)
@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import torch
+from my_package.applications.image.classification.mnist_api import (
+    MNISTInferenceAPI,
+)
+from my_package.models.image.simple_conv_net import SimpleConvNet
+
+
+@pytest.fixture
+def images():
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (64, 64), dtype=np.uint8) for _ in range(8)]
+
+
+def _assert_labels_close(labels, labels_expected):
+    assert len(labels) == len(labels_expected)
+    for label, label_expected in zip(labels, labels_expected):
+        assert label.keys() == label_expected.keys()
+        assert np.allclose(list(label.values()), list(label_expected.values()))
+
+
+@pytest.mark.parametrize("dynamic_batching", [False, True])
+def test_mnist_api_inference_batch(images, dynamic_batching):
+    """Test batched and dynamically batched inference match single inference."""
+
+    torch.manual_seed(0)
+    model = SimpleConvNet().eval()
+    api = MNISTInferenceAPI(model, dynamic_batching=dynamic_batching)
+    labels_single = [MNISTInferenceAPI(model).inference(img) for img in images]
+
+    _assert_labels_close(api.inference_batch(images), labels_single)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        _assert_labels_close(list(executor.map(api.inference, images)), labels_single)
+
+    assert api.inference_batch([None, images[0]])[0] == {i: 0.0 for i in range(10)}
+
+
+def test_mnist_api_top_k(images):
+    """Test `top_k` keeps the most probable classes only."""
+
+    model = SimpleConvNet().eval()
+    labels = MNISTInferenceAPI(model).inference_batch(images)
+    labels_top3 = MNISTInferenceAPI(model, top_k=3).inference_batch(images)
+    for label, label_top3 in zip(labels, labels_top3):
+        expected = sorted(label.items(), key=lambda item: -item[1])[:3]
+        assert list(label_top3.keys()) == [c for c, _ in expected]
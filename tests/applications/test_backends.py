@@ -0,0 +1,56 @@
+import pytest
+import torch
+from my_package.applications.backends import build_runner, compare_latency
+from my_package.models.image.simple_conv_net import SimpleConvNet
+from my_package.models.image.simple_dense_net import SimpleDenseNet
+from my_package.utils.export_utils import export_onnx, export_torchscript
+
+INPUT_SHAPE = (2, 1, 28, 28)
+
+
+@pytest.fixture(params=[SimpleConvNet, SimpleDenseNet])
+def model(request):
+    torch.manual_seed(0)
+    model = request.param()
+    # run a training forward to get non-trivial batch norm statistics
+    model(torch.randn(16, 1, 28, 28))
+    return model.eval()
+
+
+def test_torchscript_backend_parity(tmp_path, model):
+    """Test the exported TorchScript module matches the eager model."""
+
+    path = export_torchscript(model, str(tmp_path / "model.pt"), INPUT_SHAPE)
+    runner = build_runner("torchscript", artifact_path=path)
+    x = torch.randn(5, 1, 28, 28)
+    with torch.no_grad():
+        assert torch.allclose(runner(x), model(x), atol=1e-5)
+
+
+def test_onnxruntime_backend_parity(tmp_path, model):
+    """Test the exported ONNX model run by onnxruntime matches the eager model."""
+
+    pytest.importorskip("onnxruntime")
+    path = export_onnx(model, str(tmp_path / "model.onnx"), INPUT_SHAPE)
+    runner = build_runner("onnxruntime", artifact_path=path, num_threads=1)
+    x = torch.randn(5, 1, 28, 28)
+    with torch.no_grad():
+        assert torch.allclose(runner(x), model(x), atol=1e-5)
+
+    latencies = compare_latency(
+        {"eager": model, "onnxruntime": runner},
+        input_shape=INPUT_SHAPE[1:],
+        num_iters=2,
+        num_warmup=1,
+    )
+    assert set(latencies["onnxruntime"].keys()) == {1, 32}
+
+
+def test_compiled_backend_parity(model):
+    """Test the model compiled by torch.compile matches the eager model."""
+
+    runner = build_runner("compiled", model=model)
+    x = torch.randn(5, 1, 28, 28)
+    with torch.no_grad():
+        assert torch.allclose(runner(x), model(x), atol=1e-5)
+    assert runner.compiled
@@ -0,0 +1,41 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from my_package.applications.dynamic_batcher import DynamicBatcher
+
+
+def test_dynamic_batcher_coalesces_requests():
+    """Test concurrent requests are batched and get their own results."""
+
+    batch_sizes = []
+    release = threading.Event()
+
+    def batch_fn(items):
+        release.wait()
+        batch_sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    with DynamicBatcher(batch_fn, max_batch_size=8, max_wait_ms=50) as batcher:
+        futures = [batcher.submit(i) for i in range(20)]
+        release.set()
+        assert [future.result(timeout=5) for future in futures] == [
+            i * 2 for i in range(20)
+        ]
+    assert max(batch_sizes) == 8
+    assert sum(batch_sizes) == 20
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        with DynamicBatcher(batch_fn, max_batch_size=4) as batcher:
+            assert list(executor.map(batcher, range(10))) == list(range(0, 20, 2))
+
+
+def test_dynamic_batcher_propagates_errors():
+    """Test an exception in the batch function is raised to every caller."""
+
+    def batch_fn(items):
+        raise ValueError("failed")
+
+    with DynamicBatcher(batch_fn) as batcher:
+        with pytest.raises(ValueError, match="failed"):
+            batcher(0, timeout=5)
@@ -0,0 +1,217 @@
+import asyncio
+import functools
+import http.client
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import torch
+from my_package.applications.image.classification.mnist_api import (
+    MNISTInferenceAPI,
+)
+from my_package.applications.server import InferenceServer
+from my_package.models.image.simple_conv_net import SimpleConvNet
+
+
+def _build_api(delay: float = 0.0, fail_on_white: bool = False):
+    torch.manual_seed(0)
+    api = MNISTInferenceAPI(SimpleConvNet().eval())
+    if fail_on_white:
+        predict_batch = api.predict_batch
+
+        def failing_predict_batch(imgs, *args, **kwargs):
+            if any((img == 255).all() for img in imgs):
+                raise RuntimeError("Model failure.")
+            return predict_batch(imgs, *args, **kwargs)
+
+        api.predict_batch = failing_predict_batch
+    if delay:
+        predict_batch = api.predict_batch
+
+        def slow_predict_batch(*args, **kwargs):
+            time.sleep(delay)
+            return predict_batch(*args, **kwargs)
+
+        api.predict_batch = slow_predict_batch
+    return api
+
+
+@pytest.fixture
+def serve():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    servers = []
+
+    def _serve(**kwargs):
+        server = InferenceServer(host="127.0.0.1", port=0, **kwargs)
+        asyncio.run_coroutine_threadsafe(server.start(), loop).result(timeout=10)
+        servers.append(server)
+        deadline = time.monotonic() + 30
+        while not server.ready and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return server
+
+    yield _serve
+    for server in servers:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result(timeout=10)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+def _request(port, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request(method, path, body=body, headers=headers or {})
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    conn.close()
+    return response.status, payload
+
+
+@pytest.mark.parametrize("dynamic_batching", [False, True])
+def test_inference_server(serve, dynamic_batching):
+    """Test health, readiness and JSON/raw predictions match the api."""
+
+    server = serve(
+        api_factory=_build_api, max_workers=2, dynamic_batching=dynamic_batching
+    )
+    assert _request(server.port, "GET", "/health") == (200, {"status": "ok"})
+    assert _request(server.port, "GET", "/ready") == (200, {"status": "ready"})
+
+    img = np.random.default_rng(0).integers(0, 256, (28, 28), dtype=np.uint8)
+    indices, probs = _build_api().predict_batch([img], k=3)
+
+    status, payload = _request(
+        server.port,
+        "POST",
+        "/predict",
+        body=json.dumps({"image": img.tolist(), "top_k": 3}),
+    )
+    assert status == 200
+    (prediction,) = payload["predictions"]
+    assert prediction["indices"] == indices[0].tolist()
+    assert np.allclose(prediction["probabilities"], probs[0])
+
+    status, payload = _request(
+        server.port,
+        "POST",
+        "/predict/raw",
+        body=img.tobytes(),
+        headers={"X-Height": "28", "X-Width": "28"},
+    )
+    assert status == 200
+    assert payload["predictions"][0]["indices"][:3] == indices[0].tolist()
+
+    assert _request(server.port, "POST", "/predict", body=b"{}")[0] == 400
+    assert _request(server.port, "GET", "/unknown")[0] == 404
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_inference_server_threads(serve, executor):
+    """Test the workers are warmed up before ready and limited to their torch
+    threads, and the threads of this process are restored on close."""
+
+    num_threads = torch.get_num_threads()
+    torch.set_num_threads(2)
+    server = serve(
+        api_factory=_build_api,
+        executor=executor,
+        max_workers=2,
+        threads_per_worker=1,
+    )
+    assert server.ready
+    img = np.zeros((28, 28), dtype=int).tolist()
+    body = json.dumps({"image": img, "top_k": 1})
+    assert _request(server.port, "POST", "/predict", body=body)[0] == 200
+    assert server._executor.submit(torch.get_num_threads).result() == 1
+    loop = server._server.get_loop()
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result(timeout=30)
+    # new threads get the restored number
+    with ThreadPoolExecutor(1) as executor:
+        assert executor.submit(torch.get_num_threads).result() == 2
+    torch.set_num_threads(num_threads)
+
+
+def test_inference_server_backpressure(serve):
+    """Test requests beyond `max_pending` are rejected with 503."""
+
+    server = serve(
+        api_factory=functools.partial(_build_api, delay=0.5),
+        max_workers=1,
+        max_pending=1,
+    )
+    body = json.dumps({"image": np.zeros((28, 28), dtype=int).tolist()})
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                _request(server.port, "POST", "/predict", body=body)[0]
+            )
+        )
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [200, 503, 503]
+
+
+@pytest.mark.parametrize("dynamic_batching", [False, True])
+def test_inference_server_invalid_requests(serve, dynamic_batching):
+    """Test invalid inputs get 400, failing predictions get 500, and neither
+    fails the other requests."""
+
+    server = serve(
+        api_factory=functools.partial(_build_api, fail_on_white=True),
+        max_workers=2,
+        dynamic_batching=dynamic_batching,
+    )
+    img = np.zeros((28, 28), dtype=np.uint8).tolist()
+    for payload in [
+        {"image": [1, 2, 3]},
+        {"image": np.zeros((2, 28, 28, 1), dtype=int).tolist()},
+        {"image": np.zeros((28, 28, 2), dtype=int).tolist()},
+        {"images": [img, [[]]]},
+        {"image": img, "top_k": "a"},
+        {"image": img, "top_k": True},
+        {"image": img, "top_k": 0},
+    ]:
+        status, response = _request(
+            server.port, "POST", "/predict", body=json.dumps(payload)
+        )
+        assert status == 400, payload
+        assert "error" in response
+
+    status, _ = _request(
+        server.port,
+        "POST",
+        "/predict/raw",
+        body=bytes(28 * 28 * 2),
+        headers={"X-Height": "28", "X-Width": "28", "X-Channels": "2"},
+    )
+    assert status == 400
+
+    white = np.full((28, 28), 255, dtype=int).tolist()
+    body = json.dumps({"image": white})
+    assert _request(server.port, "POST", "/predict", body=body)[0] == 500
+    body = json.dumps({"image": img, "top_k": 2})
+    status, response = _request(server.port, "POST", "/predict", body=body)
+    assert status == 200
+    assert len(response["predictions"][0]["indices"]) == 2
+
+
+@pytest.mark.parametrize("length", ["abc", "-1"])
+def test_inference_server_invalid_content_length(serve, length):
+    server = serve(api_factory=_build_api, max_workers=1)
+    with socket.create_connection(("127.0.0.1", server.port), timeout=30) as sock:
+        sock.sendall(
+            f"POST /predict HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode()
+        )
+        response = sock.makefile("rb").read()
+    assert response.startswith(b"HTTP/1.1 400 Bad Request")
+    assert b"Invalid Content-Length" in response
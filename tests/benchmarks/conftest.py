@@ -0,0 +1,138 @@
+import json
+import os
+import platform
+import time
+from typing import Any, Callable, Dict, Optional
+
+import pytest
+import torch
+
+
+def _machine() -> Dict[str, Any]:
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "num_cpus": os.cpu_count(),
+        "num_threads": torch.get_num_threads(),
+    }
+
+
+class BenchmarkRecorder:
+    """Measures benchmarks, records the results and compares them with the
+    baseline.
+
+    Args:
+        baseline (Dict[str, Dict[str, Any]]): Baseline results by name.
+        tolerance (float): Allowed relative regression.
+        update (bool): If True, only record the results (to update the
+            baseline) and do not compare.
+    """
+
+    def __init__(
+        self, baseline: Dict[str, Dict[str, Any]], tolerance: float, update: bool
+    ):
+        self.baseline = baseline
+        self.tolerance = tolerance
+        self.update = update
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def measure(
+        self,
+        name: str,
+        fn: Callable[[], Any],
+        number: Optional[int] = None,
+        repeat: int = 5,
+        min_round_time: float = 0.05,
+        num_items: Optional[int] = None,
+    ) -> float:
+        """Measures `fn` and checks the result against the baseline.
+
+        Like `timeit`, the result is the best of `repeat` rounds of `number`
+        calls (calibrated so that a round takes at least `min_round_time`
+        seconds if None), as milliseconds per call, or as items per second if
+        `num_items` (the number of items processed per call) is given.
+
+        Returns:
+            float: Result.
+        """
+        fn()  # warmup
+        if number is None:
+            number = 1
+            while self._time(fn, number) < min_round_time:
+                number *= 2
+        seconds = min(self._time(fn, number) for _ in range(repeat)) / number
+        if num_items is None:
+            return self.record(name, seconds * 1000, unit="ms")
+        return self.record(
+            name, num_items / seconds, unit="items/s", higher_is_better=True
+        )
+
+    @staticmethod
+    def _time(fn: Callable[[], Any], number: int) -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        return time.perf_counter() - start
+
+    def record(
+        self, name: str, value: float, unit: str, higher_is_better: bool = False
+    ) -> float:
+        """Records a result and fails if it regressed from the baseline."""
+        self.results[name] = {
+            "value": value,
+            "unit": unit,
+            "higher_is_better": higher_is_better,
+        }
+        baseline = self.baseline.get(name)
+        if self.update or baseline is None:
+            return value
+        tolerance = baseline.get("tolerance", self.tolerance)
+        if higher_is_better:
+            limit = baseline["value"] / (1 + tolerance)
+            regressed = value < limit
+        else:
+            limit = baseline["value"] * (1 + tolerance)
+            regressed = value > limit
+        if regressed:
+            pytest.fail(
+                f"{name} regressed: {value:.4g} {unit} (baseline"
+                f" {baseline['value']:.4g} {unit}, limit {limit:.4g} {unit})"
+            )
+        return value
+
+
+@pytest.fixture(scope="session")
+def benchmark_recorder(request):
+    config = request.config
+    baseline_path = config.getoption("--benchmark-baseline")
+    baseline: Dict[str, Any] = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+    recorder = BenchmarkRecorder(
+        baseline.get("results", {}),
+        tolerance=config.getoption("--benchmark-tolerance"),
+        update=config.getoption("--update-benchmark-baseline"),
+    )
+    yield recorder
+
+    if not recorder.results:
+        return
+    report = {"machine": _machine(), "results": recorder.results}
+    output_paths = [config.getoption("--benchmark-output")]
+    if recorder.update:
+        # keep baselines of benchmarks which were not run
+        report["results"] = {**baseline.get("results", {}), **recorder.results}
+        output_paths.append(baseline_path)
+    for path in output_paths:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+
+@pytest.fixture
+def benchmark(benchmark_recorder):
+    return benchmark_recorder
@@ -0,0 +1,26 @@
+import pytest
+from tests.datamodules.image.classification.test_datamodules import (
+    FakeMNISTDataModule,
+    _create_dm,
+)
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.mark.parametrize("in_memory", [False, True])
+def test_datamodule_loader_throughput(tmp_path, benchmark, in_memory):
+    """Benchmark samples/s of an epoch of the train dataloader."""
+
+    dm = _create_dm(FakeMNISTDataModule, tmp_path, in_memory=in_memory)
+    dm.hparams.batch_size = 20
+    loader = dm.train_dataloader()
+
+    def epoch():
+        for _ in loader:
+            pass
+
+    benchmark.measure(
+        f"datamodule.train_dataloader[in_memory={in_memory}]",
+        epoch,
+        num_items=len(dm.data_train),
+    )
@@ -0,0 +1,77 @@
+import json
+import time
+
+import numpy as np
+import pytest
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from my_package.models.image.simple_conv_net import SimpleConvNet
+from my_package.trainers.strategies import ddp_comm_hook_kwargs
+from pytorch_lightning.utilities.distributed import register_ddp_comm_hook
+from tests.litmodules.image.classification.test_litmodule_general import (
+    _learnable_dataset,
+)
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import DataLoader
+
+pytestmark = pytest.mark.benchmark
+
+WORLD_SIZE = 2
+
+
+def _train(rank, world_size, init_file, comm_hook, result_file):
+    torch.set_num_threads(1)
+    dist.init_process_group(
+        "gloo", init_method=f"file://{init_file}", rank=rank, world_size=world_size
+    )
+    torch.manual_seed(0)
+    model = DistributedDataParallel(SimpleConvNet())
+    register_ddp_comm_hook(
+        model, **ddp_comm_hook_kwargs(comm_hook, powersgd_start_iter=10)
+    )
+    optimizer = torch.optim.AdamW(model.parameters(), lr=0.003)
+    criterion = torch.nn.CrossEntropyLoss()
+    loader = DataLoader(_learnable_dataset(320, seed=rank), batch_size=32)
+
+    step_times = []
+    for _ in range(3):
+        for x, y in loader:
+            start = time.perf_counter()
+            optimizer.zero_grad()
+            criterion(model(x), y).backward()
+            optimizer.step()
+            step_times.append(time.perf_counter() - start)
+
+    if rank == 0:
+        x, y = _learnable_dataset(320, seed=world_size).tensors
+        with torch.no_grad():
+            accuracy = (model.module(x).argmax(dim=1) == y).float().mean()
+        with open(result_file, "w") as f:
+            json.dump(
+                {
+                    "step_ms": float(np.median(step_times) * 1000),
+                    "accuracy": float(accuracy),
+                },
+                f,
+            )
+
+
+@pytest.mark.parametrize("comm_hook", ["allreduce", "fp16", "powersgd"])
+def test_ddp_comm_hooks(tmp_path, benchmark, comm_hook):
+    """Benchmark the step time and the final accuracy of 2 gloo processes."""
+
+    result_file = tmp_path / "result.json"
+    mp.spawn(
+        _train,
+        args=(WORLD_SIZE, str(tmp_path / "init"), comm_hook, str(result_file)),
+        nprocs=WORLD_SIZE,
+    )
+    with open(result_file) as f:
+        result = json.load(f)
+
+    name = f"ddp[gloo,world_size={WORLD_SIZE},comm_hook={comm_hook}]"
+    benchmark.record(f"{name}.step", result["step_ms"], unit="ms")
+    benchmark.record(
+        f"{name}.accuracy", result["accuracy"], unit="accuracy", higher_is_better=True
+    )
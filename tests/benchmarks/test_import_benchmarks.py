@@ -0,0 +1,25 @@
+import pytest
+from my_package.utils.import_utils import (
+    format_import_time_report,
+    import_time_report,
+    total_import_time_ms,
+)
+from tests.utils.test_import_utils import INFERENCE_MODULES
+
+pytestmark = pytest.mark.benchmark
+
+# import time of the inference path on top of torch and numpy (about 10 ms
+# locally, about 1 s when it imported Lightning)
+INFERENCE_IMPORT_BUDGET_MS = 150
+
+
+@pytest.mark.parametrize("module", INFERENCE_MODULES)
+def test_inference_import_time(benchmark, module):
+    """Benchmark the import time of the inference path against its budget."""
+
+    report = import_time_report(module, preload=("torch", "numpy"))
+    import_time_ms = total_import_time_ms(report)
+    benchmark.record(f"import[{module}]", import_time_ms, unit="ms")
+    assert import_time_ms < INFERENCE_IMPORT_BUDGET_MS, format_import_time_report(
+        report
+    )
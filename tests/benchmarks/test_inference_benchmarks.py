@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+import torch
+from my_package.applications.image.classification.mnist_api import (
+    MNISTInferenceAPI,
+)
+from my_package.models.image.simple_conv_net import SimpleConvNet
+
+pytestmark = pytest.mark.benchmark
+
+
+def test_inference_api_latency(benchmark):
+    """Benchmark single and batched inference of the inference api."""
+
+    torch.manual_seed(0)
+    api = MNISTInferenceAPI(SimpleConvNet().eval(), top_k=5)
+    rng = np.random.default_rng(0)
+    imgs = [rng.integers(0, 256, (280, 280), dtype=np.uint8) for _ in range(32)]
+
+    benchmark.measure("mnist_api.inference", lambda: api.inference(imgs[0]))
+    benchmark.measure(
+        "mnist_api.inference_batch[32]",
+        lambda: api.inference_batch(imgs),
+        num_items=len(imgs),
+    )
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import pytest
+from my_package.utils.module_utils import compile_instantiation, instantiate
+from omegaconf import OmegaConf
+
+pytestmark = pytest.mark.benchmark
+
+CONFIG_DIR = Path(__file__).parents[2] / "configs"
+
+
+@pytest.mark.parametrize("group", ["model", "transforms"])
+def test_instantiate_latency(benchmark, group):
+    """Benchmark instantiate and a reused instantiation plan of the configs."""
+
+    config = OmegaConf.load(CONFIG_DIR / group / "mnist.yaml")
+    if group == "transforms":
+        # `_batch_` flags are handled by `prepare_lightning_datamodule`
+        confs = [
+            OmegaConf.create({k: v for k, v in conf.items() if k != "_batch_"})
+            for conf in config.values()
+        ]
+    else:
+        confs = [config]
+
+    benchmark.measure(
+        f"instantiate[{group}]", lambda: [instantiate(conf) for conf in confs]
+    )
+    plans = [compile_instantiation(conf) for conf in confs]
+    benchmark.measure(
+        f"instantiation_plan[{group}]", lambda: [plan() for plan in plans]
+    )
+
+
+def test_instantiation_plan_speedup(benchmark, tmp_path):
+    """Benchmark that reusing a plan is faster than repeated instantiation."""
+
+    config = OmegaConf.create(
+        {
+            "data_dir": str(tmp_path),
+            "callbacks": OmegaConf.load(CONFIG_DIR / "callbacks" / "default.yaml"),
+        }
+    ).callbacks
+    time_instantiate = benchmark.measure(
+        "instantiate[callbacks]", lambda: instantiate(config)
+    )
+    time_plan = benchmark.measure(
+        "instantiation_plan[callbacks]", compile_instantiation(config)
+    )
+    assert time_plan < time_instantiate
@@ -0,0 +1,25 @@
+import pytest
+from my_package.loggers import clearml as clearml_logger
+from my_package.loggers.clearml import ClearMLLogger
+from tests.fixtures.fake_clearml import make_fake_clearml
+
+pytestmark = pytest.mark.benchmark
+
+
+def test_clearml_log_metrics_overhead(monkeypatch, benchmark):
+    """Benchmark the training thread overhead of `log_metrics` with a fake
+    ClearML server taking 1 ms per scalar."""
+
+    monkeypatch.setattr(
+        clearml_logger, "clearml", make_fake_clearml(report_delay=0.001)
+    )
+    cml_logger = ClearMLLogger()
+    cml_logger.wait_for_experiment()
+    metrics = {"Loss//train": 0.5, "Accuracy//train": 0.9, "lr": 0.001}
+
+    benchmark.measure(
+        "clearml_logger.log_metrics",
+        lambda: cml_logger.log_metrics(metrics, step=0),
+        number=100,
+    )
+    cml_logger.finalize()
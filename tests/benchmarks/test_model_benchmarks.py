@@ -0,0 +1,35 @@
+import pytest
+import torch
+from my_package.models.image.simple_conv_net import SimpleConvNet
+from my_package.models.image.simple_dense_net import SimpleDenseNet
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.mark.parametrize("model_cls", [SimpleConvNet, SimpleDenseNet])
+# batch norm of SimpleDenseNet needs more than 1 sample in training
+@pytest.mark.parametrize("batch_size", [2, 32, 256])
+def test_model_forward_backward(benchmark, model_cls, batch_size):
+    """Benchmark a forward and backward pass of the models."""
+
+    torch.manual_seed(0)
+    model = model_cls()
+    x = torch.randn(batch_size, 1, 28, 28)
+    y = torch.randint(0, 10, (batch_size,))
+    criterion = torch.nn.CrossEntropyLoss()
+
+    def forward():
+        with torch.no_grad():
+            model(x)
+
+    def forward_backward():
+        model.zero_grad(set_to_none=True)
+        criterion(model(x), y).backward()
+
+    name = f"{model_cls.__name__}[batch_size={batch_size}]"
+    model.eval()
+    benchmark.measure(f"{name}.forward", forward, num_items=batch_size)
+    model.train()
+    benchmark.measure(
+        f"{name}.forward_backward", forward_backward, num_items=batch_size
+    )
@@ -0,0 +1,70 @@
+import functools
+
+import pytest
+import torch
+import torchmetrics
+from my_package.callbacks.asha import ASHAEarlyStopping
+from my_package.litmodules.image.classification.litmodule_general import (
+    ImageClassificationLitModule,
+)
+from my_package.models.image.simple_dense_net import SimpleDenseNet
+from pytorch_lightning import Trainer
+from torch.utils.data import DataLoader, TensorDataset
+
+
+def _fit(tmp_path, trial_id, lr, max_epochs=4, monitor="Accuracy//val"):
+    litmodule = ImageClassificationLitModule(
+        SimpleDenseNet(),
+        functools.partial(torch.optim.SGD, lr=lr),
+        torch.nn.CrossEntropyLoss(),
+        torchmetrics.Accuracy(),
+        torchmetrics.Accuracy(),
+        torchmetrics.Accuracy(),
+        torchmetrics.MaxMetric(),
+    )
+    generator = torch.Generator().manual_seed(0)
+    x = torch.randn(80, 1, 28, 28, generator=generator)
+    # learnable labels
+    dataset = TensorDataset(x, (x.flatten(1)[:, :10]).argmax(dim=1))
+    asha = ASHAEarlyStopping(
+        str(tmp_path / "asha.sqlite"), trial_id, monitor, reduction_factor=2
+    )
+    trainer = Trainer(
+        default_root_dir=str(tmp_path),
+        max_epochs=max_epochs,
+        logger=False,
+        callbacks=[asha],
+        enable_checkpointing=False,
+        enable_progress_bar=False,
+        enable_model_summary=False,
+    )
+    loader = DataLoader(dataset, batch_size=8)
+    trainer.fit(litmodule, train_dataloaders=loader, val_dataloaders=loader)
+    return trainer, asha
+
+
+def test_asha_early_stopping(tmp_path):
+    """Test a weaker trial stops at the first rung and the best one trains until
+    max_epochs."""
+
+    trainer, asha = _fit(tmp_path, "good", lr=0.1)
+    assert trainer.current_epoch == 4
+    assert asha.stopped_epoch == 0
+
+    # does not learn
+    trainer, asha = _fit(tmp_path, "bad", lr=0.0)
+    assert trainer.current_epoch == 1
+    assert asha.stopped_epoch == 1
+
+    results = asha.scheduler.results()
+    assert [(r.trial_id, r.rung, r.promoted) for r in results] == [
+        ("bad", 0, False),
+        ("good", 0, True),
+        ("good", 1, True),
+        ("good", 2, True),
+    ]
+
+
+def test_asha_early_stopping_missing_metric(tmp_path):
+    with pytest.raises(KeyError, match="Loss//x"):
+        _fit(tmp_path, "a", lr=0.1, monitor="Loss//x")
@@ -0,0 +1,90 @@
+import functools
+
+import pytest
+import torch
+import torchmetrics
+from my_package.callbacks.throughput import ThroughputMonitor
+from my_package.litmodules.image.classification.litmodule_general import (
+    ImageClassificationLitModule,
+)
+from my_package.models.image.simple_dense_net import SimpleDenseNet
+from pytorch_lightning import Trainer
+from pytorch_lightning.loggers.base import LightningLoggerBase, rank_zero_experiment
+from torch.utils.data import DataLoader, TensorDataset
+
+
+class RecordingLogger(LightningLoggerBase):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    @property  # type: ignore
+    @rank_zero_experiment
+    def experiment(self):
+        return None
+
+    def log_hyperparams(self, params):
+        pass
+
+    def log_metrics(self, metrics, step=None):
+        self.records.append((dict(metrics), step))
+
+    @property
+    def name(self):
+        return "recording"
+
+    @property
+    def version(self):
+        return 0
+
+
+@pytest.fixture
+def litmodule():
+    return ImageClassificationLitModule(
+        SimpleDenseNet(),
+        functools.partial(torch.optim.SGD, lr=0.01),
+        torch.nn.CrossEntropyLoss(),
+        torchmetrics.Accuracy(),
+        torchmetrics.Accuracy(),
+        torchmetrics.Accuracy(),
+        torchmetrics.MaxMetric(),
+    )
+
+
+def test_throughput_monitor(tmp_path, litmodule):
+    """Test step and epoch throughput metrics are reported to the loggers."""
+
+    dataset = TensorDataset(torch.randn(40, 1, 28, 28), torch.randint(0, 10, (40,)))
+    recorder = RecordingLogger()
+    trainer = Trainer(
+        default_root_dir=str(tmp_path),
+        max_epochs=2,
+        logger=recorder,
+        callbacks=[ThroughputMonitor(log_every_n_steps=2)],
+        enable_checkpointing=False,
+        enable_progress_bar=False,
+        enable_model_summary=False,
+    )
+    trainer.fit(litmodule, train_dataloaders=DataLoader(dataset, batch_size=8))
+
+    records = [
+        (metrics, step)
+        for metrics, step in recorder.records
+        if "Throughput//samples_per_sec" in metrics
+    ]
+    epoch_records = [
+        (metrics, step)
+        for metrics, step in recorder.records
+        if "Throughput//samples_per_sec_epoch" in metrics
+    ]
+    # 5 steps per epoch, logged every 2 steps
+    assert [step for _, step in records] == [2, 4, 7, 9]
+    assert [step for _, step in epoch_records] == [5, 10]
+    for metrics, _ in records + epoch_records:
+        assert all(value >= 0 for value in metrics.values())
+    metrics = epoch_records[0][0]
+    assert metrics["Throughput//samples_per_sec_epoch"] > 0
+    assert metrics["Time//forward_ms_epoch"] > 0
+    assert metrics["Time//backward_ms_epoch"] > 0
+    assert metrics["Time//optimizer_ms_epoch"] > 0
+    assert 0 < metrics["Time//data_wait_fraction_epoch"] < 1
@@ -0,0 +1,87 @@
+import functools
+import os
+import signal
+
+import pytest
+import torch
+import torchmetrics
+from my_package.callbacks.trace_capture import TraceCapture
+from my_package.litmodules.image.classification.litmodule_general import (
+    ImageClassificationLitModule,
+)
+from my_package.models.image.simple_dense_net import SimpleDenseNet
+from pytorch_lightning import Callback, Trainer
+from torch.utils.data import DataLoader, TensorDataset
+
+
+class SendSignal(Callback):
+    def __init__(self, step: int):
+        self.step = step
+
+    def on_train_batch_end(self, trainer, *args, **kwargs):
+        if trainer.global_step == self.step:
+            os.kill(os.getpid(), signal.SIGUSR1)
+
+
+def _fit(tmp_path, callbacks, max_epochs=1):
+    litmodule = ImageClassificationLitModule(
+        SimpleDenseNet(),
+        functools.partial(torch.optim.SGD, lr=0.01),
+        torch.nn.CrossEntropyLoss(),
+        torchmetrics.Accuracy(),
+        torchmetrics.Accuracy(),
+        torchmetrics.Accuracy(),
+        torchmetrics.MaxMetric(),
+    )
+    dataset = TensorDataset(torch.randn(80, 1, 28, 28), torch.randint(0, 10, (80,)))
+    trainer = Trainer(
+        default_root_dir=str(tmp_path),
+        max_epochs=max_epochs,
+        logger=False,
+        callbacks=callbacks,
+        enable_checkpointing=False,
+        enable_progress_bar=False,
+        enable_model_summary=False,
+    )
+    trainer.fit(litmodule, train_dataloaders=DataLoader(dataset, batch_size=8))
+
+
+def _assert_traces(trace_capture, steps):
+    assert [os.path.basename(d)[:12] for d in trace_capture.trace_dirs] == [
+        f"step{step:08d}" for step in steps
+    ]
+    for trace_dir in trace_capture.trace_dirs:
+        assert os.path.getsize(os.path.join(trace_dir, "trace.json")) > 0
+        with open(os.path.join(trace_dir, "summary.txt")) as f:
+            assert "aten::" in f.read()
+
+
+def test_trace_capture_schedule_and_sentinel(tmp_path):
+    """Test captures triggered by the step schedule and the sentinel file."""
+
+    sentinel_file = tmp_path / "CAPTURE"
+    sentinel_file.touch()
+    trace_capture = TraceCapture(
+        output_dir=str(tmp_path / "traces"),
+        num_steps=2,
+        sentinel_file=str(sentinel_file),
+        poll_every_n_steps=2,
+        schedule_steps=[6],
+        signal_name=None,
+    )
+    _fit(tmp_path, [trace_capture])
+    _assert_traces(trace_capture, [0, 6])
+    assert not sentinel_file.exists()
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="SIGUSR1 unsupported")
+def test_trace_capture_signal(tmp_path):
+    """Test a capture triggered by a signal, cut short by the end of training."""
+
+    handler = signal.getsignal(signal.SIGUSR1)
+    trace_capture = TraceCapture(output_dir=str(tmp_path / "traces"), num_steps=5)
+    _fit(tmp_path, [trace_capture, SendSignal(step=6)])
+    # the signal is handled at step 6 (warmup), steps 7 to 9 of 5 are recorded
+    # before training ends
+    _assert_traces(trace_capture, [6])
+    assert signal.getsignal(signal.SIGUSR1) == handler
@@ -9,6 +9,53 @@ import pytest
 from tests import DATASETS_PATH
 
 
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks", "performance benchmarks (tests/benchmarks)")
+    group.addoption(
+        "--run-benchmarks",
+        action="store_true",
+        help="Run the tests marked as benchmark (skipped by default).",
+    )
+    group.addoption(
+        "--benchmark-baseline",
+        default=str(Path(__file__).parent / "benchmarks" / "baselines.json"),
+        help="JSON file of the baseline results.",
+    )
+    group.addoption(
+        "--benchmark-output",
+        default=".benchmarks/results.json",
+        help="JSON file the benchmark results are written to.",
+    )
+    group.addoption(
+        "--benchmark-tolerance",
+        type=float,
+        default=1.0,
+        help="Allowed relative regression against the baseline, e.g. 1.0 fails"
+        " if a latency is more than twice the baseline. The default allows for"
+        " noisy shared machines, use smaller values on dedicated ones.",
+    )
+    group.addoption(
+        "--update-benchmark-baseline",
+        action="store_true",
+        help="Write the results to the baseline file instead of comparing.",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "benchmark: performance benchmark, run with --run-benchmarks"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-benchmarks"):
+        return
+    skip = pytest.mark.skip(reason="benchmarks run with --run-benchmarks")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
 @pytest.fixture(scope="session")
 def datadir():
     return Path(DATASETS_PATH)
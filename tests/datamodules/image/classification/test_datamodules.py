@@ -5,6 +5,8 @@ import torch
 from my_package.datamodules.image.classification.datamodule_general import (
     ImageDataModule,
 )
+from my_package.datasets.image import in_memory_dataset
+from torchvision.transforms import Normalize, ToTensor
 
 
 def _create_dm(dm_cls, datadir, **kwargs):
@@ -43,3 +45,88 @@ def test_image_datamodules(datadir, dm_cls, train_val_test_split, num_workers):
     loader = dm.train_dataloader()
     img, _ = next(iter(loader))
     assert img.size() == torch.Size([2, 1, 28, 28])
+
+
+FakeMNISTDataModule = partial_class(
+    ImageDataModule,
+    dataset_cls="tests.fixtures.fake_datasets.FakeMNIST",
+    train_val_test_split=(100, 20, 40),
+    transforms=[ToTensor(), Normalize((0.1307,), (0.3081,))],
+)
+
+
+@pytest.mark.parametrize("num_workers", [0, 1])
+def test_image_datamodules_in_memory(tmp_path, num_workers):
+    """Test in-memory datamodule yields the same batches as the default one."""
+
+    dm = _create_dm(FakeMNISTDataModule, tmp_path, num_workers=num_workers)
+    dm_in_memory = _create_dm(
+        FakeMNISTDataModule, tmp_path, num_workers=num_workers, in_memory=True
+    )
+    assert len(dm_in_memory.data_train) == 100
+
+    img, target = next(iter(dm_in_memory.train_dataloader()))
+    assert img.size() == torch.Size([2, 1, 28, 28])
+    assert target.size() == torch.Size([2])
+
+    for (img, target), (img_mem, target_mem) in zip(
+        dm.val_dataloader(), dm_in_memory.val_dataloader()
+    ):
+        assert torch.allclose(img, img_mem)
+        assert torch.equal(target, target_mem)
+
+
+def test_image_datamodules_shared_dataset(tmp_path, monkeypatch):
+    """Test in-memory datamodules use a dataset shared under their key."""
+
+    monkeypatch.setattr(in_memory_dataset, "_SHARED_DATASETS", {})
+    dm = FakeMNISTDataModule(data_dir=str(tmp_path), in_memory=True)
+    dm.prepare_data()
+    shared = dm.decode_dataset()
+    shared.targets.fill_(3)
+    in_memory_dataset.share_dataset(dm.in_memory_key, shared)
+
+    dm_shared = _create_dm(FakeMNISTDataModule, tmp_path, in_memory=True)
+    assert dm_shared.decode_dataset() is shared
+    assert (dm_shared.data_train.targets == 3).all()
+    # other transforms give other samples
+    dm_other = FakeMNISTDataModule(
+        data_dir=str(tmp_path), in_memory=True, transforms=[ToTensor()]
+    )
+    assert dm_other.in_memory_key != dm.in_memory_key
+
+
+def test_image_datamodules_memmap(tmp_path):
+    """Test memmap datamodule yields the same batches as the default one."""
+
+    dm = _create_dm(FakeMNISTDataModule, tmp_path)
+    dm_memmap = _create_dm(
+        FakeMNISTDataModule, tmp_path, num_workers=2, memmap_dirname="memmap"
+    )
+    assert (tmp_path / "memmap" / "train" / "index.json").exists()
+
+    for (img, target), (img_memmap, target_memmap) in zip(
+        dm.val_dataloader(), dm_memmap.val_dataloader()
+    ):
+        assert torch.allclose(img, img_memmap)
+        assert torch.equal(target, target_memmap)
+
+
+def test_image_datamodules_autotune(tmp_path):
+    """Test autotune selects dataloader settings from the grid."""
+
+    grid = dict(num_workers=[0, 1], persistent_workers=[True], batch_size=[2, 8])
+    dm = _create_dm(
+        FakeMNISTDataModule,
+        tmp_path,
+        autotune=True,
+        autotune_grid=grid,
+        autotune_num_batches=4,
+    )
+    assert dm.hparams["num_workers"] in grid["num_workers"]
+    assert dm.hparams["batch_size"] in grid["batch_size"]
+
+    loader = dm.train_dataloader()
+    assert loader.batch_size == dm.hparams["batch_size"]
+    assert loader.num_workers == dm.hparams["num_workers"]
+    assert loader.persistent_workers == (loader.num_workers > 0)
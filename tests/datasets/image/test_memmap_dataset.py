@@ -0,0 +1,42 @@
+import pickle
+
+import numpy as np
+import pytest
+import torch
+from my_package.datasets.image.memmap_dataset import (
+    MemmapImageDataset,
+    convert_to_memmap,
+)
+from tests.fixtures.fake_datasets import FakeMNIST
+from torch.utils.data import DataLoader
+from torchvision.transforms import ToTensor
+
+
+@pytest.mark.parametrize("num_processes", [1, 2])
+def test_convert_to_memmap(tmp_path, num_processes):
+    """Test converted shards reproduce the original samples."""
+
+    root = convert_to_memmap(
+        dataset_cls="tests.fixtures.fake_datasets.FakeMNIST",
+        output_dir=str(tmp_path / "memmap"),
+        dataset_kwargs=dict(root=str(tmp_path), train=True),
+        shard_size=50,
+        num_processes=num_processes,
+    )
+    original = FakeMNIST(str(tmp_path), train=True, transform=ToTensor())
+    dataset = MemmapImageDataset(root, transform=ToTensor())
+
+    assert len(dataset.index["shards"]) == 3
+    assert len(dataset) == len(original)
+    for index in (0, 49, 50, 119, -1):
+        img, target = dataset[index]
+        img_original, target_original = original[index]
+        assert torch.equal(img, img_original)
+        assert target == target_original
+
+    # memory maps are reopened by each worker instead of being pickled
+    assert isinstance(dataset.shards[0], np.memmap)
+    assert pickle.loads(pickle.dumps(dataset))._shards is None
+
+    loader = DataLoader(dataset, batch_size=16, num_workers=2)
+    assert sum(len(target) for _, target in loader) == len(original)
@@ -0,0 +1,111 @@
+import pytest
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from my_package.datasets.image.sharded_dataset import (
+    RankShardedDataset,
+    shard_indices,
+    sharded_dataloader,
+)
+from tests.datamodules.image.classification.test_datamodules import (
+    FakeMNISTDataModule,
+)
+from torch.utils.data import TensorDataset
+
+WORLD_SIZE = 3
+NUM_SAMPLES = 20
+
+
+def _indexed_dataset():
+    """Dataset whose images and targets equal the index of the sample."""
+    ids = torch.arange(100, 100 + NUM_SAMPLES)
+    return TensorDataset(ids.float().view(-1, 1, 1, 1), ids)
+
+
+def test_shard_indices():
+    """Test the shards have equal sizes, cover all indices and change by epoch."""
+
+    indices = list(range(10, 20))
+    for epoch in (0, 1):
+        shards = [shard_indices(indices, rank, 4, epoch=epoch) for rank in range(4)]
+        assert all(len(shard) == 3 for shard in shards)
+        assert set(torch.cat(shards).tolist()) == set(indices)
+    assert not torch.equal(
+        shard_indices(indices, 0, 4, epoch=0), shard_indices(indices, 0, 4, epoch=1)
+    )
+    assert torch.equal(
+        shard_indices(indices, 0, 4, epoch=0, shuffle=False),
+        shard_indices(indices, 0, 4, epoch=1, shuffle=False),
+    )
+
+
+def _run_sharded_dataset(rank, world_size, init_file):
+    # the group is left to the exit of the process: destroy_process_group
+    # after all_gather_object intermittently hangs the exit with gloo
+    dist.init_process_group(
+        "gloo", init_method=f"file://{init_file}", rank=rank, world_size=world_size
+    )
+    dataset = _indexed_dataset()
+    indices = list(range(2, NUM_SAMPLES))
+    sharded = RankShardedDataset(dataset, indices, rank, world_size, seed=7)
+    loader = sharded_dataloader(sharded, batch_size=4)
+
+    for epoch in range(3):
+        loader.sampler.set_epoch(epoch)
+        expected = shard_indices(indices, rank, world_size, epoch=epoch, seed=7)
+        # each rank holds the samples of its shard of the epoch, in order
+        targets = torch.cat([y for _, y in loader])
+        assert torch.equal(targets, expected + 100)
+        assert torch.equal(sharded.images.view(-1), expected.float() + 100)
+
+        shards = [None] * world_size
+        dist.all_gather_object(shards, targets.tolist())
+        assert set(sum(shards, [])) == {i + 100 for i in indices}
+        assert len({len(shard) for shard in shards}) == 1
+
+
+def test_sharded_dataset_reshuffles_across_ranks(tmp_path):
+    """Test ranks exchange samples with gloo to hold the shards of each epoch."""
+
+    mp.spawn(
+        _run_sharded_dataset,
+        args=(WORLD_SIZE, str(tmp_path / "init")),
+        nprocs=WORLD_SIZE,
+    )
+
+
+def _run_sharded_datamodule(rank, world_size, init_file, data_dir):
+    dist.init_process_group(
+        "gloo", init_method=f"file://{init_file}", rank=rank, world_size=world_size
+    )
+    dm = FakeMNISTDataModule(
+        data_dir=data_dir, batch_size=8, in_memory=True, shard_by_rank=True
+    )
+    dm.setup()
+    # each rank decodes only its shard of the (100, 20, 40) split
+    assert [len(dm.data_train), len(dm.data_val), len(dm.data_test)] == [
+        50,
+        10,
+        20,
+    ]
+    for epoch in range(2):
+        dm.train_dataloader().sampler.set_epoch(epoch)
+        shards = [None] * world_size
+        dist.all_gather_object(shards, dm.data_train.shard.tolist())
+        assert not set(shards[0]) & set(shards[1])
+
+
+def test_sharded_datamodule(tmp_path):
+    """Test the datamodule materializes only the shards of each rank."""
+
+    FakeMNISTDataModule(data_dir=str(tmp_path)).prepare_data()
+    mp.spawn(
+        _run_sharded_datamodule,
+        args=(2, str(tmp_path / "init"), str(tmp_path)),
+        nprocs=2,
+    )
+
+
+def test_sharded_datamodule_requires_in_memory(tmp_path):
+    with pytest.raises(ValueError, match="in_memory"):
+        FakeMNISTDataModule(data_dir=str(tmp_path), shard_by_rank=True)
@@ -0,0 +1,99 @@
+import threading
+import time
+import types
+from typing import Any, Dict, List, Optional, Tuple
+
+GATE_TIMEOUT = 10.0
+
+
+class FakeClearMLLogger:
+    """Records `report_scalar` calls, optionally sleeping or waiting for
+    `report_gate` to mimic a slow server."""
+
+    def __init__(
+        self, report_delay: float = 0.0, report_gate: Optional[threading.Event] = None
+    ):
+        self.report_delay = report_delay
+        self.report_gate = report_gate
+        # set once a report is in progress (e.g. blocked by the gate)
+        self.report_started = threading.Event()
+        self.scalars: List[Tuple[str, str, float, Optional[int]]] = []
+
+    def report_scalar(
+        self, title: str, series: str, value: float, iteration: Optional[int] = None
+    ) -> None:
+        self.report_started.set()
+        if self.report_gate is not None:
+            # bounded, so that a failing test does not hang
+            self.report_gate.wait(timeout=GATE_TIMEOUT)
+        time.sleep(self.report_delay)
+        self.scalars.append((title, series, value, iteration))
+
+
+class FakeTask:
+    """ClearML-like task recording connected hyperparameters."""
+
+    def __init__(
+        self,
+        report_delay: float = 0.0,
+        report_gate: Optional[threading.Event] = None,
+        **init_kwargs: Any,
+    ):
+        self.init_kwargs = init_kwargs
+        self.params: List[Dict[str, Any]] = []
+        self.logger = FakeClearMLLogger(report_delay, report_gate)
+
+    def get_logger(self) -> FakeClearMLLogger:
+        return self.logger
+
+    def connect(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        self.params.append(dict(params))
+        return params
+
+    def connect_configuration(self, configuration: Dict[str, Any]) -> Dict[str, Any]:
+        return configuration
+
+
+def make_fake_clearml(
+    report_delay: float = 0.0,
+    init_delay: float = 0.0,
+    init_failures: int = 0,
+    report_gate: Optional[threading.Event] = None,
+    init_gate: Optional[threading.Event] = None,
+) -> types.SimpleNamespace:
+    """Returns a fake `clearml` module whose `Task.init` creates `FakeTask`.
+
+    Args:
+        report_delay (float, optional): Seconds each `report_scalar` takes.
+        init_delay (float, optional): Seconds each `Task.init` takes.
+        init_failures (int, optional): Number of first `Task.init` calls
+            raising `ConnectionError`.
+        report_gate (Optional[threading.Event], optional): If given, each
+            `report_scalar` waits until it is set.
+        init_gate (Optional[threading.Event], optional): If given, each
+            `Task.init` waits until it is set.
+
+    Returns:
+        types.SimpleNamespace: Module-like object with `Task` and the created
+            `tasks`.
+    """
+    module = types.SimpleNamespace(tasks=[], num_init_calls=0)
+    lock = threading.Lock()
+
+    class Task(FakeTask):
+        @classmethod
+        def init(cls, **kwargs: Any) -> FakeTask:
+            with lock:
+                module.num_init_calls += 1
+                fail = module.num_init_calls <= init_failures
+            if init_gate is not None:
+                init_gate.wait(timeout=GATE_TIMEOUT)
+            time.sleep(init_delay)
+            if fail:
+                raise ConnectionError("ClearML server is not reachable.")
+            task = cls(report_delay=report_delay, report_gate=report_gate, **kwargs)
+            module.tasks.append(task)
+            return task
+
+    module.Task = Task
+    return module
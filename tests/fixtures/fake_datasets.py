@@ -0,0 +1,42 @@
+from typing import Any, Callable, Optional, Tuple
+
+import torch
+from PIL import Image
+
+
+class FakeMNIST:
+    """MNIST-like dataset with deterministic random images for offline tests.
+
+    Follows the constructor signature of ``torchvision.datasets.MNIST`` so that
+    it can be used as ``dataset_cls`` of ``ImageDataModule``.
+    """
+
+    num_train = 120
+    num_test = 40
+
+    def __init__(
+        self,
+        root: str,
+        train: bool = True,
+        transform: Optional[Callable] = None,
+        download: bool = False,
+    ):
+        self.root = root
+        self.train = train
+        self.transform = transform
+
+        num_samples = self.num_train if train else self.num_test
+        generator = torch.Generator().manual_seed(0 if train else 1)
+        self.data = torch.randint(
+            0, 256, (num_samples, 28, 28), dtype=torch.uint8, generator=generator
+        )
+        self.targets = torch.randint(0, 10, (num_samples,), generator=generator)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, index: int) -> Tuple[Any, int]:
+        img = Image.fromarray(self.data[index].numpy(), mode="L")
+        if self.transform is not None:
+            img = self.transform(img)
+        return img, int(self.targets[index])
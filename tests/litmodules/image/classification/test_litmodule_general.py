@@ -0,0 +1,212 @@
+import functools
+
+import pytest
+import torch
+import torchmetrics
+from my_package.litmodules.image.classification.litmodule_general import (
+    ImageClassificationLitModule,
+)
+from my_package.metrics.classification import ClassificationMetrics
+from my_package.models.image.simple_conv_net import SimpleConvNet
+from pytorch_lightning import Callback, Trainer, seed_everything
+from pytorch_lightning.utilities.model_helpers import is_overridden
+from torch.utils.data import DataLoader, IterableDataset, TensorDataset
+
+
+def _create_litmodule(**kwargs):
+    return ImageClassificationLitModule(
+        SimpleConvNet(),
+        functools.partial(torch.optim.AdamW, lr=0.003),
+        torch.nn.CrossEntropyLoss(),
+        torchmetrics.Accuracy(),
+        torchmetrics.Accuracy(),
+        torchmetrics.Accuracy(),
+        torchmetrics.MaxMetric(),
+        **kwargs,
+    )
+
+
+def _learnable_dataset(num_samples, seed):
+    """Noisy images with a bright patch whose position depends on the class."""
+    generator = torch.Generator().manual_seed(seed)
+    targets = torch.randint(0, 10, (num_samples,), generator=generator)
+    images = torch.randn(num_samples, 1, 28, 28, generator=generator) * 0.5
+    for i, target in enumerate(targets.tolist()):
+        row, col = divmod(target, 5)
+        images[i, 0, 4 + row * 10 : 12 + row * 10, col * 5 : col * 5 + 5] += 2.0
+    return TensorDataset(images, targets)
+
+
+def _fit(litmodule, tmp_path):
+    trainer = Trainer(
+        default_root_dir=str(tmp_path),
+        max_epochs=3,
+        logger=False,
+        enable_checkpointing=False,
+        enable_progress_bar=False,
+        enable_model_summary=False,
+    )
+    trainer.fit(
+        litmodule,
+        train_dataloaders=DataLoader(_learnable_dataset(320, 0), batch_size=32),
+        val_dataloaders=DataLoader(_learnable_dataset(160, 1), batch_size=32),
+    )
+    return float(trainer.callback_metrics["Accuracy//val"])
+
+
+def test_bf16_channels_last_accuracy_parity(tmp_path):
+    """Test bf16 autocast with channels_last trains as accurately as fp32."""
+
+    seed_everything(0)
+    acc_fp32 = _fit(_create_litmodule(), tmp_path)
+    seed_everything(0)
+    litmodule = _create_litmodule(precision="bf16", channels_last=True)
+    acc_bf16 = _fit(litmodule, tmp_path)
+
+    assert acc_fp32 > 0.8
+    assert abs(acc_bf16 - acc_fp32) <= 0.05
+    # the master weights stay in fp32
+    assert litmodule.model.conv1.weight.dtype == torch.float32
+    assert litmodule.model.conv1.weight.is_contiguous(memory_format=torch.channels_last)
+
+
+def test_bf16_step_matches_fp32():
+    """Test the bf16 step computes nearly the same fp32 loss and predictions."""
+
+    litmodule = _create_litmodule()
+    litmodule_bf16 = _create_litmodule(precision="bf16", channels_last=True)
+    litmodule_bf16.model.load_state_dict(litmodule.model.state_dict())
+    images, targets = _learnable_dataset(64, 0).tensors
+
+    loss, logits, _ = litmodule._step((images, targets))
+    loss_bf16, logits_bf16, _ = litmodule_bf16._step((images, targets))
+    assert loss_bf16.dtype == logits_bf16.dtype == torch.float32
+    assert torch.allclose(loss_bf16, loss, rtol=0.02)
+    assert (logits_bf16.argmax(dim=1) == logits.argmax(dim=1)).float().mean() > 0.9
+
+
+def test_invalid_precision():
+    with pytest.raises(ValueError, match="precision"):
+        _create_litmodule(precision=16)
+
+
+class _LargeBatches(IterableDataset):
+    """Yields `num_batches` batches of random features and targets."""
+
+    def __init__(self, num_batches, batch_size):
+        self.num_batches = num_batches
+        self.batch_size = batch_size
+
+    def __iter__(self):
+        for _ in range(self.num_batches):
+            yield torch.randn(self.batch_size, 4), torch.randint(
+                0, 10, (self.batch_size,)
+            )
+
+
+class _RSSRecorder(Callback):
+    def __init__(self, process, every_n_steps):
+        self.process = process
+        self.every_n_steps = every_n_steps
+        self.rss = []
+
+    def on_train_batch_end(self, trainer, pl_module, outputs, batch, batch_idx):
+        if batch_idx % self.every_n_steps == 0:
+            self.rss.append(self.process.memory_info().rss)
+
+
+def test_step_outputs_are_not_retained(tmp_path):
+    """Test memory stays flat across a long epoch (the step outputs are freed)."""
+
+    psutil = pytest.importorskip("psutil")
+    # each step returns 64 KiB of predictions and targets, 25 MiB in total
+    litmodule = ImageClassificationLitModule(
+        torch.nn.Linear(4, 10),
+        functools.partial(torch.optim.SGD, lr=0.01),
+        torch.nn.CrossEntropyLoss(),
+        torchmetrics.Accuracy(),
+        torchmetrics.Accuracy(),
+        torchmetrics.Accuracy(),
+        torchmetrics.MaxMetric(),
+    )
+    for hook in ("training_epoch_end", "validation_epoch_end", "test_epoch_end"):
+        assert not is_overridden(hook, litmodule)
+
+    recorder = _RSSRecorder(psutil.Process(), every_n_steps=50)
+    trainer = Trainer(
+        default_root_dir=str(tmp_path),
+        max_epochs=1,
+        logger=False,
+        callbacks=[recorder],
+        enable_checkpointing=False,
+        enable_progress_bar=False,
+        enable_model_summary=False,
+    )
+    trainer.fit(
+        litmodule,
+        train_dataloaders=DataLoader(_LargeBatches(400, 4096), batch_size=None),
+    )
+
+    # ignore the warm-up of the first steps
+    growth = max(recorder.rss[1:]) - recorder.rss[1]
+    assert growth < 8 * 2**20
+
+
+def test_classification_metrics_are_logged(tmp_path):
+    """Test the scalars of dict metrics are logged once per epoch per stage."""
+
+    litmodule = ImageClassificationLitModule(
+        SimpleConvNet(),
+        functools.partial(torch.optim.AdamW, lr=0.003),
+        torch.nn.CrossEntropyLoss(),
+        ClassificationMetrics(num_classes=10),
+        ClassificationMetrics(num_classes=10, top_k=[3], per_class=True),
+        ClassificationMetrics(num_classes=10, top_k=[3]),
+        torchmetrics.MaxMetric(),
+    )
+    trainer = Trainer(
+        default_root_dir=str(tmp_path),
+        max_epochs=1,
+        logger=False,
+        enable_checkpointing=False,
+        enable_progress_bar=False,
+        enable_model_summary=False,
+    )
+    dataloader = DataLoader(_learnable_dataset(64, 0), batch_size=16)
+    trainer.fit(litmodule, train_dataloaders=dataloader, val_dataloaders=dataloader)
+    metrics = trainer.logged_metrics
+    for key in (
+        "Accuracy//train",
+        "BalancedAccuracy//train",
+        "Accuracy//val",
+        "Top3Accuracy//val",
+        "Recall_class0//val",
+        "Accuracy//val_best",
+    ):
+        assert key in metrics
+    assert "ConfusionMatrix//val" not in metrics
+
+    trainer.test(litmodule, dataloaders=dataloader)
+    metrics = trainer.logged_metrics
+    assert metrics["Top3Accuracy//test"] >= metrics["Accuracy//test"]
+    # the metric states are reset after each epoch
+    assert litmodule.metric_test.confusion_matrix.sum() == 0
+
+
+def test_compiled_step_matches_eager(tmp_path):
+    """Test the compiled model trains and computes the same step as eager."""
+
+    litmodule = _create_litmodule()
+    litmodule_compiled = _create_litmodule(compile=True, compile_backend="aot_eager")
+    litmodule_compiled.model.load_state_dict(litmodule.model.state_dict())
+    # the compiled model adds no parameters
+    assert litmodule_compiled.state_dict().keys() == litmodule.state_dict().keys()
+
+    images, targets = _learnable_dataset(64, 0).tensors
+    loss, logits, _ = litmodule._step((images, targets))
+    loss_compiled, logits_compiled, _ = litmodule_compiled._step((images, targets))
+    assert torch.allclose(logits_compiled, logits, atol=1e-5)
+    assert torch.allclose(loss_compiled, loss, atol=1e-5)
+
+    assert _fit(litmodule_compiled, tmp_path) > 0.8
+    assert litmodule_compiled.compiled_model.compiled
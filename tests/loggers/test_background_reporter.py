@@ -0,0 +1,35 @@
+import threading
+import time
+
+from my_package.loggers.background_reporter import BackgroundReporter
+
+
+def test_flush_timeout_with_full_queue():
+    """Test flush waits at most `timeout` in total for a slot in the full
+    queue and for the reports."""
+
+    gates = [threading.Event(), threading.Event()]
+    started = threading.Event()
+    reported = []
+
+    def report(records):
+        started.set()
+        gates[len(reported) > 0].wait(timeout=10)
+        reported.extend(records)
+
+    reporter = BackgroundReporter(report, max_queue_size=1)
+    reporter.put(0)
+    assert started.wait(timeout=10)  # the worker is blocked on the first record
+    assert reporter.put(1)  # fills the queue
+
+    # frees the queue halfway, the second report stays blocked
+    threading.Timer(0.5, gates[0].set).start()
+    start = time.perf_counter()
+    assert not reporter.flush(timeout=1.0)
+    # 1.5 s if waiting for the reports restarted the timeout
+    assert time.perf_counter() - start < 1.4
+
+    gates[1].set()
+    assert reporter.flush(timeout=10)
+    reporter.close()
+    assert reported == [0, 1]
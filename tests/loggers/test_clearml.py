@@ -0,0 +1,167 @@
+import pickle
+import threading
+import time
+
+import pytest
+from my_package.loggers import clearml as clearml_logger
+from my_package.loggers.clearml import ClearMLLogger
+from pytorch_lightning.loggers.base import DummyExperiment
+from tests.fixtures.fake_clearml import make_fake_clearml
+
+
+@pytest.fixture
+def fake_clearml(monkeypatch):
+    def _patch(**kwargs):
+        module = make_fake_clearml(**kwargs)
+        monkeypatch.setattr(clearml_logger, "clearml", module)
+        return module
+
+    return _patch
+
+
+def test_log_metrics_does_not_block(fake_clearml):
+    """Test a slow server delays only the reports, not `log_metrics`."""
+
+    gate = threading.Event()
+    module = fake_clearml(report_gate=gate)
+    cml_logger = ClearMLLogger(prefix="fit")
+    cml_logger.wait_for_experiment()  # initialize the task
+
+    for step in range(20):
+        cml_logger.log_metrics({"Loss//train": 1.0 / (step + 1), "lr": 0.1}, step)
+    # logged while the server is blocked
+    (task,) = module.tasks
+    assert task.logger.scalars == []
+
+    gate.set()
+    cml_logger.finalize()
+    (task,) = module.tasks
+    assert len(task.logger.scalars) == 40
+    assert task.logger.scalars[0] == ("fit-Loss", "train", 1.0, 0)
+    assert task.logger.scalars[1] == ("", "fit-lr", 0.1, 0)
+
+
+@pytest.mark.parametrize("background", [True, False])
+def test_log_metrics_downsampling(fake_clearml, background):
+    """Test step metrics are reported every `report_every_n_steps` steps."""
+
+    module = fake_clearml()
+    cml_logger = ClearMLLogger(background=background, report_every_n_steps=10)
+    for step in range(100):
+        cml_logger.log_metrics({"Loss//train": float(step)}, step)
+    cml_logger.log_metrics({"Accuracy//val": 0.5}, 99)
+    cml_logger.finalize()
+
+    steps = [step for _, _, _, step in module.tasks[0].logger.scalars]
+    assert steps == list(range(0, 100, 10)) + [99]
+
+
+def test_log_metrics_drops_when_full(fake_clearml):
+    """Test metrics beyond `max_queue_size` are dropped instead of blocking."""
+
+    gate = threading.Event()
+    module = fake_clearml(report_gate=gate)
+    cml_logger = ClearMLLogger(max_queue_size=2)
+    cml_logger.log_metrics({"Loss//train": 0.0}, 0)
+    # the reporter is blocked on the first record, the queue holds 2 more
+    assert cml_logger.wait_for_experiment().logger.report_started.wait(timeout=10)
+    for step in range(1, 10):
+        cml_logger.log_metrics({"Loss//train": float(step)}, step)
+    assert cml_logger._reporter.num_dropped == 7
+
+    gate.set()
+    cml_logger.finalize()
+    steps = [step for _, _, _, step in module.tasks[0].logger.scalars]
+    assert steps == [0, 1, 2]
+
+
+@pytest.mark.parametrize("background", [True, False])
+def test_task_init_in_background(fake_clearml, background):
+    """Test the task is initialized without blocking and buffered metrics and
+    hyperparameters are replayed once it is ready."""
+
+    gate = threading.Event()
+    module = fake_clearml(init_gate=gate)
+    cml_logger = ClearMLLogger(project_name="prj", background=background)
+    if background:
+        # logged while the initialization is blocked
+        cml_logger.log_hyperparams({"lr": 0.1})
+        cml_logger.log_metrics({"Loss//train": 1.0}, 0)
+        assert module.tasks == []
+        gate.set()
+    else:
+        # logging waits for the initialization
+        threading.Timer(0.1, gate.set).start()
+        cml_logger.log_hyperparams({"lr": 0.1})
+        cml_logger.log_metrics({"Loss//train": 1.0}, 0)
+    cml_logger.finalize()
+
+    (task,) = module.tasks
+    assert task.init_kwargs["project_name"] == "prj"
+    assert task.params == [{"lr": 0.1}]
+    assert task.logger.scalars == [("Loss", "train", 1.0, 0)]
+    assert cml_logger.experiment is task
+
+
+def test_task_init_retry(fake_clearml):
+    """Test the task initialization is retried after failures."""
+
+    module = fake_clearml(init_failures=2)
+    cml_logger = ClearMLLogger(init_retries=2, init_retry_delay=0.01)
+    cml_logger.log_metrics({"Loss//train": 1.0}, 0)
+    cml_logger.finalize()
+    assert module.num_init_calls == 3
+    assert module.tasks[0].logger.scalars == [("Loss", "train", 1.0, 0)]
+
+    module = fake_clearml(init_failures=2)
+    cml_logger = ClearMLLogger(init_retries=1, init_retry_delay=0.5)
+    start = time.perf_counter()
+    assert isinstance(cml_logger.wait_for_experiment(), DummyExperiment)
+    assert module.num_init_calls == 2
+    # no delay after the last attempt
+    assert time.perf_counter() - start < 1.0
+
+
+def test_task_init_timeout(fake_clearml):
+    """Test logging proceeds without ClearML if the task is not ready in time."""
+
+    module = fake_clearml(init_delay=1.0)
+    cml_logger = ClearMLLogger(init_timeout=0.1, flush_timeout=1.0)
+    start = time.perf_counter()
+    cml_logger.log_metrics({"Loss//train": 1.0}, 0)
+    cml_logger.finalize()
+    assert isinstance(cml_logger.experiment, DummyExperiment)
+    assert time.perf_counter() - start < 0.5
+    assert module.num_init_calls == 1
+
+
+def test_pickle_restarts_task_init(fake_clearml):
+    """Test an unpickled logger (e.g. in a ddp_spawn process) initializes its
+    own task."""
+
+    module = fake_clearml()
+    cml_logger = ClearMLLogger()
+    task = cml_logger.wait_for_experiment()
+
+    restored = pickle.loads(pickle.dumps(cml_logger))
+    restored.log_metrics({"Loss//train": 1.0}, 0)
+    restored.finalize()
+    assert module.num_init_calls == 2
+    assert restored.experiment is module.tasks[1]
+    assert restored.experiment is not task
+    assert module.tasks[1].logger.scalars == [("Loss", "train", 1.0, 0)]
+
+
+def test_experiment_does_not_block(fake_clearml):
+    """Test `experiment` is a dummy while the task is initialized."""
+
+    gate = threading.Event()
+    module = fake_clearml(init_gate=gate)
+    cml_logger = ClearMLLogger()
+    assert isinstance(cml_logger.experiment, DummyExperiment)
+    assert module.tasks == []
+
+    gate.set()
+    task = cml_logger.wait_for_experiment()
+    assert task is module.tasks[0]
+    assert cml_logger.experiment is task
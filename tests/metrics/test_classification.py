@@ -0,0 +1,87 @@
+import pytest
+import torch
+import torch.distributed as dist
+import torchmetrics
+from my_package.metrics.classification import ClassificationMetrics
+
+
+def _random_batches(num_batches, num_classes=5, batch_size=32):
+    generator = torch.Generator().manual_seed(0)
+    return [
+        (
+            torch.randn(batch_size, num_classes, generator=generator),
+            torch.randint(0, num_classes, (batch_size,), generator=generator),
+        )
+        for _ in range(num_batches)
+    ]
+
+
+def test_classification_metrics_match_torchmetrics():
+    """Test the shared-state metrics agree with separate torchmetrics metrics."""
+
+    metrics = ClassificationMetrics(num_classes=5, top_k=[2, 3], per_class=True)
+    accuracy = torchmetrics.Accuracy()
+    top2_accuracy = torchmetrics.Accuracy(top_k=2)
+    top3_accuracy = torchmetrics.Accuracy(top_k=3)
+    recall = torchmetrics.Recall(num_classes=5, average="none")
+    balanced_accuracy = torchmetrics.Recall(num_classes=5, average="macro")
+    confusion_matrix = torchmetrics.ConfusionMatrix(num_classes=5)
+
+    for logits, targets in _random_batches(4):
+        metrics.update(logits, targets)
+        for metric in (accuracy, top2_accuracy, top3_accuracy, recall):
+            metric.update(logits.softmax(dim=-1), targets)
+        balanced_accuracy.update(logits.softmax(dim=-1), targets)
+        confusion_matrix.update(logits.argmax(dim=-1), targets)
+
+    results = metrics.compute()
+    assert torch.allclose(results["Accuracy"], accuracy.compute())
+    assert torch.allclose(results["Top2Accuracy"], top2_accuracy.compute())
+    assert torch.allclose(results["Top3Accuracy"], top3_accuracy.compute())
+    assert torch.allclose(results["BalancedAccuracy"], balanced_accuracy.compute())
+    for i, value in enumerate(recall.compute()):
+        assert torch.allclose(results[f"Recall_class{i}"], value)
+    assert torch.equal(results["ConfusionMatrix"], confusion_matrix.compute())
+
+
+def test_classification_metrics_labels():
+    """Test predicted classes can be passed instead of scores."""
+
+    metrics = ClassificationMetrics(num_classes=3)
+    metrics.update(torch.tensor([0, 2, 1, 1]), torch.tensor([0, 1, 1, 2]))
+    assert float(metrics.compute()["Accuracy"]) == 0.5
+
+    with pytest.raises(ValueError, match="top_k"):
+        ClassificationMetrics(num_classes=3, top_k=[2]).update(
+            torch.tensor([0]), torch.tensor([0])
+        )
+    with pytest.raises(ValueError, match="top_k"):
+        ClassificationMetrics(num_classes=3, top_k=[4])
+
+
+def test_classification_metrics_sync_only_on_compute(tmp_path):
+    """Test the states are synchronized once in compute, not in update."""
+
+    dist.init_process_group(
+        "gloo", init_method=f"file://{tmp_path}/store", rank=0, world_size=1
+    )
+    try:
+        num_syncs = 0
+
+        def dist_sync_fn(tensor, group=None):
+            nonlocal num_syncs
+            num_syncs += 1
+            return [tensor]
+
+        metrics = ClassificationMetrics(
+            num_classes=5, top_k=[2], dist_sync_fn=dist_sync_fn
+        )
+        for logits, targets in _random_batches(8):
+            metrics.update(logits, targets)
+        assert num_syncs == 0
+
+        metrics.compute()
+        # one gather per state
+        assert num_syncs == 2
+    finally:
+        dist.destroy_process_group()
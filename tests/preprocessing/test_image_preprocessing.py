@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+import torch
+from my_package.preprocessing.image_preprocessing import ImagePreprocessor
+from torchvision import transforms
+
+
+@pytest.mark.parametrize("shape", [(28, 28), (64, 48), (64, 64, 3)])
+def test_image_preprocessor_matches_torchvision(shape):
+    """Test preprocessing matches ToTensor, Resize and Normalize of torchvision."""
+
+    rng = np.random.default_rng(0)
+    imgs = [rng.integers(0, 256, shape, dtype=np.uint8) for _ in range(4)]
+    preprocess = ImagePreprocessor(size=(28, 28), mean=(0.1307,), std=(0.3081,))
+    data_transforms = transforms.Compose(
+        [
+            transforms.ToTensor(),
+            transforms.Grayscale(num_output_channels=1),
+            transforms.Resize((28, 28), antialias=True),
+            transforms.Normalize((0.1307,), (0.3081,)),
+        ]
+    )
+    expected = torch.stack([data_transforms(img) for img in imgs])
+
+    assert torch.allclose(preprocess(imgs), expected, atol=1e-4)
+    assert torch.allclose(preprocess(np.stack(imgs)), expected, atol=1e-4)
+    assert torch.allclose(preprocess(imgs[0]), expected[:1], atol=1e-4)
+
+    mixed = preprocess([imgs[0], np.zeros((10, 10), dtype=np.uint8)])
+    assert mixed.size() == torch.Size([2, 1, 28, 28])
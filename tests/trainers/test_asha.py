@@ -0,0 +1,82 @@
+import multiprocessing
+import sqlite3
+
+import pytest
+from my_package.trainers.asha import ASHAScheduler
+
+
+def test_asha_scheduler_rungs(tmp_path):
+    """Test only the best 1 / reduction_factor of the trials so far continue at
+    the rungs."""
+
+    scheduler = ASHAScheduler(str(tmp_path / "asha.sqlite"), reduction_factor=2)
+    assert [scheduler.rung(epoch) for epoch in range(1, 9)] == [
+        0,
+        1,
+        None,
+        2,
+        None,
+        None,
+        None,
+        3,
+    ]
+    # not a rung
+    assert scheduler.report("a", 3, 0.0)
+
+    # the best of the first trials, then the best half
+    assert scheduler.report("a", 1, 0.5)
+    assert not scheduler.report("b", 1, 0.4)
+    assert scheduler.report("c", 1, 0.6)
+    assert not scheduler.report("d", 1, 0.45)
+    assert not scheduler.report("e", 1, float("nan"))
+    assert scheduler.report("a", 2, 0.7)
+
+    results = scheduler.results()
+    assert [(r.trial_id, r.rung, r.promoted) for r in results] == [
+        ("a", 0, True),
+        ("b", 0, False),
+        ("c", 0, True),
+        ("d", 0, False),
+        ("e", 0, False),
+        ("a", 1, True),
+    ]
+    assert results[4].score is None
+
+    # another process (or a new scheduler) sees the scores
+    scheduler = ASHAScheduler(
+        str(tmp_path / "asha.sqlite"), reduction_factor=2, mode="min"
+    )
+    assert scheduler.report("f", 2, 0.1)
+    assert not scheduler.report("g", 2, 0.2)
+
+
+def _report(path, trial_id):
+    scheduler = ASHAScheduler(path, min_epochs=2, reduction_factor=4)
+    return scheduler.report(str(trial_id), 2, trial_id / 10)
+
+
+def test_asha_scheduler_processes(tmp_path):
+    """Test each of concurrent processes is ranked among the trials reported
+    before it."""
+
+    path = str(tmp_path / "asha.sqlite")
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        promoted = pool.starmap(_report, [(path, trial_id) for trial_id in range(8)])
+
+    with sqlite3.connect(path) as connection:
+        rows = connection.execute(
+            "SELECT trial_id, score FROM rungs ORDER BY rowid"
+        ).fetchall()
+    assert sorted(int(trial_id) for trial_id, _ in rows) == list(range(8))
+    for count, (trial_id, score) in enumerate(rows, 1):
+        ranked = sorted((score for _, score in rows[:count]), reverse=True)
+        assert promoted[int(trial_id)] == (score >= ranked[max(count // 4, 1) - 1])
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [dict(min_epochs=0), dict(reduction_factor=1), dict(mode="best")],
+)
+def test_asha_scheduler_invalid(tmp_path, kwargs):
+    with pytest.raises(ValueError):
+        ASHAScheduler(str(tmp_path / "asha.sqlite"), **kwargs)
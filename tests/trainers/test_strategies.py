@@ -0,0 +1,115 @@
+from pathlib import Path
+
+import pytest
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from hydra import compose, initialize_config_dir
+from my_package.models.image.simple_conv_net import SimpleConvNet
+from my_package.trainers.strategies import (
+    COMM_HOOKS,
+    ddp_comm_hook_kwargs,
+    ddp_strategy,
+)
+from my_package.utils.module_utils import instantiate
+from pytorch_lightning.strategies import DDPSpawnStrategy, DDPStrategy
+from pytorch_lightning.utilities.distributed import register_ddp_comm_hook
+from torch.distributed.algorithms.ddp_comm_hooks import default_hooks
+from torch.distributed.algorithms.ddp_comm_hooks import powerSGD_hook as powersgd
+from torch.nn.parallel import DistributedDataParallel
+
+WORLD_SIZE = 2
+CONFIG_DIR = Path(__file__).parents[2] / "configs"
+
+
+def test_ddp_comm_hook_kwargs():
+    """Test the hook arguments of each comm_hook."""
+
+    assert ddp_comm_hook_kwargs("allreduce") == dict(
+        ddp_comm_state=None, ddp_comm_hook=None, ddp_comm_wrapper=None
+    )
+    kwargs = ddp_comm_hook_kwargs("fp16")
+    assert kwargs["ddp_comm_hook"] is default_hooks.fp16_compress_hook
+    kwargs = ddp_comm_hook_kwargs("powersgd", powersgd_rank=4, powersgd_start_iter=2)
+    assert kwargs["ddp_comm_hook"] is powersgd.powerSGD_hook
+    assert kwargs["ddp_comm_state"].matrix_approximation_rank == 4
+    assert kwargs["ddp_comm_state"].start_powerSGD_iter == 2
+    with pytest.raises(ValueError):
+        ddp_comm_hook_kwargs("int8")
+
+
+def test_ddp_strategy():
+    """Test the strategy gets the hook and the bucket size."""
+
+    strategy = ddp_strategy(comm_hook="fp16", bucket_cap_mb=50)
+    assert isinstance(strategy, DDPStrategy)
+    assert strategy._ddp_comm_hook is default_hooks.fp16_compress_hook
+    assert strategy._ddp_kwargs == {"bucket_cap_mb": 50}
+
+    strategy = ddp_strategy(spawn=True, find_unused_parameters=False)
+    assert isinstance(strategy, DDPSpawnStrategy)
+    assert strategy._ddp_comm_hook is None
+    assert strategy._ddp_kwargs == {
+        "bucket_cap_mb": 25.0,
+        "find_unused_parameters": False,
+    }
+
+
+@pytest.mark.parametrize(
+    "name, comm_hook",
+    [("ddp", None), ("ddp_cpu", default_hooks.fp16_compress_hook)],
+)
+def test_trainer_config_strategy(name, comm_hook):
+    """Test the strategies of the trainer configs can be instantiated."""
+
+    with initialize_config_dir(config_dir=str(CONFIG_DIR), version_base=None):
+        config = compose("default_lightning.yaml", overrides=[f"trainer={name}"])
+    strategy = instantiate(config.trainer.strategy)
+    assert isinstance(strategy, DDPStrategy)
+    assert strategy._ddp_comm_hook is comm_hook
+    assert strategy._ddp_kwargs == {"bucket_cap_mb": 25}
+
+
+def _grads(comm_hook, rank, num_steps=3):
+    torch.manual_seed(0)
+    model = SimpleConvNet()
+    ddp_model = DistributedDataParallel(model)
+    register_ddp_comm_hook(
+        ddp_model, **ddp_comm_hook_kwargs(comm_hook, powersgd_start_iter=2)
+    )
+    for step in range(num_steps):
+        ddp_model.zero_grad()
+        generator = torch.Generator().manual_seed(10 * rank + step)
+        x = torch.randn(8, 1, 28, 28, generator=generator)
+        ddp_model(x).sum().backward()
+    return torch.cat([p.grad.flatten() for p in model.parameters()])
+
+
+def _run_comm_hooks(rank, world_size, init_file):
+    dist.init_process_group(
+        "gloo", init_method=f"file://{init_file}", rank=rank, world_size=world_size
+    )
+    exact = _grads("allreduce", rank)
+    for comm_hook in ("allreduce", "fp16", "powersgd"):
+        grads = _grads(comm_hook, rank)
+        gathered = [torch.empty_like(grads) for _ in range(world_size)]
+        dist.all_gather(gathered, grads)
+        # the ranks apply the same (compressed) gradients
+        assert all(torch.equal(gathered[0], g) for g in gathered[1:])
+        if comm_hook == "fp16":
+            assert torch.allclose(grads, exact, rtol=1e-2, atol=1e-3)
+
+    # gloo cannot all-reduce bf16
+    with pytest.raises(RuntimeError, match="comm_hook=fp16"):
+        _grads("bf16", rank, num_steps=1)
+
+
+def test_comm_hooks_with_gloo(tmp_path):
+    """Test the compressed gradients are equal across ranks with gloo."""
+
+    assert set(COMM_HOOKS) == {"allreduce", "fp16", "bf16", "powersgd"}
+    mp.spawn(
+        _run_comm_hooks,
+        args=(WORLD_SIZE, str(tmp_path / "init")),
+        nprocs=WORLD_SIZE,
+    )
@@ -0,0 +1,96 @@
+import csv
+import json
+import os
+
+import pytest
+import torch
+from my_package.datasets.image.in_memory_dataset import get_shared_dataset
+from my_package.trainers import sweep
+from my_package.trainers.sweep import grid_overrides, run_sweep
+from my_package.utils.lightning_utils import prepare_lightning_datamodule
+from omegaconf import OmegaConf
+
+
+def _objective(config):
+    if config.x < 0:
+        raise ValueError("x must not be negative.")
+    os.makedirs(config.trial_dir, exist_ok=True)
+    with open(os.path.join(config.trial_dir, "threads.json"), "w") as f:
+        json.dump(torch.get_num_threads(), f)
+    return config.x * config.scale
+
+
+def test_run_sweep(tmp_path):
+    """Test trials run in parallel processes and the results are written."""
+
+    config = OmegaConf.create({"x": 0, "scale": 1, "trial_dir": None})
+    trials = grid_overrides({"x": [1, -1, 3], "scale": [2]})
+    results = run_sweep(
+        _objective, config, trials, str(tmp_path), num_workers=2, num_threads=1
+    )
+
+    assert [result.status for result in results] == ["ok", "failed", "ok"]
+    assert [result.score for result in results] == [2.0, None, 6.0]
+    assert "x must not be negative" in results[1].error
+    with open(tmp_path / "trial_0000" / "threads.json") as f:
+        assert json.load(f) == 1
+
+    with open(tmp_path / "results.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["score"] for row in rows] == ["2.0", "", "6.0"]
+    assert [row["x"] for row in rows] == ["1", "-1", "3"]
+
+
+def _uses_shared_dataset(config):
+    datamodule = prepare_lightning_datamodule(config)
+    datamodule.setup()
+    assert len(datamodule.data_train) == 100
+    shared = get_shared_dataset(datamodule.in_memory_key)
+    return float(shared is not None and shared.images.is_shared())
+
+
+def test_run_sweep_shares_dataset(tmp_path):
+    """Test the in-memory dataset is decoded once and shared with the trials
+    with the same transforms."""
+
+    config = OmegaConf.create(
+        {
+            "datamodule": {
+                "_target_": "my_package.datamodules.image.classification"
+                ".datamodule_general.ImageDataModule",
+                "data_dir": str(tmp_path / "data"),
+                "dataset_cls": "tests.fixtures.fake_datasets.FakeMNIST",
+                "train_val_test_split": [100, 20, 40],
+                "in_memory": True,
+            },
+            "transforms": {
+                "to_tensor": {"_target_": "torchvision.transforms.transforms.ToTensor"},
+                "normalize": {
+                    "_target_": "torchvision.transforms.transforms.Normalize",
+                    "mean": [0.1307],
+                    "std": [0.3081],
+                },
+            },
+        }
+    )
+    trials = grid_overrides({"transforms": {"normalize": {"mean": [0.1307, 0.5]}}})
+    results = run_sweep(_uses_shared_dataset, config, trials, str(tmp_path))
+
+    # the trial with other transforms decodes its own dataset
+    assert [result.score for result in results] == [1.0, 0.0]
+
+
+def test_fit_to_cpus(monkeypatch):
+    """Test the workers and threads are reduced to the available CPUs."""
+
+    monkeypatch.setattr(sweep, "available_cpus", lambda: [0, 1, 2, 3])
+    assert sweep._fit_to_cpus(2, 2) == (2, 2)
+    assert sweep._fit_to_cpus(8, 1) == (4, 1)
+    assert sweep._fit_to_cpus(2, 3) == (1, 3)
+    assert sweep._fit_to_cpus(1, 8) == (1, 4)
+    assert sweep.default_num_threads(3) == 1
+
+
+def test_run_sweep_invalid_mode(tmp_path):
+    with pytest.raises(ValueError, match="mode"):
+        run_sweep(_objective, OmegaConf.create({}), [], str(tmp_path), mode="best")
@@ -0,0 +1,79 @@
+import torch
+from my_package.transforms.batch_transforms import (
+    BatchRandomAffine,
+    BatchRandomCrop,
+    BatchRandomHorizontalFlip,
+)
+from my_package.utils.lightning_utils import prepare_lightning_datamodule
+from omegaconf import OmegaConf
+
+
+def test_batch_random_crop():
+    """Test crops keep the image content at per-sample random offsets."""
+
+    x = torch.arange(2 * 3 * 8 * 8, dtype=torch.float32).view(2, 3, 8, 8)
+    crop = BatchRandomCrop(size=4, padding=0)
+    out = crop(x)
+    assert out.size() == torch.Size([2, 3, 4, 4])
+    for img, img_crop in zip(x, out):
+        top, left = divmod(int(img_crop[0, 0, 0] - img[0, 0, 0]), 8)
+        assert torch.equal(img_crop, img[:, top : top + 4, left : left + 4])
+
+    crop.eval()
+    assert torch.equal(crop(x), x[:, :, 2:6, 2:6])
+    assert BatchRandomCrop(size=8, padding=2)(x).size() == x.size()
+
+
+def test_batch_random_flip_and_affine_eval():
+    """Test random transforms are deterministic in eval mode."""
+
+    x = torch.rand(4, 1, 8, 8)
+    assert torch.equal(BatchRandomHorizontalFlip(p=1.0)(x), x.flip(-1))
+    for transform in (BatchRandomHorizontalFlip(p=1.0), BatchRandomAffine(30)):
+        transform.eval()
+        assert torch.equal(transform(x), x)
+
+    identity = BatchRandomAffine(degrees=0)
+    assert torch.allclose(identity(x), x, atol=1e-6)
+
+
+def _transforms_config(tmp_path, is_batch):
+    return OmegaConf.create(
+        {
+            "datamodule": {
+                "_target_": "my_package.datamodules.image.classification"
+                ".datamodule_general.ImageDataModule",
+                "data_dir": str(tmp_path),
+                "dataset_cls": "tests.fixtures.fake_datasets.FakeMNIST",
+                "train_val_test_split": [100, 20, 40],
+                "batch_size": 8,
+            },
+            "transforms": {
+                "to_tensor": {"_target_": "torchvision.transforms.ToTensor"},
+                "normalize": {
+                    "_target_": "my_package.transforms.batch_transforms"
+                    ".BatchNormalize",
+                    "_batch_": is_batch,
+                    "mean": [0.1307],
+                    "std": [0.3081],
+                },
+            },
+        }
+    )
+
+
+def test_prepare_lightning_datamodule_batch_transforms(tmp_path):
+    """Test `_batch_` transforms give the same batches as per-sample ones."""
+
+    batches = []
+    for is_batch in (True, False):
+        dm = prepare_lightning_datamodule(_transforms_config(tmp_path, is_batch))
+        dm.setup()
+        assert (dm.batch_transforms is not None) == is_batch
+        batch = next(iter(dm.val_dataloader()))
+        batches.append(dm.on_after_batch_transfer(batch, dataloader_idx=0))
+
+    (img_batch, target_batch), (img_sample, target_sample) = batches
+    assert img_batch.size() == torch.Size([8, 1, 28, 28])
+    assert torch.allclose(img_batch, img_sample, atol=1e-6)
+    assert torch.equal(target_batch, target_sample)
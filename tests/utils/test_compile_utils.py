@@ -0,0 +1,55 @@
+import pickle
+
+import pytest
+import torch
+from my_package.models.image.simple_dense_net import SimpleDenseNet
+from my_package.utils.compile_utils import CompiledModel
+
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    return SimpleDenseNet().eval()
+
+
+def _failing_backend(graph_module, example_inputs):
+    raise RuntimeError("compilation failed")
+
+
+def test_compiled_model_warmup_report(model):
+    """Test the warmup compiles the model and reports its cost and latencies."""
+
+    compiled_model = CompiledModel(model, backend="aot_eager")
+    report = compiled_model.warmup(torch.randn(4, 1, 28, 28), num_iters=2)
+    assert report.compiled
+    assert report.backend == "aot_eager"
+    assert report.warmup_s >= compiled_model.warmup_s > 0
+    assert report.eager_ms > 0 and report.compiled_ms > 0
+
+
+def test_compiled_model_fallback(model):
+    """Test a failing compilation falls back to eager, but model errors raise."""
+
+    compiled_model = CompiledModel(model, backend=_failing_backend)
+    with pytest.raises(RuntimeError, match="mat1 and mat2"):
+        compiled_model(torch.randn(4, 1, 14, 14))
+    assert compiled_model.compiled
+
+    x = torch.randn(4, 1, 28, 28)
+    with torch.no_grad():
+        assert torch.equal(compiled_model(x), model(x))
+    assert not compiled_model.compiled
+
+    assert not CompiledModel(model, backend="unknown_backend").compiled
+
+
+def test_compiled_model_pickle(model):
+    """Test a pickled compiled model is compiled again."""
+
+    compiled_model = pickle.loads(
+        pickle.dumps(CompiledModel(model, backend="aot_eager"))
+    )
+    assert compiled_model.compiled
+    x = torch.randn(4, 1, 28, 28)
+    with torch.no_grad():
+        assert torch.allclose(compiled_model(x), compiled_model.model(x))
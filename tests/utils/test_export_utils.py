@@ -0,0 +1,76 @@
+import pytest
+import torch
+from my_package.applications.server import instantiate_inference_api
+from my_package.models.image.simple_dense_net import SimpleDenseNet
+from my_package.utils.export_utils import (
+    export_inference_artifact,
+    load_inference_artifact,
+    load_inference_model,
+)
+
+MODEL_CONFIG = {"_target_": "my_package.models.image.simple_dense_net.SimpleDenseNet"}
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    torch.manual_seed(0)
+    model = SimpleDenseNet()
+    # run a training forward to get non-trivial batch norm statistics
+    model(torch.randn(16, 1, 28, 28))
+    ckpt_path = str(tmp_path / "last.ckpt")
+    torch.save(
+        {
+            "state_dict": {f"model.{k}": v for k, v in model.state_dict().items()},
+            "optimizer_states": [{"state": torch.zeros(1000)}],
+        },
+        ckpt_path,
+    )
+    return ckpt_path, model.eval()
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_inference_artifact(tmp_path, checkpoint, mmap):
+    """Test the slim artifact has only the weights and reproduces the model."""
+
+    ckpt_path, model = checkpoint
+    path = export_inference_artifact(
+        ckpt_path, str(tmp_path / "model_artifact.pt"), model_config=MODEL_CONFIG
+    )
+    artifact = load_inference_artifact(path, mmap=mmap)
+    assert artifact["state_dict"].keys() == model.state_dict().keys()
+
+    loaded = load_inference_model(path, mmap=mmap, warmup_input_shape=(1, 1, 28, 28))
+    assert not loaded.training
+    assert all(p.device.type == "cpu" for p in loaded.state_dict().values())
+    x = torch.randn(5, 1, 28, 28)
+    with torch.no_grad():
+        assert torch.allclose(loaded(x), model(x), atol=1e-6)
+
+    with pytest.raises(ValueError):
+        load_inference_model(
+            export_inference_artifact(ckpt_path, str(tmp_path / "no_config.pt"))
+        )
+    with pytest.raises(ValueError):
+        load_inference_artifact(ckpt_path)
+
+
+def test_instantiate_inference_api_from_artifact(tmp_path, checkpoint):
+    """Test the inference api loads the artifact instead of the checkpoint."""
+
+    ckpt_path, model = checkpoint
+    path = export_inference_artifact(ckpt_path, str(tmp_path / "model_artifact.pt"))
+    api = instantiate_inference_api(
+        {
+            "inference_api": {
+                "_target_": "my_package.applications.image.classification"
+                ".mnist_api.MNISTInferenceAPI",
+                "model": MODEL_CONFIG,
+                "top_k": 3,
+            },
+            "model_state_dict": "???",
+            "model_artifact": path,
+        }
+    )
+    x = torch.randn(2, 1, 28, 28)
+    with torch.no_grad():
+        assert torch.allclose(api.model(x), model(x), atol=1e-6)
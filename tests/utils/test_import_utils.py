@@ -0,0 +1,63 @@
+import json
+import subprocess
+import sys
+
+from my_package.utils.import_utils import (
+    format_import_time_report,
+    import_time_report,
+    total_import_time_ms,
+)
+
+INFERENCE_MODULES = [
+    "my_package.applications.image.classification.mnist_api",
+    "my_package.applications.server",
+]
+
+# training-only (or optional) dependencies the inference path must not import
+TRAINING_DEPENDENCIES = [
+    "hydra",
+    "omegaconf",
+    "onnxruntime",
+    "pytorch_lightning",
+    "rich",
+    "torchmetrics",
+    "torchvision",
+]
+
+
+def test_inference_imports_no_training_dependencies():
+    """Test the inference path imports neither Lightning nor other training
+    dependencies."""
+
+    code = "".join(f"import {module}\n" for module in INFERENCE_MODULES)
+    code += "import json, sys; print(json.dumps(sorted(sys.modules)))"
+    proc = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    imported = {name.split(".")[0] for name in json.loads(proc.stdout)}
+    assert imported.isdisjoint(TRAINING_DEPENDENCIES)
+
+
+def test_import_time_report():
+    """Test the report lists the imported modules, the module itself last.
+    The import time budget is checked in `tests/benchmarks`."""
+
+    module = INFERENCE_MODULES[0]
+    report = import_time_report(module, preload=("torch", "numpy"))
+    assert report[-1].module == module
+    assert "torch" not in {entry.module for entry in report}
+    assert total_import_time_ms(report) > 0
+    assert format_import_time_report(report).splitlines()[-1].startswith("total:")
+
+
+def test_lazy_submodules():
+    """Test subpackages are imported on first attribute access."""
+
+    code = (
+        "import sys, my_package\n"
+        "assert 'my_package.applications' not in sys.modules\n"
+        "assert 'applications' in dir(my_package)\n"
+        "assert my_package.applications.server.InferenceServer\n"
+        "assert 'my_package.applications.server' in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,126 @@
+import functools
+from pathlib import Path
+
+import pytest
+from my_package.utils import module_utils
+from my_package.utils.module_utils import (
+    _locate,
+    cached_instantiation,
+    compile_instantiation,
+    instantiate,
+)
+from omegaconf import DictConfig, ListConfig, OmegaConf
+
+CONFIG_DIR = Path(__file__).parents[2] / "configs"
+
+
+def test_locate_cache():
+    """Test repeated targets are located from the cache."""
+
+    _locate.cache_clear()
+    config = OmegaConf.load(CONFIG_DIR / "model" / "mnist.yaml")
+    instantiate(config)
+    misses = _locate.cache_info().misses
+    instantiate(config)
+    assert _locate.cache_info().misses == misses
+
+
+def test_instantiation_plan_matches_instantiate():
+    """Test the plan builds the same, but fresh, objects as instantiate."""
+
+    config = OmegaConf.load(CONFIG_DIR / "model" / "mnist.yaml")
+    plan = compile_instantiation(config)
+    expected, actual, actual_again = instantiate(config), plan(), plan()
+    assert type(actual) is type(expected)
+    assert type(actual.model) is type(expected.model)
+    assert actual.model is not actual_again.model
+    assert isinstance(actual.hparams.optimizer, functools.partial)
+    assert actual.hparams.optimizer.keywords == expected.hparams.optimizer.keywords
+
+
+@pytest.mark.parametrize("convert", ["none", "partial", "all"])
+def test_instantiation_plan_containers(convert):
+    """Test interpolations, nested containers, convert modes and overrides."""
+
+    config = OmegaConf.create(
+        {
+            "size": 3,
+            "layer": {
+                "_target_": "builtins.dict",
+                "_convert_": convert,
+                "linear": {
+                    "_target_": "torch.nn.Linear",
+                    "in_features": 2,
+                    "out_features": "${size}",
+                },
+                "features": {"out": "${size}", "sizes": [1, "${size}"]},
+                "_recursive_": True,
+            },
+        }
+    )
+    plan = compile_instantiation(config.layer)
+    expected, actual = instantiate(config.layer), plan()
+    assert actual["linear"].weight.shape == expected["linear"].weight.shape
+    assert actual["features"] == expected["features"] == {"out": 3, "sizes": [1, 3]}
+    container = dict if convert != "none" else DictConfig
+    assert isinstance(actual["features"], container)
+    assert isinstance(
+        actual["features"]["sizes"], list if convert != "none" else ListConfig
+    )
+    assert plan()["features"] is not plan()["features"]
+    assert plan(features=None)["features"] is None
+
+
+def test_instantiation_plan_reuses_targets(tmp_path):
+    """Test a reused plan builds the same objects as instantiate without
+    locating the targets again."""
+
+    config = OmegaConf.create(
+        {
+            "data_dir": str(tmp_path),
+            "callbacks": OmegaConf.load(CONFIG_DIR / "callbacks" / "default.yaml"),
+        }
+    ).callbacks
+    expected = instantiate(config)
+    plan = compile_instantiation(config)
+    _locate.cache_clear()
+    actual = plan()
+    plan()
+    assert _locate.cache_info().hits + _locate.cache_info().misses == 0
+    assert {k: type(v) for k, v in actual.items()} == {
+        k: type(v) for k, v in expected.items()
+    }
+    assert actual["model_checkpoint"].dirpath == expected["model_checkpoint"].dirpath
+
+
+def test_cached_instantiation(tmp_path, monkeypatch):
+    """Test plans are reused for equal resolved configs only, and configs with
+    objects are not cached."""
+
+    monkeypatch.setattr(module_utils, "_plan_cache", module_utils.OrderedDict())
+    monkeypatch.setattr(module_utils, "_PLAN_CACHE_SIZE", 2)
+    callbacks = OmegaConf.load(CONFIG_DIR / "callbacks" / "default.yaml")
+    config = OmegaConf.create({"data_dir": str(tmp_path), "callbacks": callbacks})
+    plan = cached_instantiation(config.callbacks.model_checkpoint)
+    assert cached_instantiation(config.callbacks.model_checkpoint) is plan
+    checkpoint = plan()
+    assert checkpoint.dirpath == f"{tmp_path}/checkpoints/"
+    assert plan() is not checkpoint
+
+    # another value of the interpolation
+    config.data_dir = str(tmp_path / "other")
+    other_plan = cached_instantiation(config.callbacks.model_checkpoint)
+    assert other_plan is not plan
+    assert other_plan().dirpath == f"{tmp_path}/other/checkpoints/"
+
+    # evicts the least recently used plan
+    cached_instantiation(config.callbacks.early_stopping)
+    assert list(module_utils._plan_cache.values()) == [
+        other_plan,
+        cached_instantiation(config.callbacks.early_stopping),
+    ]
+
+    with_object = OmegaConf.create(
+        {"_target_": "builtins.dict", "obj": object()}, flags={"allow_objects": True}
+    )
+    assert cached_instantiation(with_object) is not cached_instantiation(with_object)
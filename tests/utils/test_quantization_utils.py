@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+import torch
+from my_package.applications.image.classification.mnist_api import (
+    MNISTInferenceAPI,
+)
+from my_package.models.image.simple_conv_net import SimpleConvNet
+from my_package.models.image.simple_dense_net import SimpleDenseNet
+from my_package.utils.quantization_utils import (
+    evaluate_accuracy,
+    fold_batch_norm,
+    quantize_dynamic_int8,
+    quantize_static_int8,
+    save_torchscript,
+)
+
+
+@pytest.fixture(params=[SimpleConvNet, SimpleDenseNet])
+def model(request):
+    torch.manual_seed(0)
+    model = request.param()
+    model(torch.randn(16, 1, 28, 28))  # non-trivial batch norm statistics
+    return model.eval()
+
+
+def test_fold_batch_norm():
+    """Test folding batch norms of SimpleDenseNet keeps its outputs."""
+
+    torch.manual_seed(0)
+    model = SimpleDenseNet()
+    model(torch.randn(16, 1, 28, 28))
+    model.eval()
+    folded = fold_batch_norm(model)
+    assert not any(isinstance(m, torch.nn.BatchNorm1d) for m in folded.modules())
+    x = torch.randn(4, 1, 28, 28)
+    with torch.no_grad():
+        assert torch.allclose(folded(x), model(x), atol=1e-5)
+
+
+@pytest.mark.parametrize("mode", ["dynamic", "static"])
+def test_quantize_int8(tmp_path, model, mode):
+    """Test int8 models agree with the float model and load in the inference API."""
+
+    x = torch.randn(64, 1, 28, 28)
+    if mode == "dynamic":
+        quantized = quantize_dynamic_int8(model)
+    else:
+        quantized = quantize_static_int8(model, [x[:32], x[32:]])
+
+    targets = model(x).argmax(dim=-1)
+    assert evaluate_accuracy(quantized, [(x, targets)]) > 0.8
+
+    path = save_torchscript(quantized, str(tmp_path / "model_int8.pt"))
+    api = MNISTInferenceAPI(backend="torchscript", artifact_path=path)
+    img = np.random.default_rng(0).integers(0, 256, (28, 28), dtype=np.uint8)
+    assert len(api.inference(img)) == 10
+
+
+def test_quantize_static_int8_restores_engine(model):
+    """Test the quantized engine is restored after quantizing for another."""
+
+    engine = torch.backends.quantized.engine
+    x = torch.randn(8, 1, 28, 28)
+    quantized = quantize_static_int8(model, [x], backend="qnnpack")
+    assert torch.backends.quantized.engine == engine
+    assert quantized(x).shape == (8, 10)